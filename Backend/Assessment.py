@@ -0,0 +1,150 @@
+import struct
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Overall scores in the order they are stored and charted
+SCORE_NAMES = ("Accuracy", "Fluency", "Completeness", "Prosody", "Pronunciation")
+SCORE_KEYS = ("AccuracyScore", "FluencyScore", "CompletenessScore", "ProsodyScore", "PronScore")
+
+# Azure's word ErrorType values, stored as their index
+ERROR_TYPES = ("None", "Omission", "Insertion", "Mispronunciation", "UnexpectedBreak", "MissingBreak", "Monotone")
+
+# Offsets and durations are in Azure's 100ns ticks
+WORD_DTYPE = np.dtype([
+    ("offset", "<i8"), ("duration", "<i4"), ("accuracy", "<f4"), ("error", "u1"),
+    ("first_phoneme", "<u2"), ("phoneme_count", "<u2"),
+])
+PHONEME_DTYPE = np.dtype([("offset", "<i8"), ("duration", "<i4"), ("accuracy", "<f4"), ("word", "<u2")])
+
+TICKS_PER_SECOND = 10_000_000
+
+# to_bytes layout: header, scores, word and phoneme arrays, then the UTF-8 strings
+_HEADER = struct.Struct("<4sHHII")
+_MAGIC = b"ASR1"
+_SEPARATOR = "\x1f"
+
+
+class AssessmentRecord:
+    """
+    One Azure pronunciation assessment, covering every word and phoneme, in a
+    few flat NumPy arrays instead of nested JSON dicts: about 20 bytes per
+    phoneme rather than several hundred. Serializes to a compact binary blob
+    for storage with `to_bytes` / `from_bytes`.
+    """
+    __slots__ = ("text", "scores", "words", "word_data", "phonemes", "phoneme_data")
+
+    def __init__(self, text: str, scores: np.ndarray, words: Tuple[str, ...], word_data: np.ndarray,
+                 phonemes: Tuple[str, ...], phoneme_data: np.ndarray):
+        self.text = text
+        self.scores = scores              # float32, SCORE_NAMES order
+        self.words = words
+        self.word_data = word_data        # WORD_DTYPE, aligned with words
+        self.phonemes = phonemes
+        self.phoneme_data = phoneme_data  # PHONEME_DTYPE, aligned with phonemes
+
+    @property
+    def phoneme_scores(self) -> np.ndarray:
+        return self.phoneme_data["accuracy"]
+
+    # Azure reports one decimal; rounding drops the float32 noise on the way out
+    @property
+    def pron_score(self) -> float:
+        return round(float(self.scores[SCORE_NAMES.index("Pronunciation")]), 1)
+
+    def phoneme_pairs(self) -> List[Tuple[str, float]]:
+        return [(phoneme, round(score, 1)) for phoneme, score in zip(self.phonemes, self.phoneme_scores.tolist())]
+
+    def word_errors(self) -> List[Tuple[str, str]]:
+        """(word, error type) for every word Azure flagged."""
+        return [
+            (word, ERROR_TYPES[error])
+            for word, error in zip(self.words, self.word_data["error"].tolist())
+            if error
+        ]
+
+    def metrics(self) -> Dict:
+        """Plain scores for prompts and logs, without the raw Azure payload."""
+        metrics = {
+            "text": self.text,
+            **{name: round(score, 1) for name, score in zip(SCORE_NAMES, self.scores.tolist())},
+            "phonemes": dict(self.phoneme_pairs()),
+        }
+        if self.word_errors():
+            metrics["errors"] = dict(self.word_errors())
+        return metrics
+
+    def to_bytes(self) -> bytes:
+        names = _SEPARATOR.join(self.words + self.phonemes).encode("utf-8")
+        text = self.text.encode("utf-8")
+        return b"".join((
+            _HEADER.pack(_MAGIC, len(self.words), len(self.phonemes), len(text), len(names)),
+            self.scores.astype("<f4").tobytes(),
+            self.word_data.tobytes(),
+            self.phoneme_data.tobytes(),
+            text,
+            names,
+        ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "AssessmentRecord":
+        if len(data) < _HEADER.size or bytes(data[:len(_MAGIC)]) != _MAGIC:
+            raise ValueError("Not a serialized assessment")
+        magic, n_words, n_phonemes, text_length, names_length = _HEADER.unpack_from(data)
+        expected = (_HEADER.size + 4 * len(SCORE_NAMES) + n_words * WORD_DTYPE.itemsize
+                    + n_phonemes * PHONEME_DTYPE.itemsize + text_length + names_length)
+        if len(data) != expected:
+            raise ValueError(f"Serialized assessment is {len(data)} bytes, expected {expected}")
+        offset = _HEADER.size
+        scores = np.frombuffer(data, "<f4", len(SCORE_NAMES), offset)
+        offset += scores.nbytes
+        word_data = np.frombuffer(data, WORD_DTYPE, n_words, offset)
+        offset += word_data.nbytes
+        phoneme_data = np.frombuffer(data, PHONEME_DTYPE, n_phonemes, offset)
+        offset += phoneme_data.nbytes
+        text = bytes(data[offset:offset + text_length]).decode("utf-8")
+        offset += text_length
+        names = bytes(data[offset:offset + names_length]).decode("utf-8")
+        names = tuple(names.split(_SEPARATOR)) if names else ()
+        return cls(text, scores, names[:n_words], word_data, names[n_words:], phoneme_data)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, AssessmentRecord) and self.to_bytes() == other.to_bytes()
+
+    def __repr__(self) -> str:
+        return f"AssessmentRecord({self.text!r}, {len(self.words)} words, {len(self.phonemes)} phonemes)"
+
+
+def parse_assessment(data: Dict) -> AssessmentRecord:
+    """Parse an Azure JSON result (already json-decoded) once, at ingestion."""
+    best = data['NBest'][0]
+    overall = best.get('PronunciationAssessment', {})
+    words = best.get('Words', [])
+    phoneme_count = sum(len(word.get('Phonemes', [])) for word in words)
+
+    word_data = np.zeros(len(words), dtype=WORD_DTYPE)
+    phoneme_data = np.zeros(phoneme_count, dtype=PHONEME_DTYPE)
+    phonemes = []
+    for w, word in enumerate(words):
+        assessment = word.get('PronunciationAssessment', {})
+        error = assessment.get('ErrorType', 'None')
+        word_data[w] = (
+            word.get('Offset', 0), word.get('Duration', 0), assessment.get('AccuracyScore', 0.0),
+            ERROR_TYPES.index(error) if error in ERROR_TYPES else 0,
+            len(phonemes), len(word.get('Phonemes', [])),
+        )
+        for phoneme in word.get('Phonemes', []):
+            phoneme_data[len(phonemes)] = (
+                phoneme.get('Offset', 0), phoneme.get('Duration', 0),
+                phoneme['PronunciationAssessment']['AccuracyScore'], w,
+            )
+            phonemes.append(phoneme['Phoneme'])
+
+    return AssessmentRecord(
+        text=data.get('DisplayText', best.get('Display', '')),
+        scores=np.array([overall.get(key, 0.0) for key in SCORE_KEYS], dtype=np.float32),
+        words=tuple(word.get('Word', '') for word in words),
+        word_data=word_data,
+        phonemes=tuple(phonemes),
+        phoneme_data=phoneme_data,
+    )
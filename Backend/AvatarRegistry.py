@@ -0,0 +1,52 @@
+"""
+Voice clones and Simli faces created from a learner's uploads, keyed by the
+SHA-1 of the uploaded bytes. An upload the learner has already made (in this
+session, an earlier one or another process) is answered from the database
+instead of being sent to ElevenLabs / Simli again.
+"""
+import hashlib
+from typing import Optional
+
+from Backend.RateLimit import SingleFlight
+
+VOICE = "voice"
+FACE = "face"
+
+# A double-clicked uploader or two tabs uploading the same file create one clone
+_uploads = SingleFlight()
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+class AvatarRegistry:
+    def __init__(self, store, voices, simli):
+        self.store = store
+        self.voices = voices    # PostVoice or FakeVoices
+        self.simli = simli      # SimliAPI or FakeSimli
+
+    def _get_or_create(self, user_id: int, kind: str, data: bytes, create) -> str:
+        digest = content_hash(data)
+        provider_id = self.store.get_avatar_asset(user_id, kind, digest)
+        if provider_id is None:
+            provider_id = _uploads.do((user_id, kind, digest), create)
+        # Also marks it as the user's current one
+        self.store.save_avatar_asset(user_id, kind, digest, provider_id)
+        return provider_id
+
+    def voice_id(self, user_id: int, audio: bytes, voice_name: str, filename: str = "sample.mp3") -> str:
+        """The ElevenLabs voice cloned from this sample, cloning it only the first time."""
+        return self._get_or_create(user_id, VOICE, audio, lambda: self.voices.post(audio, voice_name, filename))
+
+    def face_id(self, user_id: int, image: bytes, face_name: str, filename: str = "avatar.png") -> str:
+        """The Simli face generated from this image, generating it only the first time."""
+        return self._get_or_create(
+            user_id, FACE, image, lambda: self.simli.generate_face_id(image, face_name, filename)
+        )
+
+    def current_voice_id(self, user_id: int) -> Optional[str]:
+        return self.store.get_avatar_asset(user_id, VOICE)
+
+    def current_face_id(self, user_id: int) -> Optional[str]:
+        return self.store.get_avatar_asset(user_id, FACE)
@@ -1,19 +1,110 @@
 import os
+import re
 import sys
 import pandas as pd
-from typing import List, Dict, Tuple
-from Env import GEMINI_API_KEY
+from functools import cached_property
+from typing import List, Dict, Tuple, Optional
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from Backend.Store import Store
+from Backend.Services import services
 from Backend.Chatbot import ChatbotWrapper
+from Backend.StructuredOutput import StructuredOutputError
+from Backend.LevelEstimator import LevelAssessment, LevelEstimator
+from Backend.PhonemeAnalytics import PhonemeAnalytics, PracticeCharacters
+from Backend.Scheduler import VocabularyScheduler
+from Backend.LanguagePacks import LanguagePack, load_pack
+
+# detailed assessment criteria, identical for every assessment
+ASSESSMENT_RUBRIC = """
+评估标准：
+1. 词汇量 (占比30%):
+   - 1级: 只会基础问候语和数字
+   - 2级: 能使用150-300个基础词汇
+   - 3级: 能使用300-600个常用词汇
+   - 4级: 能使用600-1000个词汇，包括一些抽象词汇
+   - 5级: 能使用1000-2000个词汇，表达更复杂的概念
+   - 6级: 能使用2000个以上词汇，接近母语者水平
+
+2. 语法准确性 (占比30%):
+   - 1级: 只能说单字或简单词组
+   - 2级: 能组成简单句子，有基本语序
+   - 3级: 能使用基础语法结构，但有明显错误
+   - 4级: 能正确使用常见语法结构，偶有错误
+   - 5级: 能熟练运用复杂语法结构
+   - 6级: 语法使用自然，几乎没有错误
+
+3. 表达流畅度 (占比20%):
+   - 1级: 只能回答是/否
+   - 2级: 能用简单句子回答
+   - 3级: 能进行基本对话
+   - 4级: 能流畅表达简单话题
+   - 5级: 能自然讨论较复杂话题
+   - 6级: 表达流畅自然，接近母语者
+
+4. 理解能力 (占比20%):
+   - 1级: 只能理解单个词汇
+   - 2级: 能理解简单指令
+   - 3级: 能理解日常对话
+   - 4级: 能理解较复杂的表达
+   - 5级: 能理解抽象概念
+   - 6级: 理解能力接近母语者
+
+请根据以上标准分析用户回答，并只给出JSON格式的评估结果：
+{"level": 1到6之间的整数, "confidence": 0到1之间的小数}
+"""
+
+# what the assessment reply must look like, enforced by Gemini's structured output
+ASSESSMENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "level": {"type": "integer", "minimum": 1, "maximum": 6},
+        "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+    },
+    "required": ["level", "confidence"],
+}
+
+# fallback for replies that are not valid JSON, e.g. "级别（必须是整数）：3" or '"level": 3'
+_LEVEL_PATTERN = re.compile(r'(?:级别|level)[^0-9\n]{0,20}?([1-6])(?![0-9])', re.IGNORECASE)
+_CONFIDENCE_PATTERN = re.compile(r'(?:置信度|confidence)[^0-9\n]{0,20}?([01](?:\.[0-9]+)?|\.[0-9]+)', re.IGNORECASE)
+
+
+def parse_level_assessment(text: str) -> Optional[LevelAssessment]:
+    """Pull level/confidence out of free-form text; None if no level is present."""
+    level = _LEVEL_PATTERN.search(text)
+    if not level:
+        return None
+    confidence = _CONFIDENCE_PATTERN.search(text)
+    return LevelAssessment(
+        level=level.group(1),
+        confidence=max(0.0, min(1.0, float(confidence.group(1)))) if confidence else 0.5
+    )
 
 class ChatAnalysis:
-    def __init__(self):
-        self.store = Store()
-        self.chatbot = ChatbotWrapper(GEMINI_API_KEY)
-        self.word_df = pd.read_csv('Data/word.csv')
-        self.char_df = pd.read_csv('Data/char.csv')
+    # local estimates at least this confident skip the LLM assessment entirely
+    LOCAL_CONFIDENCE_THRESHOLD = 0.75
+
+    def __init__(self, store: Store = None, chatbot: ChatbotWrapper = None, pack: LanguagePack = None):
+        if chatbot is None:
+            chatbot = services.get("chatbot")
+
+        self.store = store or Store()
+        self.chatbot = chatbot
+        # The level estimator and practice characters are HSK-specific, so this is the Chinese pack
+        self.pack = pack or load_pack("zh")
+        self.columns = self.pack.columns
+        self.word_df = self.pack.words
+        self.char_df = self.pack.chars if self.pack.has_chars else None
+        self.estimator = LevelEstimator(self.word_df, self.columns, self.char_df, self.pack.char_columns)
+
+    # Indexes over the pack's tables, built by the first feature that needs them
+    @cached_property
+    def practice_chars(self) -> PracticeCharacters:
+        return PracticeCharacters(self.char_df)
+
+    @cached_property
+    def scheduler(self) -> VocabularyScheduler:
+        return VocabularyScheduler(self.store, self.word_df, self.columns)
         
     def _convert_hsk_to_number(self, hsk_level: str) -> str:
         """Convert HSK level format to number format (e.g., 'HSK1' or 'hsk1' to '1')"""
@@ -34,98 +125,73 @@ class ChatAnalysis:
     def get_words_by_group(self, level: str, group: int) -> pd.DataFrame:
         """Get the vocabulary list for the given level"""
         # level should be in number format (e.g., '1', '2', etc.)
-        words = self.word_df[(self.word_df['hsk30_level'] == int(level)) & (self.word_df['Group'] == "Group " + str(group))][['word_simplified', 'cc_cedict_english_definition']]
+        columns = self.columns
+        words = self.word_df[(self.word_df[columns['level']] == int(level)) & (self.word_df[columns['group']] == "Group " + str(group))][[columns['word'], columns['definition']]]
         return words
     
     def get_chars_by_level(self, level: str) -> List[str]:
         """Get the character list for the given level"""
         # level should be in number format (e.g., '1', '2', etc.)
-        chars = self.char_df[self.char_df['level'] == int(level)]['hanzi_sc'].tolist()
+        if self.char_df is None:
+            raise ValueError(f"The {self.pack.name} pack has no character table to list characters from")
+        columns = self.pack.char_columns
+        chars = self.char_df[self.char_df[columns['level']] == int(level)][columns['char']].tolist()
         return chars
     
-    def assess_user_level(self, user_id: int) -> Tuple[str, float]:
-        current_level = self.get_user_level(user_id)
-        
-        # start the assessment conversation
-        initial_prompt = f"""
-        我是一个中文老师，我需要评估你的中文水平。我会问你几个问题，请用中文回答。
-        我会根据你的回答中的词汇使用、语法正确性、表达流畅度来评估你的水平。
-        
-        问题：你最喜欢的食物是什么？30秒以内
-        
-        请用中文回答以上问题。如果你觉得某个问题太难，可以用简单的词汇来表达。
+    def get_pronunciation_report(self, user_id: int, history: int = 2000, limit: int = 5) -> Dict:
+        """Weakest sounds, initials, finals and tones over the user's last `history` assessments, with practice characters."""
+        records = self.store.get_assessments(user_id, limit=history)
+        report = PhonemeAnalytics(records[::-1]).overview(limit)
+        level = int(self.get_user_level(user_id))
+        report["practice"] = self.practice_chars.suggest(
+            [row["phoneme"] for row in report["weakest_sounds"]], max_level=max(level, 1)
+        )
+        return report
+
+    def estimate_user_level(self, user_id: int, utterances: List[str]) -> LevelAssessment:
+        """Local, millisecond-scale estimate from utterances and stored pronunciation scores."""
+        return self.estimator.estimate(utterances, self.store.get_average_score(user_id))
+
+    def assess_user_level(self, user_id: int, user_response: str = None) -> LevelAssessment:
         """
-        
-        user_response = self.chatbot.respond(initial_prompt)
-        
-        # detailed assessment criteria
-        assessment_prompt = f"""
-        请仔细分析用户的回答："{user_response}"
-        
-        评估标准：
-        1. 词汇量 (占比30%):
-           - 1级: 只会基础问候语和数字
-           - 2级: 能使用150-300个基础词汇
-           - 3级: 能使用300-600个常用词汇
-           - 4级: 能使用600-1000个词汇，包括一些抽象词汇
-           - 5级: 能使用1000-2000个词汇，表达更复杂的概念
-           - 6级: 能使用2000个以上词汇，接近母语者水平
-        
-        2. 语法准确性 (占比30%):
-           - 1级: 只能说单字或简单词组
-           - 2级: 能组成简单句子，有基本语序
-           - 3级: 能使用基础语法结构，但有明显错误
-           - 4级: 能正确使用常见语法结构，偶有错误
-           - 5级: 能熟练运用复杂语法结构
-           - 6级: 语法使用自然，几乎没有错误
-        
-        3. 表达流畅度 (占比20%):
-           - 1级: 只能回答是/否
-           - 2级: 能用简单句子回答
-           - 3级: 能进行基本对话
-           - 4级: 能流畅表达简单话题
-           - 5级: 能自然讨论较复杂话题
-           - 6级: 表达流畅自然，接近母语者
-        
-        4. 理解能力 (占比20%):
-           - 1级: 只能理解单个词汇
-           - 2级: 能理解简单指令
-           - 3级: 能理解日常对话
-           - 4级: 能理解较复杂的表达
-           - 5级: 能理解抽象概念
-           - 6级: 理解能力接近母语者
-        
-        请根据以上标准分析用户回答，并只给出以下格式的评估结果：
-        级别（必须是整数）: [1-6]
-        置信度（必须是浮点数）: [0-1]
+        Assess the user's level from their own utterances (the most recent stored
+        ones unless `user_response` is given). The local estimator answers when it
+        is confident; otherwise a single structured-output LLM call does.
         """
-        
-        assessment_result = self.chatbot.respond(assessment_prompt)
-        
-        # parse the assessment result
+        current_level = self.get_user_level(user_id)
+
+        if user_response is None:
+            utterances = list(reversed(self.store.get_recent_user_messages(user_id)))
+        else:
+            utterances = [user_response]
+        user_response = '\n'.join(utterances)
+        if not user_response.strip():
+            # nothing to assess yet, so keep the current level without spending a call
+            return LevelAssessment(current_level, 0.0)
+
+        local = self.estimate_user_level(user_id, utterances)
+        if local.confidence >= self.LOCAL_CONFIDENCE_THRESHOLD:
+            return local
+
+        # the rubric is fixed, so it goes in the (cacheable) system instruction
+        assessment_prompt = f'请仔细分析用户的回答："{user_response}"'
+
         try:
-            # extract the level and confidence from the AI response
-            lines = assessment_result.split('\n')
-            level = "1"
-            confidence = 0.8
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith("级别:"):
-                    level = line.split(":")[1].strip()
-                elif line.startswith("置信度:"):
-                    confidence = float(line.split(":")[1].strip())
-            
-            # ensure the level is in the valid range
-            level = str(max(1, min(6, int(level))))
-            confidence = max(0.0, min(1.0, confidence))
-            
-            return level, confidence
-            
-        except Exception as e:
+            result = self.chatbot.respond_json(
+                assessment_prompt, ASSESSMENT_SCHEMA, system_instruction=ASSESSMENT_RUBRIC
+            )
+            return LevelAssessment(str(result["level"]), result["confidence"])
+        except StructuredOutputError as e:
+            # same reply, parsed leniently; no second call
+            parsed = parse_level_assessment(e.text)
+            if parsed:
+                return parsed
             print(f"解析评估结果时出错: {e}")
-            # if the parsing fails, return the current level and low confidence
-            return current_level, 0.5
+        except Exception as e:
+            print(f"评估失败: {e}")
+
+        # if the parsing fails, return the current level and low confidence
+        return LevelAssessment(current_level, 0.5)
     
     def update_user_level(self, user_id: int, new_level: str) -> None:
         # ensure the new level is a number
@@ -133,18 +199,18 @@ class ChatAnalysis:
         self.store.update_language_level(user_id, number_level)
     
     def get_vocabulary_for_conversation(self, user_id: int, num_words: int = 5) -> List[str]:
-        level = self.get_user_level(user_id)
-        available_words = self.get_words_by_level(level)
-        
-        # if the number of words is less than num_words, and the level is not 1, then add the words of the previous level
-        if len(available_words) < num_words and level != "1":
-            previous_level = str(int(level) - 1)
-            available_words.extend(self.get_words_by_level(previous_level))
-        
-        # random select num_words words
-        import random
-        selected_words = random.sample(available_words, min(num_words, len(available_words)))
-        return selected_words
+        """Words due for review first, then new words from the user's level (and the levels below)."""
+        level = int(self.get_user_level(user_id))
+        return self.scheduler.next_words(user_id, level, num_words)
+
+    def get_word_details(self, words: List[str]) -> pd.DataFrame:
+        """Definitions for `words`, in the given order"""
+        details = self.word_df.drop_duplicates(self.columns['word']).set_index(self.columns['word'])
+        return details.loc[[word for word in words if word in details.index], [self.columns['definition']]].reset_index()
+
+    def review_lesson(self, user_id: int, vocab: List[str], utterances: List[str], records: list) -> None:
+        """Update the spaced-repetition state of the lesson's words from what the user said and how well."""
+        self.scheduler.record_lesson(user_id, vocab, utterances, records)
     
     def start_conversation_with_level_check(self, user_id: int) -> Tuple[List[str], str]:
         # assess the user level
@@ -1,41 +1,161 @@
 import os
 import sys
-from typing import List
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache, partial
+from typing import Dict, List, Tuple
 
 from google import genai
+from google.genai import types
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from Env import GEMINI_API_KEY
 from Backend.Store import Store
+from Backend.Services import services
+from Backend.Context import ConversationContext, estimate_tokens
+from Backend.ReplyScorer import ReplyScorer
+from Backend.LanguagePacks import DEFAULT_LANGUAGE, LanguagePack, load_pack
+from Backend.StructuredOutput import parse_json_reply
+from Backend.RateLimit import BACKGROUND, INTERACTIVE, ProviderLimiter, create_limiter
 
 class ChatbotWrapper:
-    def __init__(self, api_key: str):
+    MODEL = "gemini-2.0-flash"
+    # Gemini refuses to cache content below this size, so shorter instructions are sent inline
+    MIN_CACHE_TOKENS = 4096
+    CACHE_TTL = 3600  # seconds
+
+    def __init__(self, api_key: str, limiter: ProviderLimiter = None):
         self.bot = genai.Client(api_key=api_key)
-        
-    def respond(self, prompt: str):
-        response = self.bot.models.generate_content(
-            model="gemini-2.0-flash", contents=prompt
+        # Shared with every other Gemini client in the process when built through the service registry
+        self.limiter = limiter or create_limiter("gemini")
+        self._caches = {}  # system instruction -> (cached content name or None, expiry)
+        self._cache_lock = threading.Lock()
+
+    def _cached_content(self, system_instruction: str):
+        """Return the provider cache name for a system instruction, or None to send it inline."""
+        if estimate_tokens(system_instruction) < self.MIN_CACHE_TOKENS:
+            return None
+
+        now = time.time()
+        with self._cache_lock:
+            entry = self._caches.get(system_instruction)
+            if entry and entry[1] > now:
+                return entry[0]
+
+        try:
+            cache = self.bot.caches.create(
+                model=self.MODEL,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=system_instruction,
+                    ttl=f"{self.CACHE_TTL}s"
+                )
+            )
+            name = cache.name
+        except Exception as e:
+            # Remember the failure for one TTL rather than paying for it on every turn
+            print(f"Context caching unavailable, sending instructions inline: {e}")
+            name = None
+
+        with self._cache_lock:
+            self._caches = {key: value for key, value in self._caches.items() if value[1] > now}
+            # Expire a minute early so we never reference a cache the provider just dropped
+            self._caches[system_instruction] = (name, now + self.CACHE_TTL - 60)
+        return name
+
+    def _generate(self, prompt: str, system_instruction: str = None, priority: int = INTERACTIVE,
+                  coalesce: bool = True, **config) -> str:
+        """
+        Run one generation and return the raw reply text. Identical concurrent
+        requests share one call unless `coalesce` is off.
+        """
+        key = (prompt, system_instruction, repr(sorted(config.items()))) if coalesce else None
+        if system_instruction:
+            cache_name = self._cached_content(system_instruction)
+            if cache_name:
+                config["cached_content"] = cache_name
+            else:
+                config["system_instruction"] = system_instruction
+
+        response = self.limiter.call(
+            self.bot.models.generate_content,
+            model=self.MODEL, contents=prompt,
+            config=types.GenerateContentConfig(**config) if config else None,
+            priority=priority, key=key
         )
-        response = response.candidates[0].content.parts[0].text
+        return response.candidates[0].content.parts[0].text
+
+    def generate(self, prompt: str, system_instruction: str = None, priority: int = INTERACTIVE,
+                 coalesce: bool = True) -> str:
+        """The reply text exactly as generated, for output that isn't a spoken turn (e.g. summaries)."""
+        return self._generate(prompt, system_instruction, priority=priority, coalesce=coalesce)
+
+    def respond(self, prompt: str, system_instruction: str = None, priority: int = INTERACTIVE,
+                coalesce: bool = True):
+        response = self._generate(prompt, system_instruction, priority=priority, coalesce=coalesce)
+        # Drop speaker prefixes such as "老师："
         response = response.split("：")[-1].split(":")[-1].strip()
         return response
 
+    def respond_json(self, prompt: str, schema: Dict, system_instruction: str = None,
+                     priority: int = INTERACTIVE):
+        """
+        Ask for a JSON reply constrained to `schema` and return it validated.
+        Raises StructuredOutputError carrying the raw text if it still doesn't match.
+        """
+        text = self._generate(
+            prompt, system_instruction, priority=priority,
+            response_mime_type="application/json",
+            response_schema=schema
+        )
+        return parse_json_reply(text, schema)
+
+@lru_cache(maxsize=256)
+def render_instructions(template: str, level: str, topic: str, vocab: Tuple[str, ...],
+                        topic_template: str = "在{topic}的方面", separator: str = "、") -> str:
+    """Render the fixed part of a lesson prompt once per (level, topic, vocab)."""
+    topic_prompt = topic_template.format(topic=topic) if topic else ""
+    return template.format(level=level, vocab=separator.join(vocab), topic_prompt=topic_prompt)
+
+
 class ChatConversation:
     def __init__(
         self, 
-        chatbot: ChatbotWrapper = ChatbotWrapper(GEMINI_API_KEY),
+        chatbot: ChatbotWrapper = None,
         rounds: int = 5, 
         vocab: List[str] = [],
         topic: str = "",
-        user_id: int = None
+        user_id: int = None,
+        store: Store = None,
+        context_turns: int = 6,
+        context_budget: int = 1000,
+        candidates: int = 1,
+        parallel_candidates: int = 2,
+        scorer: ReplyScorer = None,
+        pack: LanguagePack = None
     ):
+        if chatbot is None:
+            chatbot = services.get("chatbot")
+
         self.rounds = rounds
         self.bot = chatbot
-        self.context = []
+        # With candidates > 1, each turn tries up to that many generations, `parallel_candidates`
+        # at a time, and keeps the first on-level one
+        self.candidates = candidates
+        self.parallel_candidates = parallel_candidates
+        # Keeps the last `context_turns` turns verbatim and summarizes the rest in the background
+        self.context = ConversationContext(
+            # Raw text: respond() would cut a summary at its last colon, taken for a speaker prefix
+            summarize=partial(chatbot.generate, priority=BACKGROUND),
+            keep_turns=context_turns,
+            token_budget=context_budget
+        )
+        self.context_turns = context_turns
+        self.context_budget = context_budget
         self.vocab = vocab
         self.topic = topic
         self.user_id = user_id
-        self.store = Store() if user_id else None
+        self.store = (store or Store()) if user_id else None
         self.conversation_id = None
         
         if user_id:
@@ -44,22 +164,16 @@ class ChatConversation:
         else:
             self.language_level = '1'
             
-        self.prompt_template = """
-        现在请你扮演一个中文老师，你的学生是一个HSK{level}水平的中文学习者。
-        请使用以下词汇，领导一个简单的多轮对话。{topic_prompt}
-        词汇：{vocab}。
-        **请注意，你的回答应该是中文的。**
-        **请注意，每次回答需要以"老师："开头。**
-        **请注意，除非被要求，不要自己结束对话。**
-        **请注意，你需要使用以上词汇自行构筑对话内容，引导学生的学习。**
-        {context}
-        """
-        
-        self.closing_template = """
-        请你用简短的语言总结并结束这个对话。
-        **请注意，你的语气需要有结束感。**
-        老师：
-        """
+        # Prompts and speaker prefixes come from the lesson's language pack
+        self.pack = pack or load_pack()
+        self.scorer = scorer or ReplyScorer(pack=self.pack)
+        prompts = self.pack.prompts
+        # Stable per lesson, sent as the system instruction; only the context changes per turn
+        self.instruction_template = prompts["instructions"]
+        self.opening_prompt = prompts["opening"]
+        self.closing_template = prompts["closing"]
+        self.teacher_prefix = prompts["teacher"]
+        self.student_prefix = prompts["student"]
         
         self.assess_template = """
         Please summarize the content of this conversation and the pronunciation evaluation indicators, and make a summary of the situation of the student using a friendly tone.
@@ -68,25 +182,117 @@ class ChatConversation:
         {metrics}
         """
         
-    def respond(self, if_end=False):
-        topic_prompt = f"在{self.topic}的方面" if self.topic else ""
-        prompt = self.prompt_template.format(
-            level=self.language_level,
-            vocab='、'.join(self.vocab), 
-            topic_prompt=topic_prompt,
-            context='\n'.join(self.context)
+    def to_state(self) -> dict:
+        """Everything needed to continue this lesson in another process; see Backend/SessionStore.py."""
+        return {
+            "rounds": self.rounds,
+            "vocab": list(self.vocab),
+            "topic": self.topic,
+            "user_id": self.user_id,
+            "conversation_id": self.conversation_id,
+            "language_level": self.language_level,
+            "candidates": self.candidates,
+            "parallel_candidates": self.parallel_candidates,
+            "context_turns": self.context_turns,
+            "context_budget": self.context_budget,
+            "context": self.context.to_state(),
+            "language": self.pack.code,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict, chatbot: ChatbotWrapper = None, store: Store = None) -> "ChatConversation":
+        """Continue a lesson saved with `to_state`, without starting a new stored conversation."""
+        conversation = cls(
+            chatbot, rounds=state["rounds"], vocab=state["vocab"], topic=state["topic"],
+            context_turns=state["context_turns"], context_budget=state["context_budget"],
+            candidates=state["candidates"], parallel_candidates=state.get("parallel_candidates", 2),
+            pack=load_pack(state.get("language", DEFAULT_LANGUAGE)),
         )
-        
-        if if_end and self.store and self.conversation_id:
+        conversation.user_id = state["user_id"]
+        conversation.store = (store or Store()) if state["user_id"] else None
+        conversation.conversation_id = state["conversation_id"]
+        conversation.language_level = state["language_level"]
+        conversation.context.restore(state["context"])
+        return conversation
+
+    def get_instructions(self) -> str:
+        return render_instructions(
+            self.instruction_template, self.language_level, self.topic, tuple(self.vocab),
+            self.pack.prompts["topic"], self.pack.prompts["vocab_separator"]
+        )
+
+    def respond(self, if_end=False):
+        prompt = self.context.render() or self.opening_prompt
+
+        if if_end:
             prompt += self.closing_template
-            self.store.end_conversation(self.conversation_id)
+            if self.store and self.conversation_id:
+                self.store.end_conversation(self.conversation_id)
         
-        response = self.bot.respond(prompt)
+        if self.candidates > 1:
+            response = self._speculate(prompt, self.get_instructions())
+        else:
+            response = self.bot.respond(prompt, system_instruction=self.get_instructions())
         if self.store and self.conversation_id:
             self.store.save_message(self.conversation_id, response, is_user=False)
         
         return response
     
+    def _speculate(self, prompt: str, instructions: str) -> str:
+        """
+        Generate up to `self.candidates` replies, `self.parallel_candidates` at a
+        time, and return the first one the local scorer accepts, or the
+        best-scoring one if none is acceptable. A further generation starts only
+        when an earlier one is rejected or fails, so once a reply is chosen the
+        remaining candidates are never requested; ones already in flight cannot
+        be interrupted and are simply discarded.
+        """
+        parallel = max(1, min(self.candidates, self.parallel_candidates))
+        executor = ThreadPoolExecutor(max_workers=parallel)
+        started = 0
+
+        def start():
+            nonlocal started
+            started += 1
+            # identical requests on purpose, so they must not be coalesced into one
+            return executor.submit(self.bot.respond, prompt, system_instruction=instructions, coalesce=False)
+
+        pending = {start() for _ in range(parallel)}
+        best, best_score = None, -1.0
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        reply = future.result()
+                    except Exception as e:
+                        print(f"Candidate generation failed: {e}")
+                    else:
+                        score, acceptable = self.scorer.score(reply, self.vocab, self.language_level)
+                        if acceptable:
+                            return reply
+                        if score > best_score:
+                            best, best_score = reply, score
+                    if started < self.candidates:
+                        pending.add(start())
+        finally:
+            executor.shutdown(wait=False)
+
+        if best is None:
+            raise Exception(f"All {self.candidates} candidate generations failed")
+        return best
+
+    def add_user_message(self, content: str):
+        """Append a student turn to the context and persist it with its vocabulary coverage."""
+        self.context.append(f"{self.student_prefix}{content}")
+        if self.store and self.conversation_id:
+            words_practiced = sum(1 for word in self.vocab if word in content)
+            self.store.save_message(self.conversation_id, content, is_user=True, words_practiced=words_practiced)
+
+    def add_teacher_message(self, content: str):
+        """Append a tutor turn to the context (the reply itself is persisted by `respond`)."""
+        self.context.append(f"{self.teacher_prefix}{content}")
+
     def assess(self, metrics):
         prompt = self.assess_template.format(context='\n'.join(self.context), metrics=metrics)
         response = self.bot.respond(prompt)
@@ -94,33 +300,25 @@ class ChatConversation:
         
     def converse(self):
         response = self.respond()
-        self.context.append(f"老师：{response}")
-        print(f"老师：{response}")
+        self.add_teacher_message(response)
+        print(f"{self.teacher_prefix}{response}")
         
         for _ in range(self.rounds - 1):
-            cur_input = input("学生：")
-            if self.store and self.conversation_id:
-                self.store.save_message(self.conversation_id, cur_input, is_user=True)
-            self.context.append(f"学生：{cur_input}")
+            cur_input = input(self.student_prefix)
+            self.add_user_message(cur_input)
             response = self.respond()
-            self.context.append(f"老师：{response}")
-            print(f"老师：{response}")
+            self.add_teacher_message(response)
+            print(f"{self.teacher_prefix}{response}")
             
-        cur_input = input("学生：")
-        if self.store and self.conversation_id:
-            self.store.save_message(self.conversation_id, cur_input, is_user=True)
-        self.context.append(f"学生：{cur_input}")
+        cur_input = input(self.student_prefix)
+        self.add_user_message(cur_input)
         response = self.respond(if_end=True)
-        self.context.append(f"老师：{response}")
-        print(f"老师：{response}")
+        self.add_teacher_message(response)
+        print(f"{self.teacher_prefix}{response}")
         
     def get_context(self):
         return self.context
 
-    def __del__(self):
-        if self.store:
-            self.store.close()
-
 
 if __name__ == "__main__":
     # Test the chatbot
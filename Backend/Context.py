@@ -0,0 +1,109 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+# Summaries are background work; a small shared pool keeps them off the turn's critical path
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="context-summary")
+
+_CJK_PATTERN = re.compile(r'[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]')
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough local token count: one per CJK character, one per ~4 other characters."""
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+class ConversationContext(list):
+    """
+    The full list of conversation turns, rendered for prompts as a running
+    summary of older turns plus the most recent turns verbatim, capped at a
+    token budget so prompt size stays flat however long the lesson runs.
+    """
+
+    summary_template = """
+    请用中文简要概括以下师生对话的要点，不超过100字。
+    请保留学生已经练习过的词汇和学生常犯的错误。
+    已有摘要：{summary}
+    新的对话：
+    {turns}
+    """
+
+    def __init__(
+        self,
+        summarize: Optional[Callable[[str], str]] = None,
+        keep_turns: int = 6,
+        token_budget: int = 1000
+    ):
+        super().__init__()
+        self.summarize = summarize
+        self.keep_turns = keep_turns
+        self.token_budget = token_budget
+        self.summary = ""
+        self.summarized_turns = 0
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def append(self, turn: str) -> None:
+        super().append(turn)
+        self._maybe_summarize()
+
+    def _maybe_summarize(self) -> None:
+        """Fold turns older than the verbatim window into the summary in the background."""
+        if self.summarize is None:
+            return
+        with self._lock:
+            if self._pending is not None:
+                return
+            end = len(self) - self.keep_turns
+            if end <= self.summarized_turns:
+                return
+            turns = list(self[self.summarized_turns:end])
+            prompt = self.summary_template.format(summary=self.summary or "无", turns='\n'.join(turns))
+            self._pending = future = _summary_executor.submit(self.summarize, prompt)
+        # Registered outside the lock: an already-finished future runs the callback inline
+        future.add_done_callback(lambda done: self._finish_summary(done, end))
+
+    def _finish_summary(self, future, end: int) -> None:
+        with self._lock:
+            self._pending = None
+            if future.exception() is not None:
+                return  # keep the turns verbatim and retry on the next append
+            self.summary = future.result().strip()
+            self.summarized_turns = end
+        # Turns may have arrived while this summary was running
+        self._maybe_summarize()
+
+    def to_state(self) -> dict:
+        """Turns and summary as plain data, for the session store."""
+        with self._lock:
+            return {"turns": list(self), "summary": self.summary, "summarized_turns": self.summarized_turns}
+
+    def restore(self, state: dict) -> None:
+        with self._lock:
+            self[:] = state["turns"]
+            self.summary = state["summary"]
+            self.summarized_turns = state["summarized_turns"]
+
+    def recent_turns(self) -> List[str]:
+        """Turns not yet folded into the summary, newest last."""
+        with self._lock:
+            return list(self[self.summarized_turns:])
+
+    def render(self) -> str:
+        """Summary plus as many recent turns as fit in the token budget."""
+        with self._lock:
+            summary = self.summary
+        header = f"之前的对话摘要：{summary}" if summary else ""
+        budget = self.token_budget - estimate_tokens(header)
+
+        kept = []
+        for turn in reversed(self.recent_turns()):
+            cost = estimate_tokens(turn)
+            if kept and cost > budget:
+                break
+            kept.append(turn)
+            budget -= cost
+
+        return '\n'.join(([header] if header else []) + kept[::-1])
@@ -0,0 +1,322 @@
+"""
+Offline stand-ins for the external services (Gemini, ElevenLabs, Simli, Azure
+ASR) with the same interfaces as the real clients. Latency, payload size,
+failure rate and streaming behaviour are configurable, so load tests measure
+our own overhead instead of the providers'. Select them with
+`services: {mode: fake}` in config.yaml.
+"""
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+
+class FakeServiceError(Exception):
+    """Injected failure, standing in for a provider error or timeout."""
+
+
+class Latency:
+    """Latency distribution in seconds: constant, uniform (mean ± spread) or lognormal (median, sigma)."""
+
+    def __init__(self, kind: str = "constant", mean: float = 0.0, spread: float = 0.0):
+        if kind not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.kind = kind
+        self.mean = mean
+        self.spread = spread
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            return max(0.0, rng.uniform(self.mean - self.spread, self.mean + self.spread))
+        if self.kind == "lognormal":
+            return rng.lognormvariate(0, self.spread) * self.mean if self.mean > 0 else 0.0
+        return self.mean
+
+
+class FakeService:
+    """Shared latency / failure / payload behaviour for every fake client."""
+
+    def __init__(self, latency: Dict = None, failure_rate: float = 0.0, payload_bytes: int = 0,
+                 stream_chunks: int = 1, seed: int = None):
+        self.latency = Latency(**(latency or {}))
+        self.failure_rate = failure_rate
+        self.payload_bytes = payload_bytes
+        self.stream_chunks = max(1, stream_chunks)
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def _draw(self):
+        with self._rng_lock:
+            return self.latency.sample(self._rng), self._rng.random()
+
+    def _call(self, name: str) -> None:
+        """Wait one sampled latency, then fail with probability `failure_rate`."""
+        delay, roll = self._draw()
+        time.sleep(delay)
+        if roll < self.failure_rate:
+            raise FakeServiceError(f"Injected {type(self).__name__}.{name} failure")
+
+    def _stream(self, name: str, fill: bytes = b"\0"):
+        """Yield the payload in `stream_chunks` pieces, spreading the latency across them."""
+        delay, roll = self._draw()
+        chunk_size = max(1, self.payload_bytes // self.stream_chunks)
+        chunk = (fill * (chunk_size // len(fill) + 1))[:chunk_size]
+        for i in range(self.stream_chunks):
+            time.sleep(delay / self.stream_chunks)
+            if roll < self.failure_rate and i == self.stream_chunks // 2:
+                raise FakeServiceError(f"Injected {type(self).__name__}.{name} failure mid-stream")
+            yield chunk
+
+
+class FakeChatbot(FakeService):
+    """ChatbotWrapper stand-in replying with lesson-flavoured Chinese text."""
+    REPLIES = [
+        "你好！你今天怎么样？",
+        "很好！你喜欢吃什么？",
+        "我们一起练习这些词语吧。",
+        "说得很好，请再说一遍。",
+        "谢谢你，我们下次再见！",
+    ]
+
+    def __init__(self, reply_chars: int = 30, **behaviour):
+        super().__init__(**behaviour)
+        self.reply_chars = reply_chars
+
+    def respond(self, prompt: str, system_instruction: str = None, priority: int = 0, coalesce: bool = True) -> str:
+        self._call("respond")
+        with self._rng_lock:
+            reply = ''.join(self._rng.choice(self.REPLIES) for _ in range(self.reply_chars // 10 + 1))
+        return reply[:self.reply_chars]
+
+    def generate(self, prompt: str, system_instruction: str = None, priority: int = 0, coalesce: bool = True) -> str:
+        return self.respond(prompt, system_instruction, priority, coalesce)
+
+    def respond_json(self, prompt: str, schema: Dict, system_instruction: str = None, priority: int = 0):
+        self._call("respond_json")
+        with self._rng_lock:
+            return {"level": self._rng.randint(1, 6), "confidence": round(self._rng.random(), 2)}
+
+
+class FakeSpeech(FakeService):
+    """GenSpeech stand-in writing `payload_bytes` derived from the text, so equal text gives equal audio."""
+
+    def __init__(self, payload_bytes: int = 48000, **behaviour):
+        super().__init__(payload_bytes=payload_bytes, **behaviour)
+
+    def generate(self, text: str, voice_id: str = None, out_path: str = "Samples/test.mp3", priority: int = 0):
+        chunks = []
+        with open(out_path, "wb") as mp3_file:
+            for chunk in self._stream("generate", fill=text.encode() or b"\0"):
+                mp3_file.write(chunk)
+                chunks.append(chunk)
+        return chunks
+
+
+class FakeVoices(FakeService):
+    """PostVoice stand-in returning a voice ID derived from the sample, so the same sample gives the same ID."""
+
+    def post(self, audio, voice_name: str, filename: str = "sample.mp3") -> str:
+        if isinstance(audio, str):
+            with open(audio, "rb") as audio_file:
+                audio = audio_file.read()
+        self._call("post")
+        return f"fake-voice-{hashlib.sha1(audio).hexdigest()[:12]}"
+
+
+class FakeHLSServer:
+    """
+    Local live HLS source for exercising incremental playback: each stream's
+    playlist lists one more segment every `segment_interval` seconds after it
+    is first requested, then ends. Segments are MJPEG clips OpenCV can decode.
+
+        server = FakeHLSServer(port=8765)
+        server.url("demo")  # http://127.0.0.1:8765/demo/playlist.m3u8
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, segments: int = 5,
+                 segment_seconds: float = 1.0, segment_interval: float = None, fps: int = 25):
+        self.segments = segments
+        self.segment_seconds = segment_seconds
+        # Rendering at real time by default: a segment appears as fast as it plays
+        self.segment_interval = segment_seconds if segment_interval is None else segment_interval
+        self._clips = self._render_clips(fps)
+        self._started: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def url(self, stream: str) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/{stream}/playlist.m3u8"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _render_clips(self, fps: int) -> List[bytes]:
+        import cv2
+        import numpy as np
+
+        clips = []
+        frames = int(self.segment_seconds * fps)
+        for index in range(self.segments):
+            path = os.path.join(tempfile.mkdtemp(), f"seg{index}.avi")
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (256, 256))
+            for frame_number in range(frames):
+                image = np.zeros((256, 256, 3), dtype=np.uint8)
+                cv2.putText(image, f"{index}:{frame_number}", (40, 140),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 2)
+                writer.write(image)
+            writer.release()
+            with open(path, "rb") as clip:
+                clips.append(clip.read())
+            os.remove(path)
+        return clips
+
+    def _playlist(self, stream: str) -> str:
+        with self._lock:
+            started = self._started.setdefault(stream, time.monotonic())
+        available = min(self.segments, int((time.monotonic() - started) / self.segment_interval) + 1)
+        lines = ["#EXTM3U", "#EXT-X-VERSION:3", f"#EXT-X-TARGETDURATION:{int(self.segment_seconds + 0.999)}"]
+        for index in range(available):
+            lines += [f"#EXTINF:{self.segment_seconds:.3f},", f"seg{index}.avi"]
+        if available == self.segments:
+            lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                if len(parts) == 2 and parts[1] == "playlist.m3u8":
+                    body, content_type = server._playlist(parts[0]).encode(), "application/vnd.apple.mpegurl"
+                elif len(parts) == 2 and parts[1].startswith("seg") and parts[1].endswith(".avi"):
+                    index = int(parts[1][3:-4])
+                    if index >= len(server._clips):
+                        self.send_error(404)
+                        return
+                    body, content_type = server._clips[index], "video/x-msvideo"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+_hls_server = None
+_hls_server_lock = threading.Lock()
+
+
+class FakeSimli(FakeService):
+    """
+    SimliAPI stand-in returning placeholder video URLs after reading the audio.
+    With `stream_segments`, `hls_url` points at a shared local FakeHLSServer.
+    """
+
+    def __init__(self, stream_segments: int = 0, segment_seconds: float = 1.0, **behaviour):
+        super().__init__(**behaviour)
+        self.stream_segments = stream_segments
+        self.segment_seconds = segment_seconds
+
+    def _hls_server(self) -> FakeHLSServer:
+        global _hls_server
+        with _hls_server_lock:
+            if _hls_server is None:
+                _hls_server = FakeHLSServer(segments=self.stream_segments, segment_seconds=self.segment_seconds)
+            return _hls_server
+
+    def stream_frames(self, playlist_url, **kwargs):
+        from Backend import HLS
+        return HLS.stream_frames(playlist_url, **kwargs)
+
+    def generate_face_id(self, image, face_name: str = "untitled_avatar", filename: str = "avatar.png") -> str:
+        if isinstance(image, str):
+            with open(image, "rb") as image_file:
+                image = image_file.read()
+        self._call("generate_face_id")
+        return f"fake-face-{hashlib.sha1(image).hexdigest()[:12]}"
+
+    def audio_to_video(self, face_id, audio_path, **kwargs) -> Dict:
+        # The real client reads and base64-encodes the audio; keep that I/O in the measurement
+        with open(audio_path, "rb") as audio_file:
+            audio_file.read()
+        self._call("audio_to_video")
+        name = os.path.splitext(os.path.basename(audio_path))[0]
+        hls_url = f"https://fake.simli.invalid/{face_id}/{name}.m3u8"
+        if self.stream_segments:
+            hls_url = self._hls_server().url(f"{name}-{time.monotonic_ns()}")
+        return {
+            "mp4_url": f"https://fake.simli.invalid/{face_id}/{name}.mp4",
+            "hls_url": hls_url,
+        }
+
+
+class FakeASR(FakeService):
+    """ASR stand-in returning a canned utterance and an Azure-shaped pronunciation assessment."""
+    UTTERANCES = [
+        [("你好", ["ni 3", "hao 3"])],
+        [("谢谢", ["xie 4", "xie 5"]), ("你", ["ni 3"])],
+        [("我", ["wo 3"]), ("喜欢", ["xi 3", "huan 5"]), ("吃饭", ["chi 1", "fan 4"])],
+        [("再见", ["zai 4", "jian 4"])],
+    ]
+    PHONEME_DURATION = 2000000  # 100ns ticks, as Azure reports them
+
+    def recognize_from_microphone(self) -> List:
+        self._call("recognize_from_microphone")
+        with self._rng_lock:
+            utterance = self._rng.choice(self.UTTERANCES)
+            scores = [
+                [round(self._rng.uniform(40, 100), 1) for _ in phonemes]
+                for _, phonemes in utterance
+            ]
+            overall = {
+                key: round(self._rng.uniform(50, 100), 1)
+                for key in ("AccuracyScore", "FluencyScore", "CompletenessScore", "ProsodyScore", "PronScore")
+            }
+
+        text = ''.join(word for word, _ in utterance)
+        offset = 5800000
+        words = []
+        for (word, phonemes), word_scores in zip(utterance, scores):
+            word_phonemes = []
+            for phoneme, score in zip(phonemes, word_scores):
+                word_phonemes.append({
+                    "Phoneme": phoneme,
+                    "PronunciationAssessment": {"AccuracyScore": score},
+                    "Offset": offset + len(word_phonemes) * self.PHONEME_DURATION,
+                    "Duration": self.PHONEME_DURATION,
+                })
+            words.append({
+                "Word": word,
+                "Offset": offset,
+                "Duration": self.PHONEME_DURATION * len(phonemes),
+                "PronunciationAssessment": {
+                    "AccuracyScore": round(sum(word_scores) / len(word_scores), 1),
+                    "ErrorType": "None",
+                },
+                "Phonemes": word_phonemes,
+            })
+            offset += self.PHONEME_DURATION * len(phonemes)
+
+        result = {
+            "RecognitionStatus": "Success",
+            "DisplayText": text,
+            "NBest": [{"Display": text, "PronunciationAssessment": overall, "Words": words}],
+        }
+        return [text, json.dumps(result, ensure_ascii=False)]
@@ -0,0 +1,58 @@
+"""
+Incremental reading of live HLS streams, such as the `hls_url` Simli returns
+while it is still rendering: segments are fetched as soon as the playlist
+lists them and decoded into frames one segment at a time.
+"""
+import os
+import tempfile
+import time
+from urllib.parse import urljoin
+
+import requests
+
+
+def iter_segments(playlist_url, poll_interval=0.5, stall_timeout=30):
+    """
+    Yield (name, bytes) for each media segment of a live HLS playlist as soon as it
+    is listed, polling until #EXT-X-ENDLIST. Raises TimeoutError if no new segment
+    appears for `stall_timeout` seconds.
+    """
+    seen = set()
+    last_progress = time.monotonic()
+    while True:
+        response = requests.get(playlist_url, timeout=10)
+        # Simli may answer 404 until the first segment has been rendered
+        lines = [line.strip() for line in response.text.splitlines()] if response.ok else []
+        for line in lines:
+            if line and not line.startswith("#") and line not in seen:
+                seen.add(line)
+                last_progress = time.monotonic()
+                segment = requests.get(urljoin(playlist_url, line), timeout=10)
+                segment.raise_for_status()
+                yield line, segment.content
+        if "#EXT-X-ENDLIST" in lines:
+            return
+        if time.monotonic() - last_progress > stall_timeout:
+            raise TimeoutError(f"No new HLS segment in {stall_timeout}s: {playlist_url}")
+        time.sleep(poll_interval)
+
+
+def stream_frames(playlist_url, **kwargs):
+    """Decode an HLS stream into BGR frames segment by segment, so playback can start on the first one."""
+    import cv2
+
+    for name, data in iter_segments(playlist_url, **kwargs):
+        # OpenCV only decodes from files; the segment is small and removed right after
+        suffix = os.path.splitext(name.split("?")[0])[1] or ".ts"
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as segment_file:
+            segment_file.write(data)
+        try:
+            capture = cv2.VideoCapture(segment_file.name)
+            while True:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                yield frame
+            capture.release()
+        finally:
+            os.remove(segment_file.name)
@@ -0,0 +1,142 @@
+"""
+Language packs: everything language-specific about a lesson in one place,
+Data/packs/<code>/pack.json, next to its compiled tables.
+
+    pack.json    code, name, ASR locale, level scheme, prompt templates,
+                 the column names of its vocabulary (and optional character)
+                 table, and the source CSV of each table
+    <table>.pkl  the compiled table: categorical columns, pickled, loading in
+                 a few milliseconds instead of re-parsing the CSV
+
+Only pack.json is read to list the packs; a pack's tables are loaded the first
+time they are used, and compiled then if missing or older than their source.
+Compile every pack ahead of time with `python Backend/LanguagePacks.py`.
+"""
+import os
+import sys
+import json
+import tempfile
+import threading
+from functools import lru_cache
+from typing import Dict, List
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+PACKS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Data', 'packs'))
+DEFAULT_LANGUAGE = "zh"
+
+
+class LanguagePack:
+    def __init__(self, directory: str, meta: Dict):
+        self.directory = directory
+        self.code = meta["code"]
+        self.name = meta["name"]
+        self.asr_locale = meta["asr_locale"]
+        self.level_scheme = meta["level_scheme"]
+        self.levels: List[int] = meta["levels"]
+        # Roles -> column names of the words table: word, level, definition, group
+        self.columns: Dict[str, str] = meta["columns"]
+        # Roles -> column names of the chars table, if the pack has one: char, level
+        self.char_columns: Dict[str, str] = meta.get("char_columns", {})
+        self.prompts: Dict[str, str] = meta["prompts"]
+        self._table_specs: Dict[str, Dict] = meta["tables"]
+        self._tables: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, name: str):
+        spec = self._table_specs[name]
+        source = os.path.normpath(os.path.join(self.directory, spec["source"]))
+        return source, os.path.join(self.directory, f"{name}.pkl")
+
+    def compile_table(self, name: str) -> pd.DataFrame:
+        """
+        Parse a table's source CSV once and write its compiled form. The file is
+        written beside the target and renamed into place, so another worker
+        never reads it half-written; a read-only pack directory just skips it.
+        """
+        source, compiled = self._paths(name)
+        table = pd.read_csv(source)
+        for column in self._table_specs[name].get("categories", []):
+            table[column] = table[column].astype("category")
+        try:
+            fd, temporary = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=self.directory)
+        except OSError:
+            return table
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                table.to_pickle(handle)
+            # mkstemp creates it private to this user; workers may run as another
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, compiled)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        return table
+
+    def table(self, name: str) -> pd.DataFrame:
+        if name not in self._tables:
+            with self._lock:
+                if name not in self._tables:
+                    source, compiled = self._paths(name)
+                    if os.path.exists(compiled) and os.path.getmtime(compiled) >= os.path.getmtime(source):
+                        self._tables[name] = pd.read_pickle(compiled)
+                    else:
+                        self._tables[name] = self.compile_table(name)
+        return self._tables[name]
+
+    @property
+    def table_names(self) -> List[str]:
+        return list(self._table_specs)
+
+    @property
+    def words(self) -> pd.DataFrame:
+        return self.table("words")
+
+    @property
+    def has_chars(self) -> bool:
+        return "chars" in self._table_specs
+
+    @property
+    def chars(self) -> pd.DataFrame:
+        if not self.has_chars:
+            raise KeyError(f"The {self.name} pack has no character table")
+        return self.table("chars")
+
+    def __repr__(self) -> str:
+        return f"LanguagePack({self.code!r}, loaded={sorted(self._tables)})"
+
+
+def _read_meta(code: str) -> Dict:
+    with open(os.path.join(PACKS_DIR, code, "pack.json"), encoding="utf-8") as meta_file:
+        return json.load(meta_file)
+
+
+@lru_cache(maxsize=None)
+def available_packs() -> Dict[str, str]:
+    """Installed packs as {code: language name}, without loading any tables."""
+    if not os.path.isdir(PACKS_DIR):
+        return {}
+    return {
+        code: _read_meta(code)["name"]
+        for code in sorted(os.listdir(PACKS_DIR))
+        if os.path.exists(os.path.join(PACKS_DIR, code, "pack.json"))
+    }
+
+
+@lru_cache(maxsize=None)
+def load_pack(code: str = DEFAULT_LANGUAGE) -> LanguagePack:
+    """The pack for `code`, shared by the whole process; its tables load on first use."""
+    if code not in available_packs():
+        raise KeyError(f"No language pack {code!r}; installed: {sorted(available_packs())}")
+    return LanguagePack(os.path.join(PACKS_DIR, code), _read_meta(code))
+
+
+if __name__ == "__main__":
+    # Run once per deploy (or after editing a pack's source tables)
+    for code in available_packs():
+        pack = load_pack(code)
+        for name in pack.table_names:
+            table = pack.compile_table(name)
+            print(f"{code}/{name}: {len(table)} rows")
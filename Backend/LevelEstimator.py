@@ -0,0 +1,94 @@
+import math
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+_HANZI_PATTERN = re.compile(r'[\u4e00-\u9fff]+')
+_SENTENCE_PATTERN = re.compile(r'[。！？!?；;\n]+')
+
+
+class LevelAssessment(NamedTuple):
+    level: str
+    confidence: float
+
+
+class LevelEstimator:
+    """
+    Rule-based HSK level estimate from a learner's own utterances, computed
+    locally in milliseconds. Signals, each mapped onto the 1-6 scale:
+      - vocabulary: the 80th-percentile HSK level of the words they use
+      - lexical diversity: Guiraud's index (types / sqrt(tokens))
+      - sentence length: mean Chinese characters per sentence
+      - pronunciation: their stored average score, as a small adjustment
+    Confidence grows with the amount of text and shrinks when signals disagree.
+    """
+    MAX_LEVEL = 6
+    FULL_CONFIDENCE_TOKENS = 60
+
+    # (threshold, level) steps: the highest threshold reached gives the level
+    DIVERSITY_STEPS = [(0, 1), (2.0, 2), (3.0, 3), (4.0, 4), (5.0, 5), (6.0, 6)]
+    SENTENCE_STEPS = [(0, 1), (5, 2), (8, 3), (12, 4), (16, 5), (22, 6)]
+
+    def __init__(self, word_df: pd.DataFrame, columns: Dict[str, str],
+                 char_df: pd.DataFrame = None, char_columns: Dict[str, str] = None):
+        """`columns` / `char_columns` name the tables' columns by role, as in a LanguagePack."""
+        # HSK 3.0 lists some words at several levels; the lowest one is the one learners meet first
+        words = word_df.groupby(columns['word'])[columns['level']].min()
+        self.word_levels: Dict[str, int] = dict(zip(words.index, words.values.astype(int)))
+        self.char_levels: Dict[str, int] = (
+            dict(zip(char_df[char_columns['char']], char_df[char_columns['level']].astype(int)))
+            if char_df is not None else {}
+        )
+        self.max_word_length = max(map(len, self.word_levels), default=1)
+
+    def segment(self, text: str) -> List[str]:
+        """Forward maximum matching against the HSK word list; unknown characters stand alone."""
+        tokens = []
+        for run in _HANZI_PATTERN.findall(text):
+            i = 0
+            while i < len(run):
+                for length in range(min(self.max_word_length, len(run) - i), 0, -1):
+                    token = run[i:i + length]
+                    if length == 1 or token in self.word_levels:
+                        tokens.append(token)
+                        i += length
+                        break
+        return tokens
+
+    def _token_level(self, token: str) -> int:
+        level = self.word_levels.get(token) or self.char_levels.get(token)
+        # Off-list characters are rare and advanced
+        return level if level else 7
+
+    @staticmethod
+    def _step(value: float, steps) -> int:
+        return max(level for threshold, level in steps if value >= threshold)
+
+    def estimate(self, utterances: Iterable[str], pron_score: Optional[float] = None) -> LevelAssessment:
+        utterances = [u for u in utterances if u and u.strip()]
+        tokens = [token for u in utterances for token in self.segment(u)]
+        if not tokens:
+            return LevelAssessment('1', 0.0)
+
+        levels = np.fromiter((self._token_level(t) for t in tokens), dtype=np.int8, count=len(tokens))
+        vocab_level = min(self.MAX_LEVEL, max(1, int(np.percentile(levels, 80))))
+
+        diversity = len(set(tokens)) / math.sqrt(len(tokens))
+        diversity_level = self._step(diversity, self.DIVERSITY_STEPS)
+
+        sentences = [s for u in utterances for s in _SENTENCE_PATTERN.split(u) if _HANZI_PATTERN.search(s)]
+        mean_length = sum(len(''.join(_HANZI_PATTERN.findall(s))) for s in sentences) / max(len(sentences), 1)
+        sentence_level = self._step(mean_length, self.SENTENCE_STEPS)
+
+        signals = np.array([vocab_level, diversity_level, sentence_level], dtype=float)
+        estimate = float(np.average(signals, weights=[0.5, 0.2, 0.3]))
+        if pron_score is not None:
+            # Clear pronunciation nudges up, poor pronunciation nudges down, by at most half a level
+            estimate += max(-0.5, min(0.5, (pron_score - 75) / 50))
+        level = min(self.MAX_LEVEL, max(1, int(round(estimate))))
+
+        amount = min(1.0, len(tokens) / self.FULL_CONFIDENCE_TOKENS)
+        agreement = 1 - min(1.0, float(signals.std()) / 2)
+        return LevelAssessment(str(level), round(amount * agreement, 2))
@@ -0,0 +1,143 @@
+import os
+import sys
+from typing import List, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Ordered (version, description, sql) steps. Never edit a released step;
+# append a new one instead. Steps use IF NOT EXISTS so databases created by the
+# old create-on-startup code adopt the versioned history cleanly. SQL is written
+# for Postgres; StoreBackend.execute_script adapts it for other engines.
+MIGRATIONS: List[Tuple[int, str, str]] = [
+    (1, "initial schema", """
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            username VARCHAR(50) UNIQUE NOT NULL,
+            email VARCHAR(120) UNIQUE NOT NULL,
+            language_level VARCHAR(20) DEFAULT '1',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS conversations (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id),
+            start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            end_time TIMESTAMP,
+            vocabulary_used TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS messages (
+            id SERIAL PRIMARY KEY,
+            conversation_id INTEGER REFERENCES conversations(id),
+            content TEXT NOT NULL,
+            is_user BOOLEAN DEFAULT TRUE,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """),
+    (2, "daily progress rollups", """
+        CREATE TABLE IF NOT EXISTS user_daily_progress (
+            user_id INTEGER REFERENCES users(id),
+            day DATE NOT NULL,
+            conversations INTEGER DEFAULT 0,
+            messages INTEGER DEFAULT 0,
+            words_practiced INTEGER DEFAULT 0,
+            score_sum REAL DEFAULT 0,
+            score_count INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, day)
+        );
+
+        CREATE TABLE IF NOT EXISTS user_daily_phonemes (
+            user_id INTEGER REFERENCES users(id),
+            day DATE NOT NULL,
+            phoneme VARCHAR(20) NOT NULL,
+            score_sum REAL DEFAULT 0,
+            attempts INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, day, phoneme)
+        );
+    """),
+    (3, "index conversations and messages by owner", """
+        CREATE INDEX IF NOT EXISTS idx_conversations_user_id ON conversations (user_id);
+        CREATE INDEX IF NOT EXISTS idx_messages_conversation_id ON messages (conversation_id);
+    """),
+    (4, "per-turn pronunciation assessments", """
+        CREATE TABLE IF NOT EXISTS assessments (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id),
+            conversation_id INTEGER REFERENCES conversations(id),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            pron_score REAL,
+            data BYTEA NOT NULL
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_assessments_user_id ON assessments (user_id, id);
+    """),
+    (5, "spaced-repetition vocabulary reviews", """
+        CREATE TABLE IF NOT EXISTS word_reviews (
+            user_id INTEGER REFERENCES users(id),
+            word VARCHAR(20) NOT NULL,
+            repetitions SMALLINT DEFAULT 0,
+            interval_days SMALLINT DEFAULT 0,
+            ease REAL DEFAULT 2.5,
+            due DATE NOT NULL,
+            PRIMARY KEY (user_id, word)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_word_reviews_due ON word_reviews (user_id, due);
+    """),
+    (6, "uploaded voice and face IDs by content hash", """
+        CREATE TABLE IF NOT EXISTS avatar_assets (
+            user_id INTEGER REFERENCES users(id),
+            kind VARCHAR(10) NOT NULL,
+            content_hash CHAR(40) NOT NULL,
+            provider_id VARCHAR(100) NOT NULL,
+            last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, kind, content_hash)
+        );
+    """),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def run_migrations(conn, backend) -> List[int]:
+    """Apply every pending migration on the given connection, returning the versions applied."""
+    applied = []
+    with backend.cursor(conn) as cur:
+        # Concurrent deploys wait here and then find nothing left to apply
+        backend.lock_for_migration(cur)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        current = cur.fetchone()[0]
+
+        for version, description, sql in MIGRATIONS:
+            if version <= current:
+                continue
+            backend.execute_script(cur, sql)
+            cur.execute(
+                "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                (version, description)
+            )
+            applied.append(version)
+    conn.commit()
+    return applied
+
+
+if __name__ == "__main__":
+    # Run once per deploy, before starting the app
+    from Backend.Store import Store
+
+    store = Store()
+    applied = store.migrate()
+    store.close()
+
+    if applied:
+        print(f"Applied migrations: {applied}")
+    else:
+        print(f"Schema already at version {LATEST_VERSION}")
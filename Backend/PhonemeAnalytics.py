@@ -0,0 +1,161 @@
+"""
+Pronunciation analytics over a learner's whole assessment history. Azure
+scores Mandarin per syllable with a tone number ("ni 3", "ma 5"); each score
+is split into syllable, initial, final and tone so weaknesses can be ranked at
+any of those levels, tracked over time and turned into practice characters
+from Data/char.csv. Everything is computed with vectorized pandas/NumPy
+group-bys over one flat table, so thousands of assessments take milliseconds.
+"""
+import re
+from itertools import chain
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from Backend.Assessment import AssessmentRecord
+
+# Longest first, so "zh" matches before "z". y and w are spelling, not initials
+INITIALS = ("zh", "ch", "sh", "b", "p", "m", "f", "d", "t", "n", "l", "g", "k", "h",
+            "j", "q", "x", "r", "z", "c", "s")
+NEUTRAL_TONE = 5
+
+_SYLLABLE_PATTERN = re.compile(r'^([a-z:üv]+?)\s*([1-5])?$')
+
+
+def _zero_initial_final(syllable: str) -> str:
+    """The final a y-/w- spelled syllable stands for, as it is written after an initial: you -> iu, yue -> ve, wei -> ui."""
+    rest = syllable[1:]
+    if syllable[0] == "y":
+        if rest.startswith("u"):
+            return "v" + rest[1:]
+        if rest.startswith("i"):
+            return rest
+        return "iu" if rest == "ou" else "i" + rest
+    if rest.startswith("u"):
+        return rest
+    return {"ei": "ui", "en": "un"}.get(rest, "u" + rest)
+
+
+def split_syllable(label: str):
+    """
+    'zhong 1' -> ('zhong', 'zh', 'ong', 1); toneless labels get the neutral tone.
+    Finals are normalised so one sound has one bucket: ü is "v" (ju, lü and yu
+    all end in "v"), and y-/w- syllables have no initial (yi, wu -> "i", "u").
+    """
+    match = _SYLLABLE_PATTERN.match(label.strip().lower())
+    if not match:
+        return label, "", label, 0
+    syllable = match.group(1).replace("ü", "v").replace("u:", "v")
+    tone = int(match.group(2)) if match.group(2) else NEUTRAL_TONE
+    if syllable[0] in "yw" and len(syllable) > 1:
+        return syllable, "", _zero_initial_final(syllable), tone
+    initial = next((i for i in INITIALS if syllable.startswith(i) and len(syllable) > len(i)), "")
+    final = syllable[len(initial):]
+    # After j, q and x a written u is always ü
+    if initial in ("j", "q", "x") and final.startswith("u"):
+        final = "v" + final[1:]
+    return syllable, initial, final, tone
+
+
+class PhonemeAnalytics:
+    """
+    Aggregates every phoneme score in `records`, oldest first (trends are
+    slopes over that order). Units tried fewer than `min_attempts` times are
+    left out of rankings, so one bad take doesn't top the list.
+    """
+    LEVELS = ("phoneme", "syllable", "initial", "final", "tone")
+
+    def __init__(self, records: Sequence[AssessmentRecord], min_attempts: int = 3):
+        self.min_attempts = min_attempts
+        counts = np.fromiter((len(r.phonemes) for r in records), dtype=np.int64, count=len(records))
+        labels = list(chain.from_iterable(r.phonemes for r in records))
+
+        # Split each distinct label once, then broadcast through the factorized codes
+        codes, uniques = pd.factorize(pd.Series(labels, dtype=object))
+        parts = pd.DataFrame([split_syllable(label) for label in uniques],
+                             columns=["syllable", "initial", "final", "tone"])
+
+        self.frame = pd.DataFrame({
+            "phoneme": pd.Categorical.from_codes(codes, uniques) if len(uniques) else pd.Categorical([]),
+            "syllable": parts["syllable"].to_numpy()[codes] if len(uniques) else [],
+            "initial": parts["initial"].to_numpy()[codes] if len(uniques) else [],
+            "final": parts["final"].to_numpy()[codes] if len(uniques) else [],
+            "tone": parts["tone"].to_numpy()[codes] if len(uniques) else [],
+            "accuracy": np.concatenate([r.phoneme_scores for r in records]).astype(np.float64)
+                        if len(records) else np.empty(0),
+            "assessment": np.repeat(np.arange(len(records)), counts),
+        })
+
+    def _summary(self, level: str) -> pd.DataFrame:
+        if level not in self.LEVELS:
+            raise ValueError(f"Unknown level {level!r}; expected one of {self.LEVELS}")
+        summary = (
+            self.frame.groupby(level, observed=True)["accuracy"]
+            .agg(avg_score="mean", attempts="size", worst="min")
+            .round(1)
+            .reset_index()
+        )
+        # Zero-initial syllables ("ai", "er", "yi", "wu") have no initial to rank
+        return summary[(summary["attempts"] >= self.min_attempts) & (summary[level] != "")]
+
+    def weakest(self, level: str = "phoneme", limit: int = 5) -> List[Dict]:
+        """Lowest average accuracy at the given level, among units tried at least `min_attempts` times."""
+        return self._summary(level).nsmallest(limit, "avg_score").to_dict("records")
+
+    def tones(self) -> List[Dict]:
+        """Average accuracy per tone, 1-4 plus neutral (5)."""
+        return self._summary("tone").sort_values("tone").to_dict("records")
+
+    def trends(self, level: str = "phoneme", limit: int = 5) -> List[Dict]:
+        """
+        Per-unit least-squares slope of accuracy against assessment number, in
+        points per assessment: negative means getting worse. Computed from
+        grouped sums, so one pass regardless of how many units there are.
+        """
+        frame = self.frame.assign(
+            xx=self.frame["assessment"] ** 2,
+            xy=self.frame["assessment"] * self.frame["accuracy"],
+        )
+        sums = frame.groupby(level, observed=True).agg(
+            n=("accuracy", "size"), sx=("assessment", "sum"), sy=("accuracy", "sum"),
+            sxx=("xx", "sum"), sxy=("xy", "sum"),
+        )
+        sums = sums[sums["n"] >= self.min_attempts]
+        denominator = sums["n"] * sums["sxx"] - sums["sx"] ** 2
+        slope = (sums["n"] * sums["sxy"] - sums["sx"] * sums["sy"]) / denominator.where(denominator != 0)
+        result = pd.DataFrame({"slope": slope.round(3), "attempts": sums["n"]}).dropna().reset_index()
+        return result.nsmallest(limit, "slope").to_dict("records")
+
+    def overview(self, limit: int = 5) -> Dict:
+        return {
+            "weakest_sounds": self.weakest("phoneme", limit),
+            "weakest_initials": self.weakest("initial", limit),
+            "weakest_finals": self.weakest("final", limit),
+            "tones": self.tones(),
+            "declining": self.trends("phoneme", limit),
+        }
+
+
+class PracticeCharacters:
+    """Characters from Data/char.csv indexed by (syllable, tone), for practice suggestions."""
+
+    def __init__(self, char_df: pd.DataFrame):
+        parts = pd.DataFrame(
+            [split_syllable(pinyin) for pinyin in char_df["pinyin_style2"].fillna("")],
+            columns=["syllable", "initial", "final", "tone"], index=char_df.index,
+        )
+        self.chars = pd.concat([char_df[["hanzi_sc", "pinyin", "level"]], parts], axis=1)
+        self.chars = self.chars.sort_values(["level"], kind="stable")
+
+    def suggest(self, phonemes: Sequence[str], max_level: int = 6, per_phoneme: int = 5) -> Dict[str, List[str]]:
+        """Easiest characters read exactly like each phoneme ("ni 3"), falling back to the same syllable in any tone."""
+        candidates = self.chars[self.chars["level"] <= max_level]
+        suggestions = {}
+        for phoneme in phonemes:
+            syllable, _, _, tone = split_syllable(phoneme)
+            same_syllable = candidates[candidates["syllable"] == syllable]
+            exact = same_syllable[same_syllable["tone"] == tone]
+            picks = pd.concat([exact, same_syllable.drop(exact.index)])
+            suggestions[phoneme] = picks["hanzi_sc"].head(per_phoneme).tolist()
+        return suggestions
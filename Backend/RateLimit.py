@@ -0,0 +1,196 @@
+"""
+Client-side flow control for the external APIs (Gemini, ElevenLabs, Simli).
+Each provider gets one shared ProviderLimiter, so all Streamlit sessions in a
+process draw from the same budget:
+  - a token bucket caps the request rate (with bursts),
+  - a bounded priority queue admits waiting calls, interactive turns first;
+    when it is full, background work is evicted to make room,
+  - identical in-flight calls are coalesced into one (single flight),
+  - 429 responses pause the whole provider and are retried with backoff.
+"""
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Optional
+
+INTERACTIVE = 0  # a learner is waiting on this call
+BACKGROUND = 1   # summaries, prefetch and other work nobody is watching
+
+# Per-provider defaults, overridable with `services: {rate_limits: {...}}` in config.yaml
+DEFAULT_LIMITS: Dict[str, Dict] = {
+    "gemini": {"rate": 5.0, "burst": 10, "max_concurrent": 8},
+    "elevenlabs": {"rate": 2.0, "burst": 4, "max_concurrent": 4},
+    "simli": {"rate": 2.0, "burst": 4, "max_concurrent": 4},
+}
+
+
+class RateLimited(Exception):
+    """The provider answered 429; `retry_after` is its hint in seconds, if it gave one."""
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFull(Exception):
+    """The provider's wait queue is full, or this call was evicted for more urgent work."""
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Recognize 429s from our own clients, the Gemini SDK (`code`) and the ElevenLabs SDK (`status_code`)."""
+    if isinstance(error, RateLimited):
+        return True
+    if 429 in (getattr(error, "code", None), getattr(error, "status_code", None)):
+        return True
+    return "RESOURCE_EXHAUSTED" in str(error)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    if getattr(error, "retry_after", None) is not None:
+        return float(error.retry_after)
+    headers = getattr(error, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class SingleFlight:
+    """Run one call per key at a time; concurrent callers with the same key share its result."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+
+class ProviderLimiter:
+    """Token bucket + bounded priority queue + single flight + 429 retries for one provider."""
+
+    def __init__(self, name: str, rate: float, burst: int = 1, max_concurrent: int = 4,
+                 max_queue: int = 64, max_retries: int = 3, backoff: float = 1.0):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._active = 0
+        self._waiting = []  # heap of (priority, sequence)
+        self._evicted = set()
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._flights = SingleFlight()
+
+    def _token_wait(self, now: float) -> float:
+        """Take a token if one is available and return 0, else return seconds until one is."""
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def _enqueue(self, priority: int):
+        if len(self._waiting) >= self.max_queue:
+            # Only ever evict work less urgent than the newcomer
+            victim = max(self._waiting)
+            if victim[0] <= priority:
+                raise QueueFull(f"{self.name}: {len(self._waiting)} calls already waiting")
+            self._waiting.remove(victim)
+            heapq.heapify(self._waiting)
+            self._evicted.add(victim)
+        ticket = (priority, next(self._sequence))
+        heapq.heappush(self._waiting, ticket)
+        return ticket
+
+    def _acquire(self, priority: int) -> None:
+        with self._cond:
+            ticket = self._enqueue(priority)
+            self._cond.notify_all()
+            try:
+                while True:
+                    if ticket in self._evicted:
+                        self._evicted.discard(ticket)
+                        raise QueueFull(f"{self.name}: evicted for more urgent calls")
+                    timeout = None
+                    if self._waiting[0] == ticket and self._active < self.max_concurrent:
+                        timeout = self._token_wait(time.monotonic())
+                        if timeout == 0:
+                            heapq.heappop(self._waiting)
+                            self._active += 1
+                            self._cond.notify_all()
+                            return
+                    self._cond.wait(timeout)
+            except BaseException:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                raise
+
+    def _release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def _pause(self, seconds: float) -> None:
+        """Hold every caller of this provider back, since a 429 applies to all of them."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+    def _call_with_retries(self, func: Callable, priority: int, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self._acquire(priority)
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == self.max_retries:
+                    raise
+                delay = _retry_after(e) or self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                print(f"{self.name} rate limited, retrying in {delay:.1f}s")
+                self._pause(delay)
+            finally:
+                self._release()
+
+    def call(self, func: Callable, *args, priority: int = INTERACTIVE, key: Hashable = None, **kwargs):
+        """
+        Run `func(*args, **kwargs)` within this provider's limits. Calls sharing a
+        `key` while one is in flight wait for it and get the same result.
+        """
+        if key is None:
+            return self._call_with_retries(func, priority, *args, **kwargs)
+        return self._flights.do(key, self._call_with_retries, func, priority, *args, **kwargs)
+
+
+def create_limiter(name: str, **overrides) -> ProviderLimiter:
+    return ProviderLimiter(name, **{**DEFAULT_LIMITS.get(name, {"rate": 1.0}), **overrides})
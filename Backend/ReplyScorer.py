@@ -0,0 +1,52 @@
+import re
+from typing import Dict, List, Tuple
+
+from Backend.LanguagePacks import LanguagePack, load_pack
+
+_HANZI_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+
+
+class ReplyScorer:
+    """
+    Millisecond-scale local check of a tutor reply: how many of its characters
+    sit above the learner's HSK level, and how much of the lesson vocabulary it
+    uses. Characters from the lesson vocabulary never count as off-level. A
+    pack without a character table is only checked for vocabulary coverage.
+    """
+    # Pack code -> character levels, loaded once per process and shared by every scorer
+    _char_levels: Dict[str, Dict[str, int]] = {}
+
+    def __init__(self, level_slack: int = 1, max_off_level: float = 0.1, pack: LanguagePack = None):
+        self.level_slack = level_slack
+        self.max_off_level = max_off_level
+        self.pack = pack or load_pack()
+
+    @property
+    def char_levels(self) -> Dict[str, int]:
+        levels = ReplyScorer._char_levels.get(self.pack.code)
+        if levels is None:
+            levels = {}
+            if self.pack.has_chars:
+                chars, columns = self.pack.chars, self.pack.char_columns
+                levels = dict(zip(chars[columns['char']], chars[columns['level']].astype(int)))
+            ReplyScorer._char_levels[self.pack.code] = levels
+        return levels
+
+    def score(self, reply: str, vocab: List[str], level: str) -> Tuple[float, bool]:
+        """Return (score in [0, 1], acceptable) for a reply at the given HSK level."""
+        chars = _HANZI_PATTERN.findall(reply)
+        if not chars:
+            return 0.0, False
+
+        allowed = int(level) + self.level_slack
+        vocab_chars = set(''.join(vocab))
+        # Characters missing from the level table are rare and advanced, so treat them as off-level
+        off_level = sum(
+            1 for char in chars
+            if char not in vocab_chars and self.char_levels.get(char, 99) > allowed
+        ) / len(chars) if self.char_levels else 0.0
+        coverage = sum(1 for word in vocab if word in reply) / len(vocab) if vocab else 1.0
+
+        score = 0.6 * (1 - off_level) + 0.4 * coverage
+        acceptable = off_level <= self.max_off_level and (coverage > 0 or not vocab)
+        return score, acceptable
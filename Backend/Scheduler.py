@@ -0,0 +1,129 @@
+"""
+SM-2 spaced repetition for lesson vocabulary. Every word a learner has met has
+one review row (repetitions, interval, ease, due date); a lesson grades each of
+its words from the transcript and the pronunciation scores, and the next lesson
+takes the words that are due, topped up with new words from the learner's level.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Sequence
+
+import pandas as pd
+
+from Backend.Assessment import AssessmentRecord
+
+# SM-2 grades: below PASSING_GRADE the word starts over
+PASSING_GRADE = 3
+MIN_EASE = 1.3
+INITIAL_EASE = 2.5
+
+
+class Review(NamedTuple):
+    word: str
+    repetitions: int
+    interval: int    # days
+    ease: float
+    due: date
+
+
+def review(previous: Review, grade: int, today: date) -> Review:
+    """Apply one SM-2 review with `grade` in 0..5 to a word's state."""
+    if grade < PASSING_GRADE:
+        repetitions, interval = 0, 1
+    else:
+        repetitions = previous.repetitions + 1
+        if repetitions == 1:
+            interval = 1
+        elif repetitions == 2:
+            interval = 6
+        else:
+            interval = round(previous.interval * previous.ease)
+    ease = previous.ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02)
+    return Review(previous.word, repetitions, interval, round(max(MIN_EASE, ease), 2), today + timedelta(days=interval))
+
+
+def new_review(word: str, today: date) -> Review:
+    return Review(word, 0, 0, INITIAL_EASE, today)
+
+
+def grade_from_score(score: float) -> int:
+    """Map a 0-100 pronunciation accuracy to an SM-2 grade."""
+    if score >= 90:
+        return 5
+    if score >= 75:
+        return 4
+    if score >= 60:
+        return 3
+    return 2
+
+
+def grade_word(word: str, utterances: Sequence[str], records: Sequence[AssessmentRecord]) -> int:
+    """
+    A word the learner never said counts as a failed recall (1). A word they
+    said is graded by its pronunciation: its own word score where Azure
+    segmented it as one word, else the score of the utterance containing it.
+    """
+    if not any(word in utterance for utterance in utterances):
+        return 1
+    scores = []
+    for record in records:
+        if word in record.words:
+            accuracy = record.word_data["accuracy"].tolist()
+            scores.extend(accuracy[i] for i, w in enumerate(record.words) if w == word)
+        elif word in record.text:
+            scores.append(record.pron_score)
+    # Said, but no assessment survived (e.g. a no-match turn): a plain pass
+    return grade_from_score(min(scores)) if scores else 4
+
+
+class VocabularyScheduler:
+    def __init__(self, store, word_df: pd.DataFrame, columns: Dict[str, str]):
+        """`columns` names the word, level and group columns of `word_df`, as in a LanguagePack."""
+        self.store = store
+        groups = word_df[columns["group"]].astype(str)
+        # New words are introduced in the textbook order: by group, then by row
+        ordered = word_df.assign(group_number=groups.str.extract(r"(\d+)", expand=False).astype(float))
+        ordered = ordered.sort_values([columns["level"], "group_number"], kind="stable")
+        self.level_words: Dict[int, List[str]] = {
+            int(level): words.drop_duplicates().tolist()
+            for level, words in ordered.groupby(columns["level"])[columns["word"]]
+        }
+
+    @staticmethod
+    def _today() -> date:
+        # Same UTC day as the Store's rollups
+        return datetime.now(timezone.utc).date()
+
+    def _new_words(self, user_id: int, level: int, count: int, exclude: set) -> List[str]:
+        """The first `count` words of `level` (then the levels below) the learner has never reviewed."""
+        picked = []
+        for candidate_level in range(level, 0, -1):
+            words = self.level_words.get(candidate_level, [])
+            # Check in small batches: only the learner's frontier in the list is ever read
+            batch_size = max(count * 4, 32)
+            for start in range(0, len(words), batch_size):
+                batch = [word for word in words[start:start + batch_size] if word not in exclude]
+                known = self.store.get_word_reviews(user_id, batch)
+                picked.extend(word for word in batch if word not in known)
+                if len(picked) >= count:
+                    return picked[:count]
+        return picked
+
+    def next_words(self, user_id: int, level: int, count: int = 8, today: date = None) -> List[str]:
+        """Due reviews first (most overdue first), then new words to fill the lesson."""
+        today = today or self._today()
+        words = self.store.get_due_words(user_id, today, count)
+        if len(words) < count:
+            words += self._new_words(user_id, level, count - len(words), set(words))
+        return words
+
+    def record_lesson(self, user_id: int, vocab: Sequence[str], utterances: Sequence[str],
+                      records: Sequence[AssessmentRecord], today: date = None) -> List[Review]:
+        """Grade every lesson word from what the learner said and how well, and store the new states."""
+        today = today or self._today()
+        previous = self.store.get_word_reviews(user_id, list(vocab))
+        reviews = [
+            review(previous.get(word) or new_review(word, today), grade_word(word, utterances, records), today)
+            for word in vocab
+        ]
+        self.store.save_word_reviews(user_id, reviews)
+        return reviews
@@ -0,0 +1,163 @@
+import os
+import sys
+import threading
+from typing import Callable, Dict, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class ServiceRegistry:
+    """
+    Process-wide API clients, created on first use and shared by every
+    Streamlit session. Each service declares the settings it is built from;
+    when any of them changes through `configure`, the client is rebuilt on
+    its next `get`.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Tuple[Callable, Tuple[str, ...]]] = {}
+        self._instances: Dict[str, Tuple[tuple, object]] = {}
+        self._settings: Dict[str, object] = {}
+        self._env_loaded = False
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[[Dict], object], settings: Tuple[str, ...] = ()) -> None:
+        """Register a factory called with the current settings when `name` is first needed."""
+        with self._lock:
+            self._factories[name] = (factory, tuple(settings))
+            self._instances.pop(name, None)
+
+    def _load_env(self) -> None:
+        """Seed settings from Env.py once; values passed to `configure` take precedence."""
+        if self._env_loaded:
+            return
+        import Env
+        env = {key: value for key, value in vars(Env).items() if key.isupper()}
+        self._settings = {**env, **self._settings}
+        self._env_loaded = True
+
+    def configure(self, **settings) -> None:
+        """Override settings. Clients built from a changed setting are recreated lazily."""
+        with self._lock:
+            self._settings.update(settings)
+
+    def setting(self, key: str, default=None):
+        with self._lock:
+            self._load_env()
+            return self._settings.get(key, default)
+
+    def get(self, name: str):
+        with self._lock:
+            self._load_env()
+            factory, keys = self._factories[name]
+            fingerprint = tuple(repr(self._settings.get(key)) for key in keys)
+            instance = self._instances.get(name)
+            if instance is None or instance[0] != fingerprint:
+                instance = (fingerprint, factory(dict(self._settings)))
+                self._instances[name] = instance
+            return instance[1]
+
+    def reset(self, name: str = None) -> None:
+        """Drop one client (or all of them) so the next `get` builds a fresh one."""
+        with self._lock:
+            if name is None:
+                self._instances.clear()
+            else:
+                self._instances.pop(name, None)
+
+
+# Factories import their modules lazily so importing this registry stays cheap.
+# With `mode: fake` they return the offline stand-ins from Backend/Fakes.py instead,
+# configured from the matching entry under `fakes`.
+
+def _fake(settings, name):
+    if settings.get("mode") != "fake":
+        return None
+    from Backend import Fakes
+    fake_class = {
+        "chatbot": Fakes.FakeChatbot,
+        "asr": Fakes.FakeASR,
+        "tts": Fakes.FakeSpeech,
+        "voices": Fakes.FakeVoices,
+        "simli": Fakes.FakeSimli,
+    }[name]
+    return fake_class(**(settings.get("fakes") or {}).get(name, {}))
+
+
+def _limiter(provider):
+    def factory(settings):
+        from Backend.RateLimit import create_limiter
+        return create_limiter(provider, **(settings.get("rate_limits") or {}).get(provider, {}))
+    return factory
+
+
+def _chatbot(settings):
+    fake = _fake(settings, "chatbot")
+    if fake is not None:
+        return fake
+    from Backend.Chatbot import ChatbotWrapper
+    return ChatbotWrapper(settings["GEMINI_API_KEY"], limiter=services.get("limiter.gemini"))
+
+
+def _asr(settings):
+    fake = _fake(settings, "asr")
+    if fake is not None:
+        return fake
+    from Backend.Speech import ASR
+    return ASR(key=settings["AZURE_ASR_KEY"], region=settings["AZURE_ASR_REGION"])
+
+
+def _tts(settings):
+    fake = _fake(settings, "tts")
+    if fake is not None:
+        return fake
+    from Backend.VoiceCloning import GenSpeech
+    return GenSpeech(settings["XI_API_KEY"], limiter=services.get("limiter.elevenlabs"))
+
+
+def _voices(settings):
+    fake = _fake(settings, "voices")
+    if fake is not None:
+        return fake
+    from Backend.VoiceCloning import PostVoice
+    return PostVoice(settings["XI_API_KEY"], limiter=services.get("limiter.elevenlabs"))
+
+
+def _simli(settings):
+    fake = _fake(settings, "simli")
+    if fake is not None:
+        return fake
+    from Backend.SimliAPI import SimliAPI
+    return SimliAPI(settings["SIMLI_API_KEY"], limiter=services.get("limiter.simli"))
+
+
+def _store(settings):
+    from Backend.Store import Store
+    return Store(settings["DATABASE_URL"])
+
+
+def _analysis(settings):
+    from Backend.ChatAnalysis import ChatAnalysis
+    return ChatAnalysis(store=services.get("store"), chatbot=services.get("chatbot"))
+
+
+def _sessions(settings):
+    from Backend.SessionStore import create_session_backend
+    return create_session_backend(settings.get("session_store"))
+
+
+MODE_SETTINGS = ("mode", "fakes")
+
+services = ServiceRegistry()
+# One limiter per provider, shared by every client of it; see Backend/RateLimit.py
+for _provider in ("gemini", "elevenlabs", "simli"):
+    services.register(f"limiter.{_provider}", _limiter(_provider), settings=("rate_limits",))
+services.register("chatbot", _chatbot, settings=("GEMINI_API_KEY", "rate_limits") + MODE_SETTINGS)
+services.register("asr", _asr, settings=("AZURE_ASR_KEY", "AZURE_ASR_REGION") + MODE_SETTINGS)
+services.register("tts", _tts, settings=("XI_API_KEY", "rate_limits") + MODE_SETTINGS)
+services.register("voices", _voices, settings=("XI_API_KEY", "rate_limits") + MODE_SETTINGS)
+services.register("simli", _simli, settings=("SIMLI_API_KEY", "rate_limits") + MODE_SETTINGS)
+services.register("sessions", _sessions, settings=("session_store",))
+# The one database every part of the app reads and writes
+services.register("store", _store, settings=("DATABASE_URL",))
+services.register("analysis", _analysis, settings=("GEMINI_API_KEY", "DATABASE_URL", "rate_limits") + MODE_SETTINGS)
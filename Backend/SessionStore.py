@@ -0,0 +1,234 @@
+"""
+Lesson state kept outside the Streamlit process, so any worker behind a load
+balancer can continue a learner's lesson and a restart doesn't lose it. Each
+session is a small hash of independently stored fields (rounds, transcript,
+assessments, conversation), so a turn rewrites only what it changed and a
+worker reads only what it needs. Backends are chosen by URL:
+
+    memory://                        this process only (the default)
+    sqlite:///sessions.db            every worker on one machine
+    redis://localhost:6379/0         every worker on every node (needs the redis package)
+"""
+import json
+import sqlite3
+import struct
+import threading
+import time
+from typing import Dict, Iterable, List
+from urllib.parse import urlparse
+
+from Backend.Assessment import AssessmentRecord
+
+# Sessions nobody has touched for this long are dropped
+SESSION_TTL = 7 * 24 * 3600
+
+
+class SessionBackend:
+    """Field-level storage of session hashes: session key -> {field: bytes}."""
+
+    def get(self, key: str, fields: Iterable[str]) -> Dict[str, bytes]:
+        """The stored values of those `fields` that exist."""
+        raise NotImplementedError
+
+    def set(self, key: str, values: Dict[str, bytes]) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str, fields: Iterable[str]) -> None:
+        raise NotImplementedError
+
+
+class MemorySessionBackend(SessionBackend):
+    def __init__(self):
+        self._sessions: Dict[str, Dict[str, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, fields):
+        with self._lock:
+            session = self._sessions.get(key, {})
+            return {field: session[field] for field in fields if field in session}
+
+    def set(self, key, values):
+        with self._lock:
+            self._sessions.setdefault(key, {}).update(values)
+
+    def delete(self, key, fields):
+        with self._lock:
+            session = self._sessions.get(key, {})
+            for field in fields:
+                session.pop(field, None)
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """One WAL-mode SQLite file shared by the workers on a machine, one connection per thread."""
+
+    def __init__(self, path: str, ttl: int = SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS session_fields (
+                    session_key TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (session_key, field)
+                )
+            """)
+            conn.execute("DELETE FROM session_fields WHERE updated_at < ?", (time.time() - self.ttl,))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get(self, key, fields):
+        fields = list(fields)
+        if not fields:
+            return {}
+        rows = self._connect().execute(
+            f"SELECT field, value FROM session_fields WHERE session_key = ? AND field IN ({', '.join('?' * len(fields))})",
+            (key, *fields)
+        ).fetchall()
+        return {field: bytes(value) for field, value in rows}
+
+    def set(self, key, values):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany("""
+                INSERT INTO session_fields (session_key, field, value, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (session_key, field) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+            """, [(key, field, value, now) for field, value in values.items()])
+
+    def delete(self, key, fields):
+        fields = list(fields)
+        with self._connect() as conn:
+            conn.execute(
+                f"DELETE FROM session_fields WHERE session_key = ? AND field IN ({', '.join('?' * len(fields))})",
+                (key, *fields)
+            )
+
+
+class RedisSessionBackend(SessionBackend):
+    """A Redis hash per session (any Redis-compatible server), expiring `ttl` seconds after the last write."""
+
+    def __init__(self, url: str, ttl: int = SESSION_TTL):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("A redis:// session store needs the redis package: pip install redis") from e
+        self.ttl = ttl
+        self._client = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _key(key: str) -> str:
+        return f"session:{key}"
+
+    def get(self, key, fields):
+        fields = list(fields)
+        if not fields:
+            return {}
+        values = self._client.hmget(self._key(key), fields)
+        return {field: value for field, value in zip(fields, values) if value is not None}
+
+    def set(self, key, values):
+        pipeline = self._client.pipeline()
+        pipeline.hset(self._key(key), mapping=values)
+        pipeline.expire(self._key(key), self.ttl)
+        pipeline.execute()
+
+    def delete(self, key, fields):
+        self._client.hdel(self._key(key), *fields)
+
+
+def create_session_backend(url: str = None) -> SessionBackend:
+    url = url or "memory://"
+    scheme = urlparse(url).scheme
+    if scheme == "memory":
+        return MemorySessionBackend()
+    if scheme == "sqlite":
+        return SQLiteSessionBackend(url[len("sqlite:///"):])
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisSessionBackend(url)
+    raise ValueError(f"Unsupported session store URL: {url}")
+
+
+# Compact encodings per field: JSON for small structures, the binary record format for assessments
+_LENGTH = struct.Struct("<I")
+
+
+def encode_records(records: List[AssessmentRecord]) -> bytes:
+    return b"".join(_LENGTH.pack(len(blob)) + blob for blob in (record.to_bytes() for record in records))
+
+
+def decode_records(data: bytes) -> List[AssessmentRecord]:
+    records, offset = [], 0
+    while offset < len(data):
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        records.append(AssessmentRecord.from_bytes(data[offset:offset + length]))
+        offset += length
+    return records
+
+
+def encode_json(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode_json(data: bytes):
+    return json.loads(data)
+
+
+CODECS = {
+    "assessment": (encode_records, decode_records),
+}
+
+
+class SessionState:
+    """
+    One session's fields, read lazily: a field is fetched and decoded the first
+    time it is asked for, then served from memory. Writes go straight through.
+    """
+
+    def __init__(self, backend: SessionBackend, key: str):
+        self.backend = backend
+        self.key = key
+        self._cache: Dict[str, object] = {}
+
+    def get(self, field: str, default=None):
+        if field not in self._cache:
+            stored = self.backend.get(self.key, [field])
+            if field not in stored:
+                return default
+            decode = CODECS.get(field, (encode_json, decode_json))[1]
+            self._cache[field] = decode(stored[field])
+        return self._cache[field]
+
+    def update(self, **values) -> None:
+        encoded = {}
+        for field, value in values.items():
+            encode = CODECS.get(field, (encode_json, decode_json))[0]
+            encoded[field] = encode(value)
+            self._cache[field] = value
+        self.backend.set(self.key, encoded)
+
+    def clear(self, *fields: str) -> None:
+        self.backend.delete(self.key, fields)
+        for field in fields:
+            self._cache.pop(field, None)
+
+    def save_lesson(self, lesson_key, **values) -> bool:
+        """
+        Write a lesson's fields together with its `lesson_key`, unless the
+        session has since moved on to another lesson (started by another tab or
+        worker sharing it): then nothing is written and this returns False.
+        """
+        self._cache.pop("lesson_key", None)
+        stored = self.get("lesson_key")
+        if stored is not None and stored != list(lesson_key):
+            return False
+        self.update(lesson_key=list(lesson_key), **values)
+        return True
@@ -1,5 +1,6 @@
 import requests
 import base64
+import hashlib
 import os
 import sys
 
@@ -7,10 +8,13 @@ from pydub import AudioSegment
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from Env import SIMLI_API_KEY
+from Backend import HLS
+from Backend.RateLimit import INTERACTIVE, RateLimited, create_limiter
 
 class SimliAPI:
-    def __init__(self, api_key):
+    def __init__(self, api_key, limiter=None):
         self.api_key = api_key
+        self.limiter = limiter or create_limiter("simli")
         self.base_url = "https://api.simli.ai"
         self.headers = {"api-key": self.api_key}
 
@@ -21,39 +25,54 @@ class SimliAPI:
     def convert_audio(self, audio_path, target_sample_rate=16000, target_channels=1):
         audio = AudioSegment.from_file(audio_path)
         audio = audio.set_frame_rate(target_sample_rate).set_channels(target_channels)
-        converted_path = "output_audio.wav"
+        # Next to the source file, so concurrent sessions don't share one output file
+        converted_path = os.path.splitext(audio_path)[0] + "_16k.wav"
         audio.export(converted_path, format="wav")
         return converted_path
 
-    def generate_face_id(self, image_path, face_name="untitled_avatar"):
-        url = f"{self.base_url}/generateFaceID"
-        # files = {"image": open(image_path, "rb")}
-        # data = {"face_name": face_name}
-        # headers = {"api-key": self.api_key}
-
-        # response = requests.post(url, headers=headers, files=files, data=data)
-        # response_data = response.json()
-        
-        payload = open(image_path, "rb")
-        querystring = {"face_name":"asdf"}
-        headers = {
-            "api-key": "<api-key>",
-            "Content-Type": "multipart/form-data"
-        }
+    def _post_image(self, url, image, filename, face_name):
+        response = requests.post(
+            url, headers=self.headers, params={"face_name": face_name},
+            # requests writes the multipart body and its boundary header itself
+            files={"image": (filename, image)},
+        )
+        if response.status_code == 429:
+            retry_after = response.headers.get("Retry-After")
+            raise RateLimited("Simli rate limit", float(retry_after) if retry_after else None)
+        return response.json()
 
-        response_data = requests.request("POST", url, data=payload, headers=headers, params=querystring)
+    def generate_face_id(self, image, face_name="untitled_avatar", filename="avatar.png"):
+        """Create a face from an image (a path or the file's bytes) and return its face ID."""
+        url = f"{self.base_url}/generateFaceID"
+        if isinstance(image, str):
+            filename = os.path.basename(image)
+            with open(image, "rb") as image_file:
+                image = image_file.read()
 
+        response_data = self.limiter.call(self._post_image, url, image, filename, face_name)
 
-        if "faceId" in response_data:
-            return response_data["faceId"]
+        # Newer API versions name the face's ID character_uid
+        face_id = response_data.get("faceId") or response_data.get("character_uid")
+        if face_id:
+            return face_id
         else:
             raise ValueError(f"Failed to generate Face ID: {response_data}")
 
-    def audio_to_video(self, face_id, audio_path, audio_format="pcm16", sample_rate=16000, channel_count=1, video_start_frame=0): 
+    def _post(self, url, payload, headers):
+        response = requests.post(url, json=payload, headers=headers)
+        if response.status_code == 429:
+            retry_after = response.headers.get("Retry-After")
+            raise RateLimited("Simli rate limit", float(retry_after) if retry_after else None)
+        return response.json()
+
+    def audio_to_video(self, face_id, audio_path, audio_format="pcm16", sample_rate=16000, channel_count=1, video_start_frame=0, priority=INTERACTIVE): 
         url = f"{self.base_url}/audioToVideoStream"
 
-        processed_audio = self.convert_audio(audio_path)    
-        audio_base64 = self.encode_audio_to_base64(processed_audio)
+        processed_audio = self.convert_audio(audio_path)
+        try:
+            audio_base64 = self.encode_audio_to_base64(processed_audio)
+        finally:
+            os.remove(processed_audio)
 
         payload = {
             "simliAPIKey": self.api_key,
@@ -66,9 +85,13 @@ class SimliAPI:
         }
 
         headers = {"Content-Type": "application/json"}
-        response = requests.post(url, json=payload, headers=headers)
+        # Identical audio for the same face (e.g. the same reply in two sessions) is rendered once
+        key = (face_id, video_start_frame, hashlib.sha1(audio_base64.encode()).hexdigest())
+        return self.limiter.call(self._post, url, payload, headers, priority=priority, key=key)
 
-        return response.json()
+    def stream_frames(self, playlist_url, **kwargs):
+        """Decode the `hls_url` of a render into frames as its segments appear; see Backend/HLS.py."""
+        return HLS.stream_frames(playlist_url, **kwargs)
     
 if __name__ == "__main__":
     api = SimliAPI(SIMLI_API_KEY)
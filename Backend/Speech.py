@@ -1,66 +1,131 @@
 import os
 import sys
+import time
+from typing import Iterable
 
+import numpy as np
 import azure.cognitiveservices.speech as speechsdk
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from Env import AZURE_ASR_KEY, AZURE_ASR_REGION
 from Backend.Store import Store
+from Backend.VAD import EnergyVAD
+
+
+def create_speech_config(locale: str = "zh-CN", key: str = None, region: str = None):
+    """`locale` is the lesson language's LanguagePack.asr_locale; the key and region default to Env.py's"""
+    speech_config = speechsdk.SpeechConfig(subscription=key or AZURE_ASR_KEY, region=region or AZURE_ASR_REGION)
+    speech_config.speech_recognition_language = locale
+    return speech_config
+
+
+def apply_pronunciation_assessment(speech_recognizer):
+    pronunciation_config = speechsdk.PronunciationAssessmentConfig( 
+        reference_text="", 
+        grading_system=speechsdk.PronunciationAssessmentGradingSystem.HundredMark, 
+        granularity=speechsdk.PronunciationAssessmentGranularity.Phoneme, 
+        enable_miscue=False) 
+    pronunciation_config.enable_prosody_assessment() 
+    pronunciation_config.enable_content_assessment_with_topic("greeting")
+    
+    pronunciation_config.apply_to(speech_recognizer)
 
 
 class ASR:
-    def __init__(self, user_id: int = None):
-        self.speech_config = speechsdk.SpeechConfig(subscription=AZURE_ASR_KEY, region=AZURE_ASR_REGION)
-        self.speech_config.speech_recognition_language="zh-CN"
+    def __init__(self, user_id: int = None, locale: str = "zh-CN", key: str = None, region: str = None):
+        self.speech_config = create_speech_config(locale, key, region)
         
         self.audio_config = speechsdk.audio.AudioConfig(use_default_microphone=True)
         self.speech_recognizer = speechsdk.SpeechRecognizer(speech_config=self.speech_config)
         self.user_id = user_id
         # self.store = Store() if user_id else None
         
-        pronunciation_config = speechsdk.PronunciationAssessmentConfig( 
-            reference_text="", 
-            grading_system=speechsdk.PronunciationAssessmentGradingSystem.HundredMark, 
-            granularity=speechsdk.PronunciationAssessmentGranularity.Phoneme, 
-            enable_miscue=False) 
-        pronunciation_config.enable_prosody_assessment() 
-        pronunciation_config.enable_content_assessment_with_topic("greeting")
-        
-        pronunciation_config.apply_to(self.speech_recognizer)
+        apply_pronunciation_assessment(self.speech_recognizer)
         
     def recognize_from_microphone(self):
         print("Speak into your microphone.")
         speech_recognition_result = self.speech_recognizer.recognize_once_async().get()
-        pronunciation_assessment_result_json = speech_recognition_result.properties.get(speechsdk.PropertyId.SpeechServiceResponse_JsonResult)
-
-        print("JSON: {}".format(pronunciation_assessment_result_json))
-        
-        recognized_text = ""
-        
-        if speech_recognition_result.reason == speechsdk.ResultReason.RecognizedSpeech:
-            recognized_text = speech_recognition_result.text
-            print("Recognized: {}".format(recognized_text))
-            
-            # Store in database if user_id is provided
-            # if self.store and self.user_id:
-            #     self.store.save_speech_record(self.user_id, recognized_text, confidence_score)
-                
-        elif speech_recognition_result.reason == speechsdk.ResultReason.NoMatch:
-            print("No speech could be recognized: {}".format(speech_recognition_result.no_match_details))
-        elif speech_recognition_result.reason == speechsdk.ResultReason.Canceled:
-            cancellation_details = speech_recognition_result.cancellation_details
-            print("Speech Recognition canceled: {}".format(cancellation_details.reason))
-            if cancellation_details.reason == speechsdk.CancellationReason.Error:
-                print("Error details: {}".format(cancellation_details.error_details))
-                print("Did you set the speech resource key and region values?")
-        
-        return [recognized_text, pronunciation_assessment_result_json]
+        return format_result(speech_recognition_result)
 
     # def __del__(self):
     #     if self.store:
     #         self.store.close()
 
 
+def format_result(speech_recognition_result):
+    """[recognized text, pronunciation assessment JSON], as every ASR class returns them."""
+    pronunciation_assessment_result_json = speech_recognition_result.properties.get(speechsdk.PropertyId.SpeechServiceResponse_JsonResult)
+
+    print("JSON: {}".format(pronunciation_assessment_result_json))
+    
+    recognized_text = ""
+    
+    if speech_recognition_result.reason == speechsdk.ResultReason.RecognizedSpeech:
+        recognized_text = speech_recognition_result.text
+        print("Recognized: {}".format(recognized_text))
+            
+    elif speech_recognition_result.reason == speechsdk.ResultReason.NoMatch:
+        print("No speech could be recognized: {}".format(speech_recognition_result.no_match_details))
+    elif speech_recognition_result.reason == speechsdk.ResultReason.Canceled:
+        cancellation_details = speech_recognition_result.cancellation_details
+        print("Speech Recognition canceled: {}".format(cancellation_details.reason))
+        if cancellation_details.reason == speechsdk.CancellationReason.Error:
+            print("Error details: {}".format(cancellation_details.error_details))
+            print("Did you set the speech resource key and region values?")
+    
+    return [recognized_text, pronunciation_assessment_result_json]
+
+
+class StreamingASR:
+    """
+    ASR over audio pushed from elsewhere (e.g. the learner's browser over
+    WebRTC) instead of the server's microphone, so each session has its own
+    input. `source` yields chunks of 16 kHz mono int16 samples. The utterance
+    ends as soon as the VAD hears the learner stop, rather than after the
+    service's own end-of-speech timeout.
+    """
+    SAMPLE_RATE = 16000
+
+    def __init__(self, source: Iterable[np.ndarray], vad: EnergyVAD = None, max_seconds: float = 30.0,
+                 wait_seconds: float = 10.0, locale: str = "zh-CN", key: str = None, region: str = None):
+        self.speech_config = create_speech_config(locale, key, region)
+        self.source = source
+        self.vad = vad or EnergyVAD(sample_rate=self.SAMPLE_RATE)
+        self.max_seconds = max_seconds
+        # Give up if the learner hasn't started speaking by then
+        self.wait_seconds = wait_seconds
+
+    def recognize_from_microphone(self):
+        """Same result as ASR.recognize_from_microphone, from the pushed audio."""
+        stream_format = speechsdk.audio.AudioStreamFormat(
+            samples_per_second=self.SAMPLE_RATE, bits_per_sample=16, channels=1
+        )
+        push_stream = speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+        speech_recognizer = speechsdk.SpeechRecognizer(
+            speech_config=self.speech_config,
+            audio_config=speechsdk.audio.AudioConfig(stream=push_stream)
+        )
+        apply_pronunciation_assessment(speech_recognizer)
+        result_future = speech_recognizer.recognize_once_async()
+
+        self.vad.reset()
+        start = time.monotonic()
+        try:
+            for samples in self.source:
+                # An empty chunk means no audio arrived, only the time limits apply
+                if len(samples):
+                    push_stream.write(samples.astype(np.int16).tobytes())
+                    if self.vad.process(samples):
+                        break
+                elapsed = time.monotonic() - start
+                if elapsed > self.max_seconds or (elapsed > self.wait_seconds and not self.vad.in_speech):
+                    break
+        finally:
+            # End of stream makes the service finalize the utterance right away
+            push_stream.close()
+        return format_result(result_future.get())
+
+
 if __name__ == "__main__":
     # Create a test user
     store = Store()
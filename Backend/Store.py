@@ -1,144 +1,163 @@
-import psycopg2
-from psycopg2.extras import DictCursor
-from psycopg2.pool import SimpleConnectionPool
-from datetime import datetime, timezone
-from typing import List
-import time
+import os
+import sys
+from datetime import date, datetime, timezone, timedelta
+from typing import List, Dict, Optional, Tuple
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from Env import DATABASE_URL
+from Backend.Migrations import LATEST_VERSION, run_migrations
+from Backend.StoreBackends import create_backend
+from Backend.Assessment import AssessmentRecord
+from Backend.Scheduler import Review
+
+
+class EmailInUse(ValueError):
+    """The email is already registered to a different username."""
+
 
 class Store:
-    _instance = None
-    _pool = None
+    """
+    Application storage. The engine is chosen by the DATABASE_URL scheme
+    (postgresql://... or sqlite:///path/to.db); every method behaves the same on both.
+    """
+    _instances = {}
     MAX_RETRIES = 3
     RETRY_DELAY = 1  # seconds
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(Store, cls).__new__(cls)
-            cls._instance._create_pool()
-        return cls._instance
-
-    def __init__(self):
-        if not hasattr(self, '_initialized'):
-            self._initialized = True
-            self._init_tables()
-
-    def _create_pool(self):
-        """Create the connection pool with retries."""
-        for attempt in range(self.MAX_RETRIES):
-            try:
-                self._pool = SimpleConnectionPool(
-                    minconn=1, 
-                    maxconn=20, 
-                    dsn=DATABASE_URL
-                )
-                if self._pool:
-                    return
-            except psycopg2.Error as e:
-                if attempt < self.MAX_RETRIES - 1:
-                    time.sleep(self.RETRY_DELAY)
-                    continue
-                raise Exception(f"Failed to create connection pool after {self.MAX_RETRIES} attempts: {str(e)}")
-
-    def _get_conn(self):
-        """Get a connection from the pool with retry logic."""
-        if not self._pool:
-            self._create_pool()
-        
-        for attempt in range(self.MAX_RETRIES):
-            try:
-                conn = self._pool.getconn()
-                if conn:
-                    # Test the connection
-                    with conn.cursor() as cur:
-                        cur.execute('SELECT 1')
-                    return conn
-            except psycopg2.Error:
-                if attempt < self.MAX_RETRIES - 1:
-                    time.sleep(self.RETRY_DELAY)
-                    # Try to recreate the pool
-                    self._create_pool()
-                    continue
-        raise Exception("Failed to get a valid database connection")
+    def __new__(cls, database_url: str = None):
+        # One instance per database; its backend is created lazily by the first query,
+        # so constructing a Store is free
+        database_url = database_url or DATABASE_URL
+        if database_url not in cls._instances:
+            instance = super(Store, cls).__new__(cls)
+            instance.database_url = database_url
+            instance._backend = None
+            instance._schema_checked = False
+            cls._instances[database_url] = instance
+        return cls._instances[database_url]
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = create_backend(self.database_url, self.MAX_RETRIES, self.RETRY_DELAY)
+        return self._backend
+
+    def _get_conn(self, check_schema: bool = True):
+        """Get a connection from the backend, checking the schema version on first use."""
+        conn = self.backend.connect()
+        if check_schema and not self._schema_checked:
+            self._check_schema(conn)
+        return conn
 
     def _put_conn(self, conn):
-        """Return a connection to the pool."""
-        if self._pool and conn:
-            self._pool.putconn(conn)
-
-    def _init_tables(self) -> None:
-        """Create required tables if they do not exist."""
-        conn = self._get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS users (
-                        id SERIAL PRIMARY KEY,
-                        username VARCHAR(50) UNIQUE NOT NULL,
-                        email VARCHAR(120) UNIQUE NOT NULL,
-                        language_level VARCHAR(20) DEFAULT '1',
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        last_login TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    );
-
-                    CREATE TABLE IF NOT EXISTS conversations (
-                        id SERIAL PRIMARY KEY,
-                        user_id INTEGER REFERENCES users(id),
-                        start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        end_time TIMESTAMP,
-                        vocabulary_used TEXT
-                    );
-
-                    CREATE TABLE IF NOT EXISTS messages (
-                        id SERIAL PRIMARY KEY,
-                        conversation_id INTEGER REFERENCES conversations(id),
-                        content TEXT NOT NULL,
-                        is_user BOOLEAN DEFAULT TRUE,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    );
-                """)
-                conn.commit()
-        except psycopg2.Error as e:
+        """Return a connection to the backend."""
+        if self._backend and conn:
+            self._backend.release(conn)
+
+    def _check_schema(self, conn) -> None:
+        """Verify once per process that migrations are up to date, without taking DDL locks."""
+        try:
+            with self.backend.cursor(conn) as cur:
+                cur.execute("SELECT MAX(version) FROM schema_version")
+                version = cur.fetchone()[0] or 0
             conn.rollback()
-            raise Exception(f"Failed to initialize tables: {str(e)}")
+        except self.backend.Error:
+            conn.rollback()
+            version = 0
+
+        if version < LATEST_VERSION:
+            self._put_conn(conn)
+            raise Exception(
+                f"Database schema is at version {version}, expected {LATEST_VERSION}. "
+                "Run `python Backend/Migrations.py` before starting the app."
+            )
+        self._schema_checked = True
+
+    def migrate(self) -> List[int]:
+        """Apply pending schema migrations. Meant to run once per deploy, not per process."""
+        conn = self._get_conn(check_schema=False)
+        try:
+            applied = run_migrations(conn, self.backend)
+            self._schema_checked = True
+            return applied
+        except self.backend.Error as e:
+            conn.rollback()
+            raise Exception(f"Failed to run migrations: {str(e)}")
         finally:
             self._put_conn(conn)
 
     def get_or_create_user(self, username: str, email: str, language_level: str = '1') -> int:
-        """Return user ID, creating a user record if it doesn't exist."""
+        """
+        Return user ID, creating a user record if it doesn't exist.
+        Runs as a single upsert that also stamps last_login, so it is safe
+        under concurrent logins and doubles as the login hook. Raises
+        EmailInUse if a new username comes with another user's email.
+        """
         conn = self._get_conn()
         try:
-            with conn.cursor(cursor_factory=DictCursor) as cur:
-                cur.execute("SELECT id FROM users WHERE username = %s LIMIT 1", (username,))
+            with self.backend.cursor(conn) as cur:
+                cur.execute("""
+                    INSERT INTO users (username, email, language_level, last_login)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (username) DO UPDATE
+                    SET last_login = EXCLUDED.last_login
+                    RETURNING id
+                """, (username, email, language_level, datetime.now(timezone.utc)))
                 user = cur.fetchone()
-                if not user:
-                    cur.execute("""
-                        INSERT INTO users (username, email, language_level)
-                        VALUES (%s, %s, %s)
-                        RETURNING id
-                    """, (username, email, language_level))
-                    user = cur.fetchone()
-                    conn.commit()
+                conn.commit()
                 return user['id']
-        except psycopg2.Error as e:
+        except self.backend.Error as e:
             conn.rollback()
+            # Only the username conflict is an upsert; a taken email fails the insert instead
+            with self.backend.cursor(conn) as cur:
+                cur.execute("SELECT username FROM users WHERE email = %s", (email,))
+                owner = cur.fetchone()
+            if owner is not None and owner[0] != username:
+                raise EmailInUse(f"{email} is already registered to another user") from e
             raise Exception(f"Error in get_or_create_user: {str(e)}")
         finally:
             self._put_conn(conn)
 
+    def get_or_create_users(self, users: List[Tuple[str, str, str]]) -> Dict[str, int]:
+        """
+        Bulk variant of get_or_create_user for (username, email, language_level) rows.
+        Existing users keep their data; returns a username -> ID mapping.
+        """
+        # A row may only be touched once per statement, so drop duplicate usernames up front
+        rows = list({username: (username, email, level) for username, email, level in users}.values())
+        if not rows:
+            return {}
+
+        conn = self._get_conn()
+        try:
+            with self.backend.cursor(conn) as cur:
+                result = self.backend.execute_values(cur, """
+                    INSERT INTO users (username, email, language_level)
+                    VALUES %s
+                    ON CONFLICT (username) DO UPDATE
+                    SET username = EXCLUDED.username
+                    RETURNING username, id
+                """, rows, fetch=True)
+                conn.commit()
+                return {row[0]: row[1] for row in result}
+        except self.backend.Error as e:
+            conn.rollback()
+            raise Exception(f"Error in get_or_create_users: {str(e)}")
+        finally:
+            self._put_conn(conn)
+
     def update_language_level(self, user_id: int, new_level: str) -> None:
         """Update user's language level."""
         conn = self._get_conn()
         try:
-            with conn.cursor() as cur:
+            with self.backend.cursor(conn) as cur:
                 cur.execute("""
                     UPDATE users
                     SET language_level = %s
                     WHERE id = %s
                 """, (new_level, user_id))
                 conn.commit()
-        except psycopg2.Error as e:
+        except self.backend.Error as e:
             conn.rollback()
             raise Exception(f"Error in update_language_level: {str(e)}")
         finally:
@@ -148,7 +167,7 @@ class Store:
         """Get user's current language level."""
         conn = self._get_conn()
         try:
-            with conn.cursor() as cur:
+            with self.backend.cursor(conn) as cur:
                 cur.execute("""
                     SELECT language_level
                     FROM users
@@ -156,7 +175,7 @@ class Store:
                 """, (user_id,))
                 result = cur.fetchone()
                 return result[0] if result else '1'
-        except psycopg2.Error as e:
+        except self.backend.Error as e:
             raise Exception(f"Error in get_language_level: {str(e)}")
         finally:
             self._put_conn(conn)
@@ -165,16 +184,22 @@ class Store:
         """Start a conversation for a given user, returning the conversation ID."""
         conn = self._get_conn()
         try:
-            with conn.cursor() as cur:
+            with self.backend.cursor(conn) as cur:
                 cur.execute("""
                     INSERT INTO conversations (user_id, vocabulary_used, start_time)
                     VALUES (%s, %s, %s)
                     RETURNING id
                 """, (user_id, ','.join(vocabulary), datetime.now(timezone.utc)))
                 conversation_id = cur.fetchone()[0]
+                cur.execute("""
+                    INSERT INTO user_daily_progress (user_id, day, conversations)
+                    VALUES (%s, %s, 1)
+                    ON CONFLICT (user_id, day) DO UPDATE
+                    SET conversations = user_daily_progress.conversations + 1
+                """, (user_id, self._today()))
                 conn.commit()
                 return conversation_id
-        except psycopg2.Error as e:
+        except self.backend.Error as e:
             conn.rollback()
             raise Exception(f"Error in start_conversation: {str(e)}")
         finally:
@@ -184,67 +209,333 @@ class Store:
         """Mark a conversation as ended by updating the end_time."""
         conn = self._get_conn()
         try:
-            with conn.cursor() as cur:
+            with self.backend.cursor(conn) as cur:
                 cur.execute("""
                     UPDATE conversations 
                     SET end_time = %s
                     WHERE id = %s
                 """, (datetime.now(timezone.utc), conversation_id))
                 conn.commit()
-        except psycopg2.Error as e:
+        except self.backend.Error as e:
             conn.rollback()
             raise Exception(f"Error in end_conversation: {str(e)}")
         finally:
             self._put_conn(conn)
 
-    def save_message(self, conversation_id: int, content: str, is_user: bool) -> None:
-        """Save a message record in the messages table."""
+    def save_message(self, conversation_id: int, content: str, is_user: bool, words_practiced: int = 0) -> None:
+        """
+        Save a message record in the messages table.
+        User messages are also counted into the owner's daily progress rollup.
+        """
         conn = self._get_conn()
         try:
-            with conn.cursor() as cur:
+            with self.backend.cursor(conn) as cur:
                 cur.execute("""
                     INSERT INTO messages (conversation_id, content, is_user, timestamp)
                     VALUES (%s, %s, %s, %s)
                 """, (conversation_id, content, is_user, datetime.now(timezone.utc)))
+                if is_user:
+                    cur.execute("""
+                        INSERT INTO user_daily_progress (user_id, day, messages, words_practiced)
+                        SELECT user_id, %s, 1, %s
+                        FROM conversations
+                        WHERE id = %s AND user_id IS NOT NULL
+                        ON CONFLICT (user_id, day) DO UPDATE
+                        SET messages = user_daily_progress.messages + 1,
+                            words_practiced = user_daily_progress.words_practiced + EXCLUDED.words_practiced
+                    """, (self._today(), words_practiced, conversation_id))
                 conn.commit()
-        except psycopg2.Error as e:
+        except self.backend.Error as e:
             conn.rollback()
             raise Exception(f"Error in save_message: {str(e)}")
         finally:
             self._put_conn(conn)
 
+    def get_recent_user_messages(self, user_id: int, limit: int = 20) -> List[str]:
+        """Return the user's most recent utterances across all conversations, newest first."""
+        conn = self._get_conn()
+        try:
+            with self.backend.cursor(conn) as cur:
+                cur.execute("""
+                    SELECT m.content
+                    FROM messages m
+                    JOIN conversations c ON c.id = m.conversation_id
+                    WHERE c.user_id = %s AND m.is_user
+                    ORDER BY m.id DESC
+                    LIMIT %s
+                """, (user_id, limit))
+                return [row[0] for row in cur.fetchall()]
+        except self.backend.Error as e:
+            raise Exception(f"Error in get_recent_user_messages: {str(e)}")
+        finally:
+            self._put_conn(conn)
+
     def update_last_login(self, user_id: int) -> None:
         """
         Update the user's last_login timestamp.
-        Call this method whenever a user logs in.
+        get_or_create_user already does this; use it when only the ID is at hand.
         """
         conn = self._get_conn()
         try:
-            with conn.cursor() as cur:
+            with self.backend.cursor(conn) as cur:
                 cur.execute("""
                     UPDATE users
                     SET last_login = %s
                     WHERE id = %s
                 """, (datetime.now(timezone.utc), user_id))
                 conn.commit()
-        except psycopg2.Error as e:
+        except self.backend.Error as e:
             conn.rollback()
             raise Exception(f"Error in update_last_login: {str(e)}")
         finally:
             self._put_conn(conn)
 
+    def _add_to_rollups(self, cur, user_id: int, pron_score: float, phonemes: List[Tuple[str, float]]) -> None:
+        day = self._today()
+        cur.execute("""
+            INSERT INTO user_daily_progress (user_id, day, score_sum, score_count)
+            VALUES (%s, %s, %s, 1)
+            ON CONFLICT (user_id, day) DO UPDATE
+            SET score_sum = user_daily_progress.score_sum + EXCLUDED.score_sum,
+                score_count = user_daily_progress.score_count + 1
+        """, (user_id, day, pron_score))
+        if phonemes:
+            cur.executemany("""
+                INSERT INTO user_daily_phonemes (user_id, day, phoneme, score_sum, attempts)
+                VALUES (%s, %s, %s, %s, 1)
+                ON CONFLICT (user_id, day, phoneme) DO UPDATE
+                SET score_sum = user_daily_phonemes.score_sum + EXCLUDED.score_sum,
+                    attempts = user_daily_phonemes.attempts + 1
+            """, [(user_id, day, phoneme, score) for phoneme, score in phonemes])
+
+    def save_assessment(self, user_id: int, record: AssessmentRecord, conversation_id: int = None) -> int:
+        """Store a full per-turn assessment and fold it into the rollups, in one transaction."""
+        conn = self._get_conn()
+        try:
+            with self.backend.cursor(conn) as cur:
+                cur.execute("""
+                    INSERT INTO assessments (user_id, conversation_id, pron_score, data)
+                    VALUES (%s, %s, %s, %s)
+                    RETURNING id
+                """, (user_id, conversation_id, record.pron_score, record.to_bytes()))
+                assessment_id = cur.fetchone()[0]
+                self._add_to_rollups(cur, user_id, record.pron_score, record.phoneme_pairs())
+                conn.commit()
+                return assessment_id
+        except self.backend.Error as e:
+            conn.rollback()
+            raise Exception(f"Error in save_assessment: {str(e)}")
+        finally:
+            self._put_conn(conn)
+
+    def get_assessments(self, user_id: int, limit: int = 50) -> List[AssessmentRecord]:
+        """Return the user's most recent stored assessments, newest first."""
+        conn = self._get_conn()
+        try:
+            with self.backend.cursor(conn) as cur:
+                cur.execute("""
+                    SELECT data FROM assessments
+                    WHERE user_id = %s
+                    ORDER BY id DESC
+                    LIMIT %s
+                """, (user_id, limit))
+                # Postgres hands BYTEA back as a memoryview
+                return [AssessmentRecord.from_bytes(bytes(row[0])) for row in cur.fetchall()]
+        except self.backend.Error as e:
+            raise Exception(f"Error in get_assessments: {str(e)}")
+        finally:
+            self._put_conn(conn)
+
+    def get_progress(self, user_id: int, days: int = 30) -> List[Dict]:
+        """Return the user's daily rollups for the last `days` days, oldest first."""
+        conn = self._get_conn()
+        try:
+            with self.backend.cursor(conn) as cur:
+                cur.execute("""
+                    SELECT day, conversations, messages, words_practiced,
+                           CASE WHEN score_count > 0 THEN score_sum / score_count END AS avg_score
+                    FROM user_daily_progress
+                    WHERE user_id = %s AND day >= %s
+                    ORDER BY day
+                """, (user_id, self._today() - timedelta(days=days - 1)))
+                return [dict(row) for row in cur.fetchall()]
+        except self.backend.Error as e:
+            raise Exception(f"Error in get_progress: {str(e)}")
+        finally:
+            self._put_conn(conn)
+
+    def get_average_score(self, user_id: int, days: int = 30):
+        """Return the user's mean pronunciation score over the last `days` days, or None."""
+        conn = self._get_conn()
+        try:
+            with self.backend.cursor(conn) as cur:
+                cur.execute("""
+                    SELECT SUM(score_sum) / NULLIF(SUM(score_count), 0)
+                    FROM user_daily_progress
+                    WHERE user_id = %s AND day >= %s
+                """, (user_id, self._today() - timedelta(days=days - 1)))
+                return cur.fetchone()[0]
+        except self.backend.Error as e:
+            raise Exception(f"Error in get_average_score: {str(e)}")
+        finally:
+            self._put_conn(conn)
+
+    def get_weakest_phonemes(self, user_id: int, days: int = 30, limit: int = 5) -> List[Dict]:
+        """Return the user's lowest-scoring phonemes over the last `days` days."""
+        conn = self._get_conn()
+        try:
+            with self.backend.cursor(conn) as cur:
+                cur.execute("""
+                    SELECT phoneme, SUM(score_sum) / SUM(attempts) AS avg_score, SUM(attempts) AS attempts
+                    FROM user_daily_phonemes
+                    WHERE user_id = %s AND day >= %s
+                    GROUP BY phoneme
+                    ORDER BY avg_score
+                    LIMIT %s
+                """, (user_id, self._today() - timedelta(days=days - 1), limit))
+                return [dict(row) for row in cur.fetchall()]
+        except self.backend.Error as e:
+            raise Exception(f"Error in get_weakest_phonemes: {str(e)}")
+        finally:
+            self._put_conn(conn)
+
+    def get_due_words(self, user_id: int, day: date, limit: int) -> List[str]:
+        """Return up to `limit` of the user's words due for review on `day`, most overdue first."""
+        conn = self._get_conn()
+        try:
+            with self.backend.cursor(conn) as cur:
+                # Served by idx_word_reviews_due: reads only the rows returned
+                cur.execute("""
+                    SELECT word FROM word_reviews
+                    WHERE user_id = %s AND due <= %s
+                    ORDER BY due
+                    LIMIT %s
+                """, (user_id, day, limit))
+                return [row[0] for row in cur.fetchall()]
+        except self.backend.Error as e:
+            raise Exception(f"Error in get_due_words: {str(e)}")
+        finally:
+            self._put_conn(conn)
+
+    def get_word_reviews(self, user_id: int, words: List[str]) -> Dict[str, Review]:
+        """Return the stored review state of those `words` the user has already met."""
+        if not words:
+            return {}
+        conn = self._get_conn()
+        try:
+            with self.backend.cursor(conn) as cur:
+                cur.execute(f"""
+                    SELECT word, repetitions, interval_days, ease, due FROM word_reviews
+                    WHERE user_id = %s AND word IN ({', '.join(['%s'] * len(words))})
+                """, (user_id, *words))
+                return {row[0]: Review(*row) for row in cur.fetchall()}
+        except self.backend.Error as e:
+            raise Exception(f"Error in get_word_reviews: {str(e)}")
+        finally:
+            self._put_conn(conn)
+
+    def save_word_reviews(self, user_id: int, reviews: List[Review]) -> None:
+        """Insert or replace the review state of each reviewed word."""
+        if not reviews:
+            return
+        conn = self._get_conn()
+        try:
+            with self.backend.cursor(conn) as cur:
+                cur.executemany("""
+                    INSERT INTO word_reviews (user_id, word, repetitions, interval_days, ease, due)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (user_id, word) DO UPDATE
+                    SET repetitions = EXCLUDED.repetitions,
+                        interval_days = EXCLUDED.interval_days,
+                        ease = EXCLUDED.ease,
+                        due = EXCLUDED.due
+                """, [(user_id, *review) for review in reviews])
+                conn.commit()
+        except self.backend.Error as e:
+            conn.rollback()
+            raise Exception(f"Error in save_word_reviews: {str(e)}")
+        finally:
+            self._put_conn(conn)
+
+    def get_avatar_asset(self, user_id: int, kind: str, content_hash: str = None) -> Optional[str]:
+        """
+        Return the provider ID ('voice' or 'face') stored for the upload with
+        `content_hash`, or for the user's most recently used upload when no hash is given.
+        """
+        conn = self._get_conn()
+        try:
+            with self.backend.cursor(conn) as cur:
+                if content_hash is None:
+                    cur.execute("""
+                        SELECT provider_id FROM avatar_assets
+                        WHERE user_id = %s AND kind = %s
+                        ORDER BY last_used DESC
+                        LIMIT 1
+                    """, (user_id, kind))
+                else:
+                    cur.execute("""
+                        SELECT provider_id FROM avatar_assets
+                        WHERE user_id = %s AND kind = %s AND content_hash = %s
+                    """, (user_id, kind, content_hash))
+                row = cur.fetchone()
+                return row[0] if row else None
+        except self.backend.Error as e:
+            raise Exception(f"Error in get_avatar_asset: {str(e)}")
+        finally:
+            self._put_conn(conn)
+
+    def save_avatar_asset(self, user_id: int, kind: str, content_hash: str, provider_id: str) -> None:
+        """Record (or mark as most recently used) the provider ID of an uploaded voice sample or face image."""
+        conn = self._get_conn()
+        try:
+            with self.backend.cursor(conn) as cur:
+                cur.execute("""
+                    INSERT INTO avatar_assets (user_id, kind, content_hash, provider_id, last_used)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (user_id, kind, content_hash) DO UPDATE
+                    SET provider_id = EXCLUDED.provider_id,
+                        last_used = EXCLUDED.last_used
+                """, (user_id, kind, content_hash, provider_id, datetime.now(timezone.utc)))
+                conn.commit()
+        except self.backend.Error as e:
+            conn.rollback()
+            raise Exception(f"Error in save_avatar_asset: {str(e)}")
+        finally:
+            self._put_conn(conn)
+
+    @staticmethod
+    def _today():
+        """Rollups are bucketed by UTC day, matching the stored timestamps."""
+        return datetime.now(timezone.utc).date()
+
     def close(self) -> None:
-        """Close the connection pool."""
+        """Close the backend's connections."""
         try:
-            if self._pool:
-                self._pool.closeall()
-                self._pool = None
+            if self._backend:
+                self._backend.close()
         except Exception:
             pass  # Silently handle any closure errors
 
     def __del__(self):
         try:
-            if hasattr(self, '_pool') and self._pool:
-                self.close()
+            self.close()
         except Exception:
-            pass  # Silently handle any cleanup errors
\ No newline at end of file
+            pass  # Silently handle any cleanup errors
+
+
+if __name__ == "__main__":
+    # Import every user from config.yaml credentials in one round trip
+    import yaml
+    from yaml.loader import SafeLoader
+
+    with open("config.yaml") as file:
+        config = yaml.load(file, Loader=SafeLoader)
+
+    store = Store()
+    user_ids = store.get_or_create_users([
+        (username, details["email"], '1')
+        for username, details in config["credentials"]["usernames"].items()
+    ])
+    store.close()
+
+    print(f"Imported {len(user_ids)} users: {user_ids}")
@@ -0,0 +1,231 @@
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from typing import List, Sequence
+
+
+class StoreBackend:
+    """
+    Connection handling and SQL dialect for one database engine.
+    Store writes its queries once, in Postgres syntax with %s placeholders,
+    and each backend adapts them to its engine.
+    """
+    Error = Exception
+
+    def connect(self):
+        raise NotImplementedError
+
+    def release(self, conn) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def cursor(self, conn):
+        """Return a context-managed cursor whose rows support both index and key access."""
+        raise NotImplementedError
+
+    def execute_values(self, cur, sql: str, rows: Sequence[Sequence], fetch: bool = False) -> List:
+        """Run `sql` with its single `VALUES %s` expanded to all rows in one statement."""
+        raise NotImplementedError
+
+    def execute_script(self, cur, sql: str) -> None:
+        """Run a multi-statement DDL script inside the current transaction."""
+        raise NotImplementedError
+
+    def lock_for_migration(self, cur) -> None:
+        """Serialize concurrent migration runs until the current transaction ends."""
+        raise NotImplementedError
+
+
+class PostgresBackend(StoreBackend):
+    MIGRATION_LOCK_ID = 7305146  # arbitrary key for pg_advisory_xact_lock
+
+    def __init__(self, dsn: str, max_retries: int = 3, retry_delay: float = 1):
+        # Imported here so SQLite-only setups don't need psycopg2 installed
+        import psycopg2
+        from psycopg2.extras import DictCursor, execute_values
+        from psycopg2.pool import SimpleConnectionPool
+
+        self._psycopg2 = psycopg2
+        self._dict_cursor = DictCursor
+        self._execute_values = execute_values
+        self._pool_class = SimpleConnectionPool
+        self.Error = psycopg2.Error
+        self.dsn = dsn
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._pool = None
+
+    def _create_pool(self):
+        """Create the connection pool with retries."""
+        for attempt in range(self.max_retries):
+            try:
+                self._pool = self._pool_class(
+                    minconn=1,
+                    maxconn=20,
+                    dsn=self.dsn
+                )
+                if self._pool:
+                    return
+            except self._psycopg2.Error as e:
+                if attempt < self.max_retries - 1:
+                    time.sleep(self.retry_delay)
+                    continue
+                raise Exception(f"Failed to create connection pool after {self.max_retries} attempts: {str(e)}")
+
+    def connect(self):
+        """Get a connection from the pool with retry logic."""
+        if not self._pool:
+            self._create_pool()
+
+        for attempt in range(self.max_retries):
+            try:
+                conn = self._pool.getconn()
+                if conn:
+                    # Test the connection
+                    with conn.cursor() as cur:
+                        cur.execute('SELECT 1')
+                    return conn
+            except self._psycopg2.Error:
+                if attempt < self.max_retries - 1:
+                    time.sleep(self.retry_delay)
+                    # Try to recreate the pool
+                    self._create_pool()
+                    continue
+        raise Exception("Failed to get a valid database connection")
+
+    def release(self, conn) -> None:
+        if self._pool and conn:
+            self._pool.putconn(conn)
+
+    def close(self) -> None:
+        if self._pool:
+            self._pool.closeall()
+            self._pool = None
+
+    def cursor(self, conn):
+        return conn.cursor(cursor_factory=self._dict_cursor)
+
+    def execute_values(self, cur, sql, rows, fetch=False):
+        return self._execute_values(cur, sql, rows, page_size=max(len(rows), 1), fetch=fetch)
+
+    def execute_script(self, cur, sql):
+        cur.execute(sql)
+
+    def lock_for_migration(self, cur):
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (self.MIGRATION_LOCK_ID,))
+
+
+class _SQLiteCursor:
+    """sqlite3 cursor that accepts the %s placeholders Store's queries use."""
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+
+    @staticmethod
+    def _translate(sql: str) -> str:
+        return sql.replace('%s', '?')
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(self._translate(sql), params)
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(self._translate(sql), seq_of_params)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SQLiteBackend(StoreBackend):
+    """
+    Embedded backend for local and test runs. Each thread keeps its own
+    connection (sqlite3 connections are not shareable across threads) and the
+    database runs in WAL mode so readers never block the writer.
+    """
+    Error = sqlite3.Error
+
+    def __init__(self, path: str, timeout: float = 30):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+        # Explicit adapters/converters: Python's defaults are deprecated and choke on UTC offsets
+        sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+        sqlite3.register_adapter(date, lambda value: value.isoformat())
+        sqlite3.register_converter('TIMESTAMP', lambda value: datetime.fromisoformat(value.decode()))
+        sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()))
+
+    def connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.timeout,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                check_same_thread=False
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def release(self, conn) -> None:
+        pass  # connections stay open for reuse by their thread
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+    def cursor(self, conn):
+        return _SQLiteCursor(conn.cursor())
+
+    def execute_values(self, cur, sql, rows, fetch=False):
+        row_sql = '(' + ', '.join(['%s'] * len(rows[0])) + ')'
+        cur.execute(
+            sql.replace('VALUES %s', 'VALUES ' + ', '.join([row_sql] * len(rows))),
+            [value for row in rows for value in row]
+        )
+        return cur.fetchall() if fetch else None
+
+    def execute_script(self, cur, sql):
+        sql = sql.replace('SERIAL PRIMARY KEY', 'INTEGER PRIMARY KEY AUTOINCREMENT')
+        for statement in sql.split(';'):
+            if statement.strip():
+                cur.execute(statement)
+
+    def lock_for_migration(self, cur):
+        cur.execute('BEGIN IMMEDIATE')
+
+
+def create_backend(database_url: str, max_retries: int = 3, retry_delay: float = 1) -> StoreBackend:
+    """Pick a backend from the DATABASE_URL scheme: postgresql://... or sqlite:///path/to.db"""
+    match = re.match(r'sqlite:///(.+)', database_url)
+    if match:
+        return SQLiteBackend(match.group(1))
+    if database_url.startswith(('postgres://', 'postgresql://')):
+        return PostgresBackend(database_url, max_retries, retry_delay)
+    raise ValueError(f"Unsupported DATABASE_URL: {database_url}")
@@ -0,0 +1,102 @@
+import json
+from typing import Any, Callable, Dict, Tuple
+
+
+class StructuredOutputError(ValueError):
+    """The model's reply did not match the requested schema. Keeps the raw text for fallback parsing."""
+
+    def __init__(self, message: str, text: str):
+        super().__init__(message)
+        self.text = text
+
+
+def _compile(schema: Dict, path: str) -> Callable[[Any], Any]:
+    """Turn a JSON-schema subset into a nested closure that validates and coerces a value."""
+    kind = schema.get("type")
+    enum = schema.get("enum")
+    minimum = schema.get("minimum")
+    maximum = schema.get("maximum")
+
+    if kind == "object":
+        properties = {
+            name: _compile(sub_schema, f"{path}.{name}")
+            for name, sub_schema in schema.get("properties", {}).items()
+        }
+        required = tuple(schema.get("required", ()))
+
+        def check_object(value):
+            if not isinstance(value, dict):
+                raise ValueError(f"{path}: expected object, got {type(value).__name__}")
+            for name in required:
+                if name not in value:
+                    raise ValueError(f"{path}: missing required field '{name}'")
+            return {name: check(value[name]) for name, check in properties.items() if name in value}
+        return check_object
+
+    if kind == "array":
+        check_item = _compile(schema.get("items", {}), f"{path}[]")
+
+        def check_array(value):
+            if not isinstance(value, list):
+                raise ValueError(f"{path}: expected array, got {type(value).__name__}")
+            return [check_item(item) for item in value]
+        return check_array
+
+    def check_scalar(value):
+        if kind == "integer":
+            # Models sometimes emit 3.0 or "3" for integers; accept them when lossless
+            try:
+                as_float = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{path}: expected integer, got {value!r}")
+            if isinstance(value, bool) or not as_float.is_integer():
+                raise ValueError(f"{path}: expected integer, got {value!r}")
+            value = int(as_float)
+        elif kind == "number":
+            if isinstance(value, bool):
+                raise ValueError(f"{path}: expected number, got {value!r}")
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{path}: expected number, got {value!r}")
+        elif kind == "string":
+            if not isinstance(value, str):
+                raise ValueError(f"{path}: expected string, got {value!r}")
+        elif kind == "boolean":
+            if not isinstance(value, bool):
+                raise ValueError(f"{path}: expected boolean, got {value!r}")
+
+        if enum is not None and value not in enum:
+            raise ValueError(f"{path}: {value!r} is not one of {enum}")
+        if minimum is not None and value < minimum:
+            raise ValueError(f"{path}: {value!r} is below the minimum {minimum}")
+        if maximum is not None and value > maximum:
+            raise ValueError(f"{path}: {value!r} is above the maximum {maximum}")
+        return value
+    return check_scalar
+
+
+# Schemas are module-level constants, so identity is a cheap cache key; keeping the
+# schema in the entry pins its id and guards against reuse by a different object
+_validators: Dict[int, Tuple[Dict, Callable[[Any], Any]]] = {}
+
+
+def compile_validator(schema: Dict) -> Callable[[Any], Any]:
+    """Return a validator for `schema`, compiled once per schema object."""
+    entry = _validators.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        entry = (schema, _compile(schema, "$"))
+        _validators[id(schema)] = entry
+    return entry[1]
+
+
+def parse_json_reply(text: str, schema: Dict) -> Any:
+    """Decode a JSON reply (tolerating a Markdown code fence) and validate it against `schema`."""
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.strip("`")
+        cleaned = cleaned[cleaned.index("\n") + 1:] if "\n" in cleaned else cleaned
+    try:
+        return compile_validator(schema)(json.loads(cleaned))
+    except (ValueError, TypeError) as e:
+        raise StructuredOutputError(f"Reply does not match schema: {e}", text)
@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Callable, Dict, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Backend.Chatbot import ChatConversation
+from Backend.Assessment import AssessmentRecord, parse_assessment
+
+# Avatar renders outlive the turn that started them when they miss the video budget.
+# Sized above the Simli limiter's concurrency, which is the real bound on calls.
+_avatar_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="avatar")
+
+
+class VideoCache:
+    """
+    Avatar renders keyed by (face, audio content), shared by all sessions. A
+    render that misses its turn's budget keeps running here, so the video can
+    still be swapped in on a later rerun, and the same reply spoken again (e.g.
+    the same greeting in another session) reuses it instead of rendering anew.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_submit(self, key: tuple, render: Callable[[], Dict]) -> Future:
+        with self._lock:
+            future = self._entries.get(key)
+            # Failed renders are retried rather than cached
+            if future is None or (future.done() and future.exception() is not None):
+                future = self._entries[key] = _avatar_executor.submit(render)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return future
+
+    def ready(self, key: tuple) -> Optional[Dict]:
+        """The video URLs for `key` if its render has finished successfully, else None."""
+        with self._lock:
+            future = self._entries.get(key)
+        if future is None or not future.done() or future.exception() is not None:
+            return None
+        return future.result()
+
+
+video_cache = VideoCache()
+
+
+class TurnFlow:
+    """
+    One learner turn through every stage: speech recognition, tutor reply,
+    speech synthesis and avatar video, with per-stage wall-clock timings.
+    Shared by the Streamlit app and the load-test driver, so both exercise the
+    same path. The clients are anything with the ASR / GenSpeech / SimliAPI
+    interfaces, including the fakes from Backend/Fakes.py.
+
+    With a `video_budget`, the turn is deadline-driven: the reply text and the
+    audio are handed to `on_reply` / `on_audio` as soon as each is ready, and the
+    avatar video is only waited for up to the budget. A late video keeps
+    rendering in `video_cache` under the returned `video_key`.
+    """
+    STAGES = ("asr", "reply", "tts", "avatar")
+
+    def __init__(self, asr, tts, simli, face_id: str, voice_id: str, audio_path: str = "Samples/test.mp3"):
+        self.asr = asr
+        self.tts = tts
+        self.simli = simli
+        self.face_id = face_id
+        self.voice_id = voice_id
+        # One file per learner: concurrent sessions must not overwrite each other's audio
+        self.audio_path = audio_path
+
+    def _render(self, audio: bytes, digest: str) -> Dict:
+        # Render from a private copy: the learner's next turn may overwrite audio_path while this waits.
+        # It lives in its own temporary directory, so whatever the client writes next to it
+        # (SimliAPI's converted wav) goes with it
+        base, ext = os.path.splitext(os.path.basename(self.audio_path))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f"{base}_{digest[:12]}{ext}")
+            with open(path, "wb") as audio_file:
+                audio_file.write(audio)
+            response = self.simli.audio_to_video(self.face_id, path)
+            return {"mp4_url": response.get("mp4_url"), "hls_url": response.get("hls_url")}
+
+    @staticmethod
+    def _parse(assessment: str) -> Optional[AssessmentRecord]:
+        """Parse the ASR's JSON once, here; no-match results carry no scores."""
+        if not assessment:
+            return None
+        try:
+            return parse_assessment(json.loads(assessment))
+        except (KeyError, IndexError, ValueError):
+            return None
+
+    def run(self, conversation: ChatConversation, if_end: bool = False, video_budget: float = None,
+            on_reply: Callable[[str], None] = None, on_audio: Callable[[bytes], None] = None) -> Dict:
+        """Run one turn and return the student text, parsed assessment, reply, audio, video URLs and timings."""
+        timings = {}
+
+        start = time.perf_counter()
+        student, assessment = self.asr.recognize_from_microphone()
+        timings["asr"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        conversation.add_user_message(student)
+        reply = conversation.respond(if_end=if_end)
+        conversation.add_teacher_message(reply)
+        timings["reply"] = time.perf_counter() - start
+        if on_reply:
+            on_reply(reply)
+
+        start = time.perf_counter()
+        os.makedirs(os.path.dirname(self.audio_path) or ".", exist_ok=True)
+        self.tts.generate(reply, voice_id=self.voice_id, out_path=self.audio_path)
+        with open(self.audio_path, "rb") as audio_file:
+            audio = audio_file.read()
+        timings["tts"] = time.perf_counter() - start
+        if on_audio:
+            on_audio(audio)
+
+        start = time.perf_counter()
+        digest = hashlib.sha1(audio).hexdigest()
+        video_key = (self.face_id, digest)
+        future = video_cache.get_or_submit(video_key, lambda: self._render(audio, digest))
+        try:
+            video = future.result(timeout=video_budget)
+        except TimeoutError:
+            video = {}
+        except Exception as e:
+            if video_budget is None:
+                raise
+            # Degrade to text + audio rather than failing the whole turn
+            print(f"Avatar video failed: {e}")
+            video = {}
+        timings["avatar"] = time.perf_counter() - start
+
+        return {
+            "student": student,
+            "assessment": self._parse(assessment),
+            "reply": reply,
+            "audio": audio,
+            "url": video.get("mp4_url"),
+            # Playable while Simli is still rendering; see SimliAPI.stream_frames
+            "hls_url": video.get("hls_url"),
+            "video_key": video_key,
+            "timings": timings,
+        }
@@ -0,0 +1,57 @@
+import numpy as np
+
+
+class EnergyVAD:
+    """
+    Energy-based voice activity detection on 16-bit mono PCM. Frames louder
+    than the tracked noise floor by `margin_db` count as speech; an utterance
+    ends after `hangover_ms` of continuous non-speech following at least
+    `min_speech_ms` of speech. Used to close the ASR stream as soon as the
+    learner stops talking instead of waiting for the service's own timeout.
+    """
+
+    def __init__(self, sample_rate: int = 16000, margin_db: float = 12.0, min_level_db: float = -50.0,
+                 min_speech_ms: int = 200, hangover_ms: int = 600):
+        self.sample_rate = sample_rate
+        self.margin_db = margin_db
+        self.min_level_db = min_level_db
+        self.min_speech_ms = min_speech_ms
+        self.hangover_ms = hangover_ms
+        self.reset()
+
+    def reset(self) -> None:
+        self.noise_db = self.min_level_db
+        self.speech_ms = 0.0
+        self.silence_ms = 0.0
+
+    @property
+    def in_speech(self) -> bool:
+        return self.speech_ms >= self.min_speech_ms
+
+    @staticmethod
+    def level_db(samples: np.ndarray) -> float:
+        """RMS level in dBFS."""
+        if not len(samples):
+            return -120.0
+        rms = np.sqrt(np.mean(np.square(samples, dtype=np.float64))) / 32768.0
+        return 20 * np.log10(max(rms, 1e-6))
+
+    def process(self, samples: np.ndarray) -> bool:
+        """Feed one chunk of int16 samples; returns True once the utterance has ended."""
+        duration_ms = 1000.0 * len(samples) / self.sample_rate
+        level = self.level_db(samples)
+        threshold = max(self.min_level_db, self.noise_db + self.margin_db)
+
+        if level > threshold:
+            self.speech_ms += duration_ms
+            self.silence_ms = 0.0
+        else:
+            # Track the background slowly, and only from frames that aren't speech
+            self.noise_db = 0.95 * self.noise_db + 0.05 * level
+            if self.in_speech:
+                self.silence_ms += duration_ms
+            else:
+                # Clicks and short noises shorter than min_speech_ms don't start an utterance
+                self.speech_ms = 0.0
+
+        return self.in_speech and self.silence_ms >= self.hangover_ms
@@ -1,30 +1,38 @@
 import os
 import sys
+from typing import Union
 
 from elevenlabs import ElevenLabs
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from Env import XI_API_KEY
+from Backend.RateLimit import INTERACTIVE, ProviderLimiter, create_limiter
 
 
 class PostVoice:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, limiter: ProviderLimiter = None):
         self.xi_api_key = api_key
-        
-    def post(self, audio_path: str, voice_name: str):
+        self.limiter = limiter or create_limiter("elevenlabs")
+
+    def _add_voice(self, audio: bytes, voice_name: str, filename: str) -> str:
         client = ElevenLabs(api_key=self.xi_api_key)
-        response = client.voices.add(
-            name=voice_name,
-            files=[open(audio_path, "rb")]
-        )
-        
-        return response
-        
+        response = client.voices.add(name=voice_name, files=[(filename, audio)])
+        return response.voice_id
+
+    def post(self, audio: Union[str, bytes], voice_name: str, filename: str = "sample.mp3") -> str:
+        """Clone a voice from a sample (a path or the file's bytes) and return the new voice ID."""
+        if isinstance(audio, str):
+            filename = os.path.basename(audio)
+            with open(audio, "rb") as audio_file:
+                audio = audio_file.read()
+        return self.limiter.call(self._add_voice, audio, voice_name, filename, priority=INTERACTIVE)
+
 class GenSpeech:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, limiter: ProviderLimiter = None):
         self.xi_api_key = api_key
+        self.limiter = limiter or create_limiter("elevenlabs")
         
-    def generate(self, text: str, voice_id: str="KYKd9of0fJ9XG7bcwvmD", out_path: str="Samples/test.mp3"):
+    def _synthesize(self, text: str, voice_id: str) -> bytes:
         client = ElevenLabs(api_key=self.xi_api_key)
         response = client.text_to_speech.convert(
             voice_id=voice_id,
@@ -32,12 +40,18 @@ class GenSpeech:
             text=text,
             model_id="eleven_multilingual_v2",
         )
+        # Drain the stream inside the limiter, so a 429 mid-stream is retried too
+        return b"".join(response)
+        
+    def generate(self, text: str, voice_id: str="KYKd9of0fJ9XG7bcwvmD", out_path: str="Samples/test.mp3",
+                 priority: int = INTERACTIVE):
+        # The same text and voice requested concurrently is synthesized once
+        audio = self.limiter.call(self._synthesize, text, voice_id, priority=priority, key=(text, voice_id))
         
         with open(out_path, 'wb') as mp3_file:
-            for chunk in response:
-                mp3_file.write(chunk)
+            mp3_file.write(audio)
                 
-        return response
+        return audio
         
 
 if __name__ == "__main__":
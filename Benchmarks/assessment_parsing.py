@@ -0,0 +1,103 @@
+"""
+Parse rate and speed of level-assessment reply parsers on a corpus of sample
+model replies: the old line-based parser (fed the colon-stripped text that
+ChatbotWrapper.respond returns), the compiled JSON-schema validator, and the
+regex fallback.
+
+    python Benchmarks/assessment_parsing.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Backend.ChatAnalysis import ASSESSMENT_SCHEMA, parse_level_assessment
+from Backend.StructuredOutput import StructuredOutputError, parse_json_reply
+
+CORPUS = [
+    '{"level": 3, "confidence": 0.82}',
+    '{"confidence": 0.6, "level": 2}',
+    '{"level": 4.0, "confidence": "0.9"}',
+    '```json\n{"level": 5, "confidence": 0.75}\n```',
+    '{"level": 7, "confidence": 0.9}',
+    '{"level": 2}',
+    '级别（必须是整数）: 3\n置信度（必须是浮点数）: 0.8',
+    '级别（必须是整数）：2\n置信度（必须是浮点数）：0.65',
+    '级别: 4\n置信度: 0.9',
+    '评估结果如下：\n级别：1\n置信度：0.7',
+    'Level: 5\nConfidence: 0.55',
+    '根据用户的回答，我认为其水平为HSK3级。',
+    '用户的回答非常简单。级别 2，置信度 .6',
+    '无法评估。',
+]
+
+
+def legacy_parse(text: str):
+    """The pre-structured-output parser, applied to what respond() used to return."""
+    text = text.split("：")[-1].split(":")[-1].strip()
+    level, confidence = "1", 0.8
+    for line in text.split('\n'):
+        line = line.strip()
+        if line.startswith("级别:"):
+            level = line.split(":")[1].strip()
+        elif line.startswith("置信度:"):
+            confidence = float(line.split(":")[1].strip())
+    return str(max(1, min(6, int(level)))), max(0.0, min(1.0, confidence)), False
+
+
+def structured_parse(text: str):
+    """What assess_user_level does with a single reply: validator first, regex fallback."""
+    try:
+        result = parse_json_reply(text, ASSESSMENT_SCHEMA)
+        return str(result["level"]), result["confidence"], True
+    except StructuredOutputError:
+        parsed = parse_level_assessment(text)
+        return (parsed.level, parsed.confidence, True) if parsed else None
+
+
+def validator_only(text: str):
+    try:
+        result = parse_json_reply(text, ASSESSMENT_SCHEMA)
+        return str(result["level"]), result["confidence"], True
+    except StructuredOutputError:
+        return None
+
+
+def regex_only(text: str):
+    parsed = parse_level_assessment(text)
+    return (parsed.level, parsed.confidence, True) if parsed else None
+
+
+PARSERS = {
+    "legacy line parser": legacy_parse,
+    "schema validator": validator_only,
+    "regex fallback": regex_only,
+    "validator + regex": structured_parse,
+}
+
+
+def main():
+    print(f"{'parser':22}{'parsed':>10}{'us/reply':>12}")
+    for name, parser in PARSERS.items():
+        parsed = 0
+        for text in CORPUS:
+            try:
+                result = parser(text)
+            except Exception:
+                result = None
+            # the legacy parser "succeeds" with its defaults; only count replies it actually read
+            if result and (result[2] or result[:2] != ("1", 0.8)):
+                parsed += 1
+        seconds = timeit.timeit(lambda: [_safe(parser, text) for text in CORPUS], number=200)
+        print(f"{name:22}{parsed:>5}/{len(CORPUS):<4}{seconds / (200 * len(CORPUS)) * 1e6:>12.1f}")
+
+
+def _safe(parser, text):
+    try:
+        return parser(text)
+    except Exception:
+        return None
+
+
+if __name__ == "__main__":
+    main()
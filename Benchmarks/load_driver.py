@@ -0,0 +1,131 @@
+"""
+Simulate N concurrent learners running full lessons through TurnFlow against
+the offline fake services, and report throughput plus p50/p95/p99 latency per
+stage. Nothing external is called, so the numbers are our own overhead plus
+the configured fake latencies.
+
+    python Benchmarks/load_driver.py --learners 50 --llm-latency 0.8 --failure-rate 0.01
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Backend.Chatbot import ChatConversation
+from Backend.Services import services
+from Backend.TurnFlow import TurnFlow
+
+VOCAB = ["你好", "再见", "谢谢", "喜欢", "吃饭", "名字", "朋友", "学习"]
+
+
+def run_lesson(learner: int, rounds: int, audio_dir: str, video_budget: float = None) -> dict:
+    """One full lesson: `rounds` turns, then the end-of-lesson feedback call."""
+    timings = defaultdict(list)
+    failures = late_videos = 0
+    flow = TurnFlow(
+        services.get("asr"), services.get("tts"), services.get("simli"),
+        face_id="fake-face", voice_id="fake-voice",
+        audio_path=os.path.join(audio_dir, f"learner_{learner}.mp3")
+    )
+    conversation = ChatConversation(rounds=rounds, vocab=random.sample(VOCAB, 3), topic="Unit 1.1")
+
+    lesson_start = time.perf_counter()
+    assessments = []
+    for _ in range(rounds):
+        turn_start = time.perf_counter()
+        try:
+            turn = flow.run(conversation, video_budget=video_budget)
+        except Exception:
+            failures += 1
+            continue
+        for stage, seconds in turn["timings"].items():
+            timings[stage].append(seconds)
+        timings["turn"].append(time.perf_counter() - turn_start)
+        late_videos += turn["url"] is None
+        if turn["assessment"] is not None:
+            assessments.append(turn["assessment"].metrics())
+
+    start = time.perf_counter()
+    try:
+        conversation.assess(assessments)
+        timings["feedback"].append(time.perf_counter() - start)
+    except Exception:
+        failures += 1
+    timings["lesson"].append(time.perf_counter() - lesson_start)
+    return {"timings": timings, "failures": failures, "late_videos": late_videos, "turns": len(timings["turn"])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--learners", type=int, default=20, help="concurrent learners")
+    parser.add_argument("--lessons", type=int, default=1, help="lessons per learner")
+    parser.add_argument("--rounds", type=int, default=5, help="turns per lesson")
+    parser.add_argument("--distribution", default="lognormal", choices=["constant", "uniform", "lognormal"])
+    parser.add_argument("--asr-latency", type=float, default=1.5, help="seconds (median for lognormal)")
+    parser.add_argument("--llm-latency", type=float, default=0.8)
+    parser.add_argument("--tts-latency", type=float, default=0.6)
+    parser.add_argument("--avatar-latency", type=float, default=2.0)
+    parser.add_argument("--spread", type=float, default=0.3, help="sigma (lognormal) or half-width (uniform)")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--tts-bytes", type=int, default=48000, help="synthesized audio size per reply")
+    parser.add_argument("--tts-chunks", type=int, default=8, help="streamed TTS chunks per reply")
+    parser.add_argument("--video-budget", type=float, default=None,
+                        help="seconds to wait for the avatar before degrading to text + audio (default: wait)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    def behaviour(latency, **extra):
+        return {
+            "latency": {"kind": args.distribution, "mean": latency, "spread": args.spread},
+            "failure_rate": args.failure_rate,
+            "seed": args.seed,
+            **extra,
+        }
+
+    services.configure(mode="fake", fakes={
+        "asr": behaviour(args.asr_latency),
+        "chatbot": behaviour(args.llm_latency),
+        "tts": behaviour(args.tts_latency, payload_bytes=args.tts_bytes, stream_chunks=args.tts_chunks),
+        "simli": behaviour(args.avatar_latency),
+    })
+    random.seed(args.seed)
+    audio_dir = tempfile.mkdtemp(prefix="load-test-")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.learners) as pool:
+        jobs = [
+            pool.submit(run_lesson, learner, args.rounds, audio_dir, args.video_budget)
+            for learner in range(args.learners)
+            for _ in range(args.lessons)
+        ]
+        results = [job.result() for job in jobs]
+    elapsed = time.perf_counter() - start
+
+    timings = defaultdict(list)
+    for result in results:
+        for stage, values in result["timings"].items():
+            timings[stage].extend(values)
+    turns = sum(result["turns"] for result in results)
+    failures = sum(result["failures"] for result in results)
+    late_videos = sum(result["late_videos"] for result in results)
+
+    print(f"{args.learners} learners, {len(results)} lessons, {turns} turns in {elapsed:.2f}s")
+    print(f"throughput: {turns / elapsed:.2f} turns/s, {len(results) / elapsed:.2f} lessons/s, {failures} failures, {late_videos} turns without video")
+    print(f"{'stage':10}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for stage in TurnFlow.STAGES + ("turn", "feedback", "lesson"):
+        values = np.array(timings[stage])
+        if not len(values):
+            continue
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        print(f"{stage:10}{len(values):>8}{p50:>9.3f}s{p95:>9.3f}s{p99:>9.3f}s")
+
+
+if __name__ == "__main__":
+    main()
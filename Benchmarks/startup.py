@@ -0,0 +1,89 @@
+"""
+Cold-start cost of a Streamlit worker: backend module imports and the first
+and second render of Frontend/app.py, each measured in a fresh interpreter.
+
+    python Benchmarks/startup.py                 # current tree
+    python Benchmarks/startup.py --ref baseline  # also measure another git ref, side by side
+
+Needs the app's dependencies and an Env.py (copied into the checkout of --ref).
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+MODULES = ["Backend.Store", "Backend.Chatbot", "Backend.ChatAnalysis", "Backend.Speech", "Backend.SimliAPI"]
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, '.')
+results = {}
+for module in %(modules)r:
+    start = time.perf_counter()
+    try:
+        __import__(module)
+        results['import ' + module] = time.perf_counter() - start
+    except Exception as e:
+        results['import ' + module] = 'failed: %%s' %% e
+
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file('Frontend/app.py', default_timeout=120)
+for label in ('first render', 'rerun'):
+    start = time.perf_counter()
+    try:
+        app.run()
+        results[label] = time.perf_counter() - start
+    except Exception as e:
+        results[label] = 'failed: %%s' %% e
+print(json.dumps(results))
+"""
+
+
+def measure(root: str) -> dict:
+    """Run the probe in a fresh interpreter so module caches don't hide import cost."""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE % {"modules": MODULES}],
+        cwd=root, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def checkout(ref: str) -> str:
+    """Check `ref` out into a temporary worktree, bringing the local Env.py along."""
+    path = tempfile.mkdtemp(prefix="startup-bench-")
+    subprocess.run(["git", "worktree", "add", "--detach", path, ref], cwd=ROOT, check=True, capture_output=True)
+    if os.path.exists(os.path.join(ROOT, "Env.py")):
+        shutil.copy(os.path.join(ROOT, "Env.py"), path)
+    return path
+
+
+def fmt(value) -> str:
+    return f"{value * 1000:9.1f} ms" if isinstance(value, float) else str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ref", help="git ref to compare against (e.g. the commit before a change)")
+    args = parser.parse_args()
+
+    columns = {"current": measure(ROOT)}
+    if args.ref:
+        path = checkout(args.ref)
+        try:
+            columns[args.ref] = measure(path)
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", path], cwd=ROOT, capture_output=True)
+
+    names = list(columns)
+    print(f"{'':40}" + "".join(f"{name:>16}" for name in names))
+    for key in columns["current"]:
+        print(f"{key:40}" + "".join(f"{fmt(columns[name].get(key, '-')):>16}" for name in names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Micro-benchmarks for the hot paths: vocabulary lookups, Store reads/writes,
+audio conversion for Simli, frame encoding for the video player and prompt
+rendering. Each case is timed over several repeats and compared against the
+stored baseline; cases slower than the threshold are reported as regressions
+and make the run exit non-zero.
+
+    python Benchmarks/suite.py --save            # record baselines on this machine
+    python Benchmarks/suite.py                   # compare against them
+    python Benchmarks/suite.py -k store --threshold 0.10
+
+Cases whose dependencies are missing (pydub/ffmpeg, OpenCV, ...) are skipped.
+External APIs are never called: the chatbot is the offline fake.
+"""
+import os
+import sys
+import json
+import math
+import wave
+import timeit
+import argparse
+import platform
+import tempfile
+import statistics
+from typing import Callable, Dict
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+os.chdir(ROOT)  # the data files are opened relative to the repo root
+
+BASELINE_PATH = os.path.join(ROOT, "Benchmarks", "baselines.json")
+
+# name -> setup function returning the callable to time
+CASES: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def case(name: str):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def _store():
+    from Backend.Store import Store
+    store = Store(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    store.migrate()
+    return store
+
+
+def _fake_assessment():
+    from Backend.Fakes import FakeASR
+    from Backend.Assessment import parse_assessment
+    return parse_assessment(json.loads(FakeASR().recognize_from_microphone()[1]))
+
+
+def _fake_chatbot():
+    from Backend.Fakes import FakeChatbot
+    return FakeChatbot()
+
+
+def _analysis():
+    from Backend.ChatAnalysis import ChatAnalysis
+    return ChatAnalysis(store=_store(), chatbot=_fake_chatbot())
+
+
+def _sine_wav(seconds: float, sample_rate: int = 44100) -> str:
+    """A stereo 44.1kHz clip, like the ElevenLabs output Simli conversion starts from."""
+    path = os.path.join(tempfile.mkdtemp(), f"clip_{int(seconds)}s.wav")
+    samples = np.sin(np.arange(int(seconds * sample_rate)) * 2 * math.pi * 440 / sample_rate)
+    pcm = (samples * 12000).astype('<i2')
+    with wave.open(path, "wb") as clip:
+        clip.setnchannels(2)
+        clip.setsampwidth(2)
+        clip.setframerate(sample_rate)
+        clip.writeframes(np.repeat(pcm, 2).tobytes())
+    return path
+
+
+@case("analysis.construct")
+def analysis_construct():
+    from Backend.ChatAnalysis import ChatAnalysis
+    store, chatbot = _store(), _fake_chatbot()
+    return lambda: ChatAnalysis(store=store, chatbot=chatbot)
+
+
+@case("analysis.words_by_group")
+def analysis_words_by_group():
+    analysis = _analysis()
+    return lambda: [analysis.get_words_by_group(level, 1) for level in "123456"]
+
+
+@case("analysis.chars_by_level")
+def analysis_chars_by_level():
+    analysis = _analysis()
+    return lambda: [analysis.get_chars_by_level(level) for level in "123456"]
+
+
+@case("analysis.estimate_level")
+def analysis_estimate_level():
+    analysis = _analysis()
+    utterances = ["我喜欢吃饭，也喜欢和朋友一起学习中文。", "你好！我叫小明，今天天气很好。"] * 5
+    return lambda: analysis.estimator.estimate(utterances, 80.0)
+
+
+@case("store.write_conversation")
+def store_write_conversation():
+    store = _store()
+    user_id = store.get_or_create_user("bench_user", "bench@example.com")
+    record = _fake_assessment()
+
+    def write():
+        conversation_id = store.start_conversation(user_id, ["你好", "再见", "谢谢"])
+        for turn in range(10):
+            store.save_message(conversation_id, "你好，再见！", is_user=turn % 2 == 0, words_practiced=2)
+        store.save_assessment(user_id, record, conversation_id)
+        store.end_conversation(conversation_id)
+    return write
+
+
+@case("store.read_progress")
+def store_read_progress():
+    store = _store()
+    user_id = store.get_or_create_user("bench_user", "bench@example.com")
+    record = _fake_assessment()
+    for _ in range(20):
+        conversation_id = store.start_conversation(user_id, ["你好"])
+        for turn in range(10):
+            store.save_message(conversation_id, "你好，再见！", is_user=turn % 2 == 0, words_practiced=1)
+        store.save_assessment(user_id, record, conversation_id)
+
+    def read():
+        store.get_progress(user_id)
+        store.get_weakest_phonemes(user_id)
+        store.get_recent_user_messages(user_id)
+    return read
+
+
+@case("analysis.phoneme_history")
+def analysis_phoneme_history():
+    from Backend.Fakes import FakeASR
+    from Backend.Assessment import parse_assessment
+    from Backend.PhonemeAnalytics import PhonemeAnalytics
+    asr = FakeASR()
+    # A heavy learner's full history
+    records = [parse_assessment(json.loads(asr.recognize_from_microphone()[1])) for _ in range(2000)]
+    return lambda: PhonemeAnalytics(records).overview()
+
+
+def _convert_case(seconds: int):
+    def setup():
+        from Backend.SimliAPI import SimliAPI
+        api = SimliAPI("bench")
+        clip = _sine_wav(seconds)
+        return lambda: api.encode_audio_to_base64(api.convert_audio(clip))
+    return setup
+
+
+for _seconds in (3, 10, 30):
+    case(f"simli.convert_encode_{_seconds}s")(_convert_case(_seconds))
+
+
+@case("stream.frame_html")
+def stream_frame_html():
+    from Frontend.stream import create_video_player_html
+    frame = np.random.default_rng(0).integers(0, 255, (512, 512, 3), dtype=np.uint8)
+    return lambda: create_video_player_html(frame)
+
+
+@case("chat.respond_prompt")
+def chat_respond_prompt():
+    from Backend.Chatbot import ChatConversation
+    conversation = ChatConversation(chatbot=_fake_chatbot(), vocab=["你好", "再见", "谢谢"], topic="Unit 1.1")
+    for turn in range(6):
+        conversation.add_user_message("我喜欢吃饭，也喜欢和朋友一起学习中文。")
+        conversation.context.append("老师：很好！你喜欢吃什么？")
+    return lambda: conversation.respond()
+
+
+def measure(func: Callable, repeat: int, min_time: float) -> float:
+    """Median seconds per call, with the call count per repeat sized to run at least `min_time`."""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return statistics.median(t / number for t in timer.repeat(repeat=repeat, number=number))
+
+
+def load_baselines(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="pattern", default="", help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per repeat")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, 0.2 = 20%%")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="store these results as the new baselines")
+    args = parser.parse_args()
+
+    baselines = load_baselines(args.baseline)
+    results, regressions = {}, []
+    print(f"{'case':30}{'per call':>12}{'baseline':>12}{'change':>10}")
+    for name, setup in CASES.items():
+        if args.pattern not in name:
+            continue
+        try:
+            seconds = measure(setup(), args.repeat, args.min_time)
+        except Exception as e:
+            print(f"{name:30}{'skipped':>12}  {type(e).__name__}: {e}")
+            continue
+        results[name] = seconds
+
+        baseline = baselines.get("cases", {}).get(name)
+        if baseline is None:
+            print(f"{name:30}{seconds * 1e3:>10.3f}ms{'-':>12}")
+            continue
+        change = seconds / baseline - 1
+        flag = ""
+        if change > args.threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:30}{seconds * 1e3:>10.3f}ms{baseline * 1e3:>10.3f}ms{change:>+10.1%}{flag}")
+
+    if args.save:
+        cases = {**baselines.get("cases", {}), **results}
+        with open(args.baseline, "w") as baseline_file:
+            json.dump({"machine": platform.node(), "python": platform.python_version(), "cases": cases},
+                      baseline_file, indent=2, sort_keys=True)
+        print(f"saved {len(results)} baselines to {args.baseline}")
+    elif baselines and baselines.get("machine") != platform.node():
+        print(f"note: baselines were recorded on {baselines.get('machine')}, not this machine")
+
+    if regressions and not args.save:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Time until the avatar starts playing: streaming the HLS playlist segment by
+segment versus waiting for the whole render, against a local FakeHLSServer
+that lists a new segment every --segment-interval seconds.
+
+    python Benchmarks/video_start.py --segments 8 --segment-interval 0.5
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Backend import HLS
+from Backend.Fakes import FakeHLSServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--segment-seconds", type=float, default=1.0, help="playback length of each segment")
+    parser.add_argument("--segment-interval", type=float, default=0.5, help="render time of each segment")
+    parser.add_argument("--poll-interval", type=float, default=0.1)
+    args = parser.parse_args()
+
+    server = FakeHLSServer(segments=args.segments, segment_seconds=args.segment_seconds,
+                           segment_interval=args.segment_interval)
+
+    start = time.perf_counter()
+    first_frame, frames = None, 0
+    for _ in HLS.stream_frames(server.url("streamed"), poll_interval=args.poll_interval):
+        if first_frame is None:
+            first_frame = time.perf_counter() - start
+        frames += 1
+    streamed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in HLS.iter_segments(server.url("complete"), poll_interval=args.poll_interval):
+        pass
+    complete = time.perf_counter() - start
+    server.close()
+
+    print(f"{frames} frames in {args.segments} segments")
+    print(f"streaming: first frame after {first_frame:.3f}s, last after {streamed:.3f}s")
+    print(f"waiting for the full render: playback starts after {complete:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,36 @@
 import streamlit as st
 import json
+import os
+import sys
+from functools import lru_cache
 import pandas as pd
 import plotly.graph_objects as go
 from streamlit_elements import nivo, mui
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from Backend.Assessment import SCORE_KEYS, SCORE_NAMES, TICKS_PER_SECOND, parse_assessment
+
+# Turns drawn in the overlay radar; older ones stay in the data but aren't drawn
+RADAR_OVERLAY_TURNS = 5
+
 def load_pronunciation_data(json_data):
-    """Parse the JSON data and extract relevant metrics"""
-    data = json.loads(json_data)
-    assessment = data['NBest'][0]['PronunciationAssessment']
-    words = data['NBest'][0]['Words'][0]
-    phonemes = words['Phonemes']
+    """Parse the JSON data and extract relevant metrics, across every word of the utterance"""
+    record = parse_assessment(json.loads(json_data))
+    phoneme_data = record.phoneme_data
     
     return {
-        'display_text': data['DisplayText'],
-        'scores': assessment,
-        'phonemes': phonemes
+        'display_text': record.text,
+        'scores': dict(zip(SCORE_KEYS, record.scores.tolist())),
+        'phonemes': [
+            {
+                'Phoneme': phoneme,
+                'Word': record.words[word],
+                'PronunciationAssessment': {'AccuracyScore': accuracy},
+                'Offset': offset,
+                'Duration': duration,
+            }
+            for phoneme, (offset, duration, accuracy, word) in zip(record.phonemes, phoneme_data.tolist())
+        ]
     }
 
 def create_gauge_chart(value, title):
@@ -49,19 +65,104 @@ def create_phoneme_gauges(phonemes):
         {
             'phoneme': p['Phoneme'],
             'accuracy': p['PronunciationAssessment']['AccuracyScore'],
-            'duration': p['Duration'] / 1000000  # Convert to seconds
+            'duration': p['Duration'] / TICKS_PER_SECOND  # Azure reports 100ns ticks
         }
         for p in phonemes
     ]
     
-def render_radar_chart(data, assessment_index):
-    """Render Nivo radar chart with consistent styling."""
-    assessment_key = f"Assessment {assessment_index + 1}"
-    
+@lru_cache(maxsize=64)
+def create_gauge_grid(values, titles, columns=3):
+    """One figure with a gauge per score, memoized on the (value, title) tuples"""
+    rows = (len(values) + columns - 1) // columns
+    fig = go.Figure()
+    for idx, (value, title) in enumerate(zip(values, titles)):
+        fig.add_trace(go.Indicator(
+            mode="gauge+number",
+            value=value,
+            title={'text': title, 'font': {'size': 16}},
+            domain={'row': idx // columns, 'column': idx % columns},
+            gauge={
+                'axis': {'range': [None, 100]},
+                'bar': {'color': "darkblue"},
+                'steps': [
+                    {'range': [0, 60], 'color': 'lightgray'},
+                    {'range': [60, 80], 'color': 'lightblue'},
+                    {'range': [80, 100], 'color': 'azure'}
+                ],
+            }
+        ))
+    fig.update_layout(grid={'rows': rows, 'columns': columns, 'pattern': "independent"},
+                      height=250 * rows, font={'size': 16})
+    return fig
+
+def empty_radar_rows():
+    """Nivo radar data with one row per score; each assessment adds one key to every row"""
+    return [{"Score": name} for name in SCORE_NAMES]
+
+def add_radar_column(rows, record, label):
+    """Add one assessment's scores to the radar rows, at ingestion rather than on every rerun"""
+    for row, value in zip(rows, record.scores.tolist()):
+        row[label] = round(value, 1)
+
+def render_progress_dashboard(progress, weakest_phonemes):
+    """Render a learner's daily rollups and weakest phonemes"""
+    st.header("Your Progress")
+    if not progress:
+        st.info("No practice history yet. Finish a lesson to start tracking your progress!")
+        return
+
+    progress_df = pd.DataFrame(progress)
+    col1, col2 = st.columns(2)
+
+    with col1:
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=progress_df['day'], y=progress_df['conversations'], name="Conversations"))
+        fig.add_trace(go.Bar(x=progress_df['day'], y=progress_df['words_practiced'], name="Words Practiced"))
+        fig.update_layout(height=300, barmode='group', title="Practice Activity")
+        st.plotly_chart(fig, use_container_width=True)
+
+    with col2:
+        fig = go.Figure(go.Scatter(
+            x=progress_df['day'], y=progress_df['avg_score'],
+            mode="lines+markers", connectgaps=True, name="Pronunciation"
+        ))
+        fig.update_layout(height=300, title="Average Pronunciation Score", yaxis={'range': [0, 100]})
+        st.plotly_chart(fig, use_container_width=True)
+
+    if weakest_phonemes:
+        st.subheader("Sounds to Practice")
+        st.dataframe(pd.DataFrame(weakest_phonemes), hide_index=True)
+
+def render_pronunciation_report(report):
+    """Render the weakest sounds across a learner's whole history, with characters to practice them"""
+    if not report["weakest_sounds"]:
+        return
+    st.subheader("Pronunciation Breakdown")
+    sounds_df = pd.DataFrame(report["weakest_sounds"])
+    sounds_df["practice"] = sounds_df["phoneme"].map(lambda phoneme: " ".join(report["practice"].get(phoneme, [])))
+    st.dataframe(sounds_df, hide_index=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        tones_df = pd.DataFrame(report["tones"])
+        fig = go.Figure(go.Bar(x=tones_df["tone"].map(lambda tone: "neutral" if tone == 5 else f"tone {tone}"),
+                               y=tones_df["avg_score"]))
+        fig.update_layout(height=300, title="Accuracy by Tone", yaxis={'range': [0, 100]})
+        st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        st.write("Weakest initials")
+        st.dataframe(pd.DataFrame(report["weakest_initials"]), hide_index=True)
+        st.write("Weakest finals")
+        st.dataframe(pd.DataFrame(report["weakest_finals"]), hide_index=True)
+    if report["declining"] and report["declining"][0]["slope"] < 0:
+        st.caption("Slipping lately: " + ", ".join(row["phoneme"] for row in report["declining"] if row["slope"] < 0))
+
+def render_radar_chart(data, keys):
+    """Render Nivo radar chart with consistent styling, overlaying one series per key."""
     with mui.Box(sx={"height": 500}):
         nivo.Radar(
             data=data,
-            keys=[assessment_key],
+            keys=keys,
             indexBy="Score",
             valueFormat=">-.2f",
             margin={
@@ -116,69 +217,34 @@ def main():
     # Sample JSON data
     json_data = """{"Id":"4f938d61d22a46018cf01346d8bdd41a","RecognitionStatus":"Success","Offset":5800000,"Duration":13100000,"Channel":0,"DisplayText":"你好吗？","SNR":35.06624,"NBest":[{"Confidence":0.8023237,"Lexical":"你好吗","ITN":"你好吗","MaskedITN":"你好吗","Display":"你好吗？","PronunciationAssessment":{"AccuracyScore":90.0,"FluencyScore":100.0,"ProsodyScore":0.0,"CompletenessScore":100.0,"PronScore":38.0},"Words":[{"Word":"你好吗","Offset":5800000,"Duration":13100000,"PronunciationAssessment":{"AccuracyScore":90.0,"ErrorType":"None","Feedback":{"Prosody":{"Break":{"ErrorTypes":["None"],"BreakLength":0},"Intonation":{"ErrorTypes":[],"Monotone":{"SyllablePitchDeltaConfidence":1.0}}}}},"Phonemes":[{"Phoneme":"ni 3","PronunciationAssessment":{"AccuracyScore":60.0},"Offset":5800000,"Duration":4500000},{"Phoneme":"hao 3","PronunciationAssessment":{"AccuracyScore":100.0},"Offset":10400000,"Duration":2100000},{"Phoneme":"ma 5","PronunciationAssessment":{"AccuracyScore":99.0},"Offset":12600000,"Duration":6300000}]}]}]}"""
     
-    data = load_pronunciation_data(json_data)
+    record = parse_assessment(json.loads(json_data))
     
     # Display the text being analyzed
     st.header("Analyzed Text")
-    st.subheader(data['display_text'])
+    st.subheader(record.text)
     
-    # Display overall scores using gauge charts
+    # Display overall scores as one grid of gauges
     st.header("Overall Assessment Scores")
-    
-    # Create columns for the gauge charts
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.plotly_chart(create_gauge_chart(
-            data['scores']['AccuracyScore'], 
-            "Accuracy Score"
-        ), use_container_width=True)
-    
-    with col2:
-        st.plotly_chart(create_gauge_chart(
-            data['scores']['FluencyScore'], 
-            "Fluency Score"
-        ), use_container_width=True)
-    
-    with col3:
-        st.plotly_chart(create_gauge_chart(
-            data['scores']['CompletenessScore'], 
-            "Completeness Score"
-        ), use_container_width=True)
-    
-    # Additional scores in new row
-    col4, col5, col6 = st.columns(3)
-    
-    with col4:
-        st.plotly_chart(create_gauge_chart(
-            data['scores']['ProsodyScore'], 
-            "Prosody Score"
-        ), use_container_width=True)
-    
-    with col5:
-        st.plotly_chart(create_gauge_chart(
-            38.0,  # PronScore from data
-            "Pronunciation Score"
-        ), use_container_width=True)
+    st.plotly_chart(create_gauge_grid(
+        tuple(record.scores.tolist()), tuple(f"{name} Score" for name in SCORE_NAMES)
+    ), use_container_width=True)
     
     # Phoneme Analysis
     st.header("Phoneme Analysis")
-    phoneme_data = create_phoneme_gauges(data['phonemes'])
-    
-    # Create columns for phoneme gauges
-    phoneme_cols = st.columns(len(phoneme_data))
-    
-    for idx, phoneme in enumerate(phoneme_data):
-        with phoneme_cols[idx]:
-            st.plotly_chart(create_gauge_chart(
-                phoneme['accuracy'],
-                f"'{phoneme['phoneme']}'"
-            ), use_container_width=True)
-            st.metric("Duration", f"{phoneme['duration']:.2f}s")
+    st.plotly_chart(create_gauge_grid(
+        tuple(record.phoneme_scores.tolist()), tuple(f"'{phoneme}'" for phoneme in record.phonemes),
+        columns=max(1, min(len(record.phonemes), 4))
+    ), use_container_width=True)
 
     # Display detailed metrics in a table
     st.header("Detailed Metrics")
-    metrics_df = pd.DataFrame(phoneme_data)
+    phoneme_data = record.phoneme_data
+    metrics_df = pd.DataFrame({
+        'word': [record.words[w] for w in phoneme_data['word']],
+        'phoneme': record.phonemes,
+        'accuracy': phoneme_data['accuracy'],
+        'duration': phoneme_data['duration'] / TICKS_PER_SECOND,
+    })
     st.dataframe(metrics_df)
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@ import os
 import io
 import json
 import random
+import uuid
 
 import streamlit as st
 import pandas as pd
@@ -12,13 +13,13 @@ import streamlit_authenticator as stauth
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from Env import XI_API_KEY, SIMLI_API_KEY
-
-from Backend.Speech import ASR
 from Backend.Chatbot import ChatConversation
-from Backend.VoiceCloning import GenSpeech, PostVoice
-from Backend.SimliAPI import SimliAPI
-from Backend.ChatAnalysis import ChatAnalysis
+from Backend.Services import services
+from Backend.AvatarRegistry import AvatarRegistry
+from Backend.SessionStore import SessionState
+from Backend.Store import EmailInUse
+from Backend.LanguagePacks import DEFAULT_LANGUAGE, available_packs, load_pack
+from Backend.TurnFlow import TurnFlow, video_cache
 from Frontend.analysis import *
 
 import yaml
@@ -68,30 +69,184 @@ levels = [
 ]
 
 
-asr = ASR()
-simli = SimliAPI(SIMLI_API_KEY)
-tts = GenSpeech(XI_API_KEY)
-chatanalysis = ChatAnalysis()
+# Clients live in the process-wide registry: built on first use, shared by all sessions
+services.configure(**config.get("services", {}))
 
 
-if "conversation" not in st.session_state: st.session_state['conversation'] = ChatConversation(rounds=2, vocab=["你好", "再见", "谢谢"])
+if "lesson" not in st.session_state: st.session_state['lesson'] = None
 if "rounds" not in st.session_state: st.session_state['rounds'] = 0
 if "transcript" not in st.session_state: st.session_state['transcript'] = []
 # if "assessment" not in st.session_state: st.session_state['assessment'] = [json.load(open('test.json', 'r'))]
 if "assessment" not in st.session_state: st.session_state['assessment'] = []
+if "radar_rows" not in st.session_state: st.session_state['radar_rows'] = empty_radar_rows()
+if "language" not in st.session_state: st.session_state['language'] = DEFAULT_LANGUAGE
 if "current_level" not in st.session_state: st.session_state['current_level'] = "Dashboard"
 if "image_file" not in st.session_state: st.session_state["image_file"] = None
 if "audio_file" not in st.session_state: st.session_state["audio_file"] = None
 if "face_id" not in st.session_state: st.session_state["face_id"] = "679fc967-ae0c-4824-a426-03eea6161c72"
 if "voice_id" not in st.session_state: st.session_state["voice_id"] = "WGIt24BEIrlyobxX1pOR"
 if "url" not in st.session_state: st.session_state["url"] = None
+if "pending_video" not in st.session_state: st.session_state["pending_video"] = None
+
+
+def get_user_id():
+    """Resolve the logged-in user's database ID once per session (None until logged in)."""
+    if st.session_state.get("user_id") is None:
+        username = st.session_state.get("username")
+        if not username:
+            return None
+        email = config["credentials"]["usernames"][username]["email"]
+        try:
+            st.session_state["user_id"] = services.get("store").get_or_create_user(username, email)
+        except EmailInUse:
+            st.error(f"The email for {username} is already registered to another account.")
+            st.stop()
+        # Reuse the avatar set up in an earlier session instead of the defaults
+        registry = get_avatar_registry()
+        st.session_state["face_id"] = registry.current_face_id(st.session_state["user_id"]) or st.session_state["face_id"]
+        st.session_state["voice_id"] = registry.current_voice_id(st.session_state["user_id"]) or st.session_state["voice_id"]
+    return st.session_state["user_id"]
+
+
+def get_avatar_registry():
+    return AvatarRegistry(services.get("store"), services.get("voices"), services.get("simli"))
+
+
+def get_session():
+    """
+    This browser's lesson state in the shared session store (services:
+    session_store), so a reconnect to any worker, or after a restart, resumes
+    the lesson. Each browser tab is identified by a `sid` query parameter, so
+    a learner's tabs and devices keep separate lessons.
+    """
+    if "sid" not in st.query_params:
+        st.query_params["sid"] = uuid.uuid4().hex
+    username = st.session_state.get("username")
+    key = f"user:{username}:{st.query_params['sid']}" if username else f"guest:{st.query_params['sid']}"
+    session = st.session_state.get("session")
+    if session is None or session.key != key:
+        session = st.session_state["session"] = SessionState(services.get("sessions"), key)
+    return session
+
+
+LESSON_FIELDS = ("lesson_key", "conversation", "rounds", "transcript", "assessment")
 
 
 def empty_state():
-    st.session_state['conversation'] = ChatConversation(rounds=2, vocab=["你好", "再见", "谢谢"])
+    # The next rerun starts a fresh lesson with newly sampled vocabulary
+    st.session_state['lesson'] = None
     st.session_state['rounds'] = 0
     st.session_state['transcript'] = []
     st.session_state['assessment'] = []
+    st.session_state['radar_rows'] = empty_radar_rows()
+    get_session().clear(*LESSON_FIELDS)
+
+
+def save_turn(assessed=False):
+    """Write what a turn changed to the session store; assessments only when one was added."""
+    fields = {
+        "conversation": st.session_state['conversation'].to_state(),
+        "rounds": st.session_state['rounds'],
+        "transcript": st.session_state['transcript'],
+    }
+    if assessed:
+        fields["assessment"] = st.session_state['assessment']
+    if not get_session().save_lesson(st.session_state['lesson']['key'], **fields):
+        # A tab opened from this one's URL shares its sid and has started another lesson
+        st.warning("This lesson was replaced by one started in another tab, so it won't be resumed after a reload.")
+
+
+def restore_lesson(key):
+    """The lesson saved under `key` by any worker, rebuilt into this session, or None."""
+    session = get_session()
+    if session.get("lesson_key") != list(key):
+        return None
+    conversation = ChatConversation.from_state(session.get("conversation"), store=services.get("store"))
+    st.session_state['rounds'] = session.get("rounds", 0)
+    st.session_state['transcript'] = list(session.get("transcript", []))
+    st.session_state['assessment'] = []
+    st.session_state['radar_rows'] = empty_radar_rows()
+    for record in session.get("assessment", []):
+        add_assessment(record)
+    return {
+        'key': key,
+        'vocab': services.get("analysis").get_word_details(conversation.vocab),
+        'conversation': conversation,
+    }
+
+
+def add_assessment(record):
+    """Keep a turn's parsed assessment and add its column to the radar data, once."""
+    st.session_state['assessment'].append(record)
+    add_radar_column(st.session_state['radar_rows'], record, f"Assessment {len(st.session_state['assessment'])}")
+
+
+@st.cache_data
+def load_vocab(level: str, group: int) -> pd.DataFrame:
+    """Vocabulary slices never change, so every session shares one copy per (level, group)."""
+    return services.get("analysis").get_words_by_group(level, group)
+
+
+def get_lesson():
+    """
+    Create the lesson (sampled vocab + conversation) once per (user, level) and
+    reuse it on every rerun, e.g. the one triggered by "Click to speak".
+    """
+    key = (st.session_state.get("username"), st.session_state["language"], st.session_state["current_level"])
+    lesson = st.session_state['lesson']
+    if lesson is None or lesson['key'] != key:
+        lesson = restore_lesson(key)
+    if lesson is None or lesson['key'] != key:
+        empty_state()
+        user_id = get_user_id()
+        if user_id is not None:
+            # Due reviews first, then new words: see Backend/Scheduler.py
+            analysis = services.get("analysis")
+            sampled_words = analysis.get_vocabulary_for_conversation(user_id, num_words=8)
+            vocab = analysis.get_word_details(sampled_words)
+        else:
+            vocab = load_vocab("1", 2)
+            word_list = vocab[services.get("analysis").columns['word']].tolist()
+            # Guests have no review history: randomly sample 8 words (or all words if less than 8 available)
+            sampled_words = random.sample(word_list, min(8, len(word_list)))
+        lesson = {
+            'key': key,
+            'vocab': vocab,
+            'conversation': ChatConversation(
+                rounds=2,
+                vocab=sampled_words,
+                topic=st.session_state["current_level"],
+                user_id=user_id,
+                store=services.get("store"),
+                candidates=config.get("lesson", {}).get("candidates", 1),
+                parallel_candidates=config.get("lesson", {}).get("parallel_candidates", 2),
+                pack=load_pack(st.session_state["language"])
+            ),
+        }
+        get_session().save_lesson(
+            key, conversation=lesson['conversation'].to_state(), rounds=0, transcript=[], assessment=[]
+        )
+    st.session_state['lesson'] = lesson
+    st.session_state['conversation'] = lesson['conversation']
+    return lesson
+
+
+def get_turn_flow(microphone=None):
+    asr = services.get("asr")
+    if microphone is not None and services.setting("mode") != "fake":
+        # Per-session ASR over the learner's own microphone, instead of the server's
+        from Backend.Speech import StreamingASR
+        from Frontend.microphone import microphone_frames
+        asr = StreamingASR(
+            microphone_frames(microphone), locale=load_pack(st.session_state["language"]).asr_locale,
+            key=services.setting("AZURE_ASR_KEY"), region=services.setting("AZURE_ASR_REGION")
+        )
+    return TurnFlow(
+        asr, services.get("tts"), services.get("simli"),
+        face_id=st.session_state["face_id"],
+        voice_id=st.session_state["voice_id"],
+        audio_path=f"Samples/{st.session_state.get('username') or 'guest'}.mp3"
+    )
 
 
 def chat_layout():    
@@ -105,44 +260,72 @@ def chat_layout():
         video_file = st.empty()
         # st.video("https://example.com/sample-video.mp4")
 
-        if st.button(f"Click to speak"):
-            stu_reply = asr.recognize_from_microphone()
-            assessment = stu_reply[1]
-            stu_reply = stu_reply[0]
+        # A video that missed its turn's budget is swapped in once it has rendered
+        if st.session_state["pending_video"] is not None:
+            late_video = video_cache.ready(st.session_state["pending_video"])
+            if late_video and late_video["mp4_url"]:
+                st.session_state["url"] = late_video["mp4_url"]
+                st.session_state["pending_video"] = None
+
+        microphone = None
+        browser_audio = config.get("lesson", {}).get("audio_input") == "browser"
+        if browser_audio:
+            from Frontend.microphone import browser_microphone
+            microphone = browser_microphone(f"microphone-{st.session_state.get('username') or 'guest'}")
+            if not microphone.state.playing:
+                st.info("Press Start above and allow microphone access to speak.")
+                microphone = None
+
+        if st.button(f"Click to speak", disabled=browser_audio and microphone is None):
+            conversation = st.session_state['conversation']
+            if_end = st.session_state['rounds'] >= conversation.rounds
+            reply_slot, audio_slot = st.empty(), st.empty()
+            # Text first, then audio, then the avatar only if it renders within the budget
+            turn = get_turn_flow(microphone).run(
+                conversation, if_end=if_end,
+                video_budget=config.get("lesson", {}).get("video_budget"),
+                on_reply=lambda reply: reply_slot.info(conversation.teacher_prefix + reply),
+                on_audio=lambda audio: audio_slot.audio(audio, format="audio/mp3", autoplay=True)
+            )
             
-            st.session_state['transcript'].append("User: " + stu_reply)
-            st.session_state['conversation'].context.append("学生:" + stu_reply)
+            st.session_state['transcript'].append("User: " + turn["student"])
+            st.session_state['transcript'].append("System: " + turn["reply"])
             
-            if st.session_state['rounds'] < st.session_state['conversation'].rounds:
-                sys_reply = st.session_state['conversation'].respond()
-                st.session_state['conversation'].context.append("老师:" + sys_reply)
-                st.session_state['transcript'].append("System: " + sys_reply)
-                
+            if not if_end:
                 st.session_state["rounds"] += 1
-                st.session_state["assessment"].append(json.loads(assessment))
-                    
-            elif st.session_state['rounds'] == st.session_state['conversation'].rounds:
-                sys_reply = st.session_state['conversation'].respond(if_end=True)
-                st.session_state['conversation'].context.append("老师:" + sys_reply)
-                st.session_state['transcript'].append("System: " + sys_reply)
-            
-            if not os.path.exists("Samples"):
-                os.mkdir("Samples")
-
-            tts.generate(sys_reply, voice_id=st.session_state["voice_id"], out_path="Samples/test.mp3")
-            url = simli.audio_to_video(
-                st.session_state["face_id"], "Samples/test.mp3"
-            )["mp4_url"]
-
-            if url:
-                st.session_state["url"] = url
-
-            if st.session_state['rounds'] == st.session_state['conversation'].rounds:
-                assess = st.session_state['conversation'].assess(st.session_state['assessment'])
+                if turn["assessment"] is not None:
+                    add_assessment(turn["assessment"])
+                    if get_user_id() is not None:
+                        services.get("store").save_assessment(get_user_id(), turn["assessment"], conversation.conversation_id)
+            save_turn(assessed=not if_end and turn["assessment"] is not None)
+
+            if turn["url"]:
+                st.session_state["url"] = turn["url"]
+                st.session_state["pending_video"] = None
+            else:
+                st.session_state["pending_video"] = turn["video_key"]
+
+            if st.session_state['rounds'] == conversation.rounds:
+                assess = conversation.assess([record.metrics() for record in st.session_state['assessment']])
                 feedback(assess)
+                if get_user_id() is not None:
+                    utterances = [line[len("User: "):] for line in st.session_state['transcript'] if line.startswith("User: ")]
+                    services.get("analysis").review_lesson(
+                        get_user_id(), conversation.vocab, utterances, st.session_state['assessment']
+                    )
                 empty_state()
 
-            st.video(st.session_state["url"], autoplay=True)
+            if turn["hls_url"] and config.get("lesson", {}).get("stream_video"):
+                # Start on the first rendered segment instead of waiting for the finished mp4
+                from Frontend.stream import VideoGenerationStreamer, display_frames
+                streamer = VideoGenerationStreamer()
+                streamer.start_stream(services.get("simli").stream_frames(turn["hls_url"]))
+                display_frames(streamer, display_fps=25)
+            elif turn["url"]:
+                audio_slot.empty()
+                st.video(turn["url"], autoplay=True)
+            else:
+                st.caption("The avatar video is still rendering; it will appear here when ready.")
             
         st.write("Last video URL: ", st.session_state.get("url", "No video URL generated yet"))
         if st.session_state["url"]:
@@ -155,35 +338,10 @@ def chat_layout():
         # Add comments section
         with st.container():
             if len(st.session_state['assessment']) > 0:
-                tabs = st.tabs([f"Assessment {idx + 1}" for idx in range(len(st.session_state['assessment']))])
-                
-                for idx, (tab, data) in enumerate(zip(tabs, st.session_state['assessment'])):
-                    with tab:
-                        with elements(f"assessment_{idx}"):  # Unique key for each assessment
-                            d = [
-                                {
-                                    "Score": "Accuracy",
-                                    f"Assessment {idx + 1}": data['NBest'][0]['PronunciationAssessment']['AccuracyScore'],
-                                },
-                                {
-                                    "Score": "Fluency",
-                                    f"Assessment {idx + 1}": data['NBest'][0]['PronunciationAssessment']['FluencyScore'],
-                                },
-                                {
-                                    "Score": "Completeness",
-                                    f"Assessment {idx + 1}": data['NBest'][0]['PronunciationAssessment']['CompletenessScore'],
-                                },
-                                {
-                                    "Score": "Prosody",
-                                    f"Assessment {idx + 1}": data['NBest'][0]['PronunciationAssessment']['ProsodyScore'],
-                                },
-                                {
-                                    "Score": "Pronunciation",
-                                    f"Assessment {idx + 1}": data['NBest'][0]['PronunciationAssessment']['PronScore'],
-                                }
-                            ]
-                            
-                            render_radar_chart(data=d, assessment_index=idx)
+                # One overlay of the most recent turns: render cost doesn't grow with the lesson
+                keys = [f"Assessment {idx + 1}" for idx in range(len(st.session_state['assessment']))]
+                with elements("assessment_overlay"):
+                    render_radar_chart(st.session_state['radar_rows'], keys[-RADAR_OVERLAY_TURNS:])
 
     # Transcript section at the bottom
     st.header("Transcript")
@@ -209,6 +367,17 @@ def upload_and_display_avatar_img():
 
     if image_file is not None:
         st.session_state["image_file"] = image_file
+        user_id = get_user_id()
+        # The uploader keeps returning the same file on every rerun; register it once
+        if user_id is not None and st.session_state.get("face_upload") != image_file.file_id:
+            st.session_state["face_upload"] = image_file.file_id
+            # Looked up by content hash: only an image never uploaded before reaches Simli
+            try:
+                st.session_state["face_id"] = get_avatar_registry().face_id(
+                    user_id, image_file.getvalue(), st.session_state.get("avatar_name") or "untitled_avatar", image_file.name
+                )
+            except Exception as e:
+                st.error(f"Could not create the avatar face: {e}")
     
     if st.session_state["image_file"] is not None:
         # Open the image file using Pillow (PIL)
@@ -224,14 +393,30 @@ def upload_and_play_audio():
 
     if audio_file is not None:
         st.session_state["audio_file"] = audio_file
+        user_id = get_user_id()
+        if user_id is not None and st.session_state.get("voice_upload") != audio_file.file_id:
+            st.session_state["voice_upload"] = audio_file.file_id
+            # Looked up by content hash: only a sample never uploaded before is cloned
+            try:
+                st.session_state["voice_id"] = get_avatar_registry().voice_id(
+                    user_id, audio_file.getvalue(), st.session_state.get("avatar_name") or st.session_state["username"], audio_file.name
+                )
+            except Exception as e:
+                st.error(f"Could not clone the voice: {e}")
     
     if st.session_state["audio_file"] is not None:
         # Play the uploaded audio file
-        st.audio(audio_file)
+        st.audio(st.session_state["audio_file"])
 
 def select_language():
     language = st.selectbox("✨ What language do you want to learn today?", languages)
-    st.write(f"You choose: {language}. That's hard. Good luck!")
+    # Only the chosen language's pack is ever loaded; see Backend/LanguagePacks.py
+    codes = {name: code for code, name in available_packs().items()}
+    if language in codes:
+        st.session_state["language"] = codes[language]
+        st.write(f"You choose: {language}. That's hard. Good luck!")
+    else:
+        st.info(f"{language} lessons are coming soon; your lessons stay in {available_packs()[st.session_state['language']]} for now.")
 
 def choose_language_level():
     selected_level = st.selectbox("🎯Choose your preferred conversation topic: ", levels)
@@ -255,6 +440,14 @@ def dashboard():
     level = choose_language_level()
     start_conversation(avatar_name, level)
 
+    user_id = get_user_id()
+    if user_id is not None:
+        render_progress_dashboard(
+            services.get("store").get_progress(user_id),
+            services.get("store").get_weakest_phonemes(user_id),
+        )
+        render_pronunciation_report(services.get("analysis").get_pronunciation_report(user_id))
+
 
 def level_selector(user_level=5):
     for idx, level in enumerate(levels):
@@ -300,19 +493,12 @@ def create_layout():
     else:
         st.title(st.session_state["current_level"])
         
-        vocab = chatanalysis.get_words_by_group("1", 2)
-        word_list = vocab['word_simplified'].tolist()
-        # Randomly sample 8 words (or all words if less than 8 available)
-        sampled_words = random.sample(word_list, min(8, len(word_list)))
-        st.session_state['conversation'] = ChatConversation(
-            rounds=2, 
-            vocab=sampled_words, 
-            topic=st.session_state["current_level"]
-        )
+        vocab = get_lesson()['vocab']
+        columns = load_pack(st.session_state["language"]).columns
         
         with st.expander("📖 New Words"):
             for _, row in vocab.iterrows():
-                st.markdown(f"**{row['word_simplified']}**: {row['cc_cedict_english_definition']}")
+                st.markdown(f"**{row[columns['word']]}**: {row[columns['definition']]}")
         
         chat_layout()
 
@@ -0,0 +1,40 @@
+import queue
+
+import av
+import numpy as np
+from streamlit_webrtc import WebRtcMode, webrtc_streamer
+
+
+def browser_microphone(key: str):
+    """Send-only WebRTC widget capturing the learner's microphone in their browser."""
+    return webrtc_streamer(
+        key=key,
+        mode=WebRtcMode.SENDONLY,
+        audio_receiver_size=256,
+        media_stream_constraints={"audio": True, "video": False},
+    )
+
+
+def microphone_frames(ctx, sample_rate: int = 16000):
+    """
+    Yield the browser's audio as 16 kHz mono int16 chunks for StreamingASR, for as
+    long as the WebRTC connection is up. A second without audio yields an empty
+    chunk, so the caller's time limits still run when the connection stalls.
+    """
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+
+    # Skip audio captured before the learner pressed "Click to speak"
+    try:
+        ctx.audio_receiver.get_frames(timeout=0.01)
+    except queue.Empty:
+        pass
+
+    while ctx.state.playing:
+        try:
+            frames = ctx.audio_receiver.get_frames(timeout=1)
+        except queue.Empty:
+            yield np.zeros(0, dtype=np.int16)
+            continue
+        for frame in frames:
+            for resampled in resampler.resample(frame):
+                yield resampled.to_ndarray().reshape(-1)
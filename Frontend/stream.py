@@ -1,65 +1,161 @@
 import streamlit as st
 import cv2
 import numpy as np
+import os
+import sys
 import time
 import threading
-import queue
-from PIL import Image
-import io
 import base64
-import html
+from collections import deque
+from typing import NamedTuple, Optional
 
-class VideoGenerationStreamer:
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+class EncodedFrame(NamedTuple):
+    index: int
+    jpeg_base64: str
+    encode_seconds: float
+
+
+class FrameBuffer:
+    """
+    Bounded ring buffer between the frame producer and the display loop.
+    When the display falls behind, the oldest frames are dropped instead of
+    queueing up, so memory stays flat and the view stays close to live.
+    """
+    def __init__(self, capacity: int = 8):
+        self._frames = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, frame: EncodedFrame, block: bool = False):
+        """
+        Buffer a frame. Live sources drop the oldest frame when full; recorded
+        sources (`block=True`) wait for room instead, so no frame is lost
+        """
+        with self._cond:
+            if block:
+                while len(self._frames) == self._frames.maxlen:
+                    self._cond.wait()
+            elif len(self._frames) == self._frames.maxlen:
+                self.dropped += 1
+            self._frames.append(frame)
+            self._cond.notify_all()
+
+    def get(self, timeout: float = None) -> Optional[EncodedFrame]:
+        """Oldest buffered frame, or None if nothing arrives within `timeout`."""
+        with self._cond:
+            if not self._frames:
+                self._cond.wait(timeout)
+            frame = self._frames.popleft() if self._frames else None
+            self._cond.notify_all()
+            return frame
+
+    def clear(self):
+        with self._cond:
+            self._frames.clear()
+            self.dropped = 0
+            self._cond.notify_all()
+
+    def empty(self) -> bool:
+        with self._cond:
+            return not self._frames
+
+
+class StreamStats:
+    """Produced / displayed / dropped counts with rates and mean encode time."""
     def __init__(self):
-        self.frame_queue = queue.Queue()
+        self.reset()
+
+    def reset(self):
+        self.started = time.perf_counter()
+        self.produced = 0
+        self.displayed = 0
+        self.encode_seconds = 0.0
+
+    def report(self, dropped: int) -> dict:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return {
+            "Frames Generated": self.produced,
+            "Frames Displayed": self.displayed,
+            "Frames Dropped": dropped,
+            "Generation FPS": round(self.produced / elapsed, 1),
+            "Display FPS": round(self.displayed / elapsed, 1),
+            "Mean Encode (ms)": round(1000 * self.encode_seconds / max(self.produced, 1), 2),
+        }
+
+
+def encode_frame(frame, quality: int = 80) -> str:
+    """JPEG-encode a BGR frame with OpenCV and return it as base64."""
+    ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return base64.b64encode(jpeg).decode()
+
+
+class VideoGenerationStreamer:
+    def __init__(self, buffer_size: int = 8, jpeg_quality: int = 80, frame_interval: float = 0.1):
+        self.frames = FrameBuffer(buffer_size)
+        self.stats = StreamStats()
+        self.jpeg_quality = jpeg_quality
+        # Simulated generation time per mock frame
+        self.frame_interval = frame_interval
         self.is_generating = False
         self.current_frame = 0
-        
+        # Reused for every mock frame; only the encoded bytes leave the producer
+        self._canvas = np.zeros((256, 256, 3), dtype=np.uint8)
+
     def mock_generate_frame(self, prompt, frame_number):
         """
         Mock video generation - replace this with your actual video generation model
         In reality, this would call your video generation model's function
         """
         # Create a simple animation as a placeholder
-        image = np.zeros((256, 256, 3), dtype=np.uint8)
+        image = self._canvas
+        image.fill(0)
         center = (128, 128)
         radius = int(20 + 10 * np.sin(frame_number * 0.1))
         color = ((frame_number * 2) % 255, (frame_number * 3) % 255, (frame_number * 5) % 255)
         cv2.circle(image, center, radius, color, -1)
-        
+
         # Add frame number and prompt text
-        cv2.putText(image, f"Frame {frame_number}", (10, 30), 
+        cv2.putText(image, f"Frame {frame_number}", (10, 30),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        cv2.putText(image, f"Prompt: {prompt[:20]}...", (10, 60), 
+        cv2.putText(image, f"Prompt: {prompt[:20]}...", (10, 60),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-        
+
         return image
 
+    def push_frame(self, frame, block=False):
+        """
+        Encode a BGR frame in the calling (producer) thread and buffer it for display
+        """
+        start = time.perf_counter()
+        jpeg = encode_frame(frame, self.jpeg_quality)
+        elapsed = time.perf_counter() - start
+        self.stats.produced += 1
+        self.stats.encode_seconds += elapsed
+        self.frames.put(EncodedFrame(self.current_frame, jpeg, elapsed), block=block)
+        self.current_frame += 1
+
     def generate_video_frames(self, prompt, total_frames):
         """
-        Generate video frames and put them in the queue
+        Generate video frames and put them in the buffer
         """
         self.is_generating = True
         self.current_frame = 0
-        
+
         try:
             while self.current_frame < total_frames and self.is_generating:
                 # Generate frame - replace mock_generate_frame with your model's generation
-                frame = self.mock_generate_frame(prompt, self.current_frame)
-                
-                # Convert to RGB format
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Put frame in queue
-                self.frame_queue.put(frame_rgb)
-                
-                self.current_frame += 1
-                
+                self.push_frame(self.mock_generate_frame(prompt, self.current_frame))
+
                 # Simulate generation time
-                time.sleep(0.1)  # Remove this in actual implementation
-                
+                time.sleep(self.frame_interval)  # Remove this in actual implementation
+
         except Exception as e:
-            st.error(f"Error generating frames: {str(e)}")
+            print(f"Error generating frames: {str(e)}")
         finally:
             self.is_generating = False
 
@@ -67,6 +163,10 @@ class VideoGenerationStreamer:
         """
         Start video generation in a separate thread
         """
+        self.frames.clear()
+        self.stats.reset()
+        # Set before the thread starts, so the display loop doesn't see an idle streamer and exit
+        self.is_generating = True
         generation_thread = threading.Thread(
             target=self.generate_video_frames,
             args=(prompt, total_frames)
@@ -74,99 +174,128 @@ class VideoGenerationStreamer:
         generation_thread.start()
         return generation_thread
 
+    def stream_frames(self, frames):
+        """
+        Feed already-rendered BGR frames (e.g. Backend.HLS.stream_frames) to the display as they arrive
+        """
+        self.is_generating = True
+        self.current_frame = 0
+
+        try:
+            for frame in frames:
+                if not self.is_generating:
+                    break
+                # Recorded video: wait for the display instead of dropping frames
+                self.push_frame(frame, block=True)
+        except Exception as e:
+            print(f"Error streaming frames: {str(e)}")
+        finally:
+            self.is_generating = False
+
+    def start_stream(self, frames):
+        """
+        Start consuming a frame iterator in a separate thread
+        """
+        self.frames.clear()
+        self.stats.reset()
+        self.is_generating = True
+        stream_thread = threading.Thread(target=self.stream_frames, args=(frames,), daemon=True)
+        stream_thread.start()
+        return stream_thread
+
     def stop_generation(self):
         """
         Stop video generation
         """
         self.is_generating = False
+        # Wakes a producer blocked on a full buffer so it can see the stop
+        self.frames.clear()
 
 def create_video_player_html(frame):
     """
-    Create HTML for displaying the video frame
+    Create HTML for displaying the video frame (an EncodedFrame, or an RGB array)
     """
-    # Convert frame to base64
-    im = Image.fromarray(frame)
-    buffer = io.BytesIO()
-    im.save(buffer, format="JPEG")
-    img_str = base64.b64encode(buffer.getvalue()).decode()
-    
+    if isinstance(frame, EncodedFrame):
+        img_str = frame.jpeg_base64
+    else:
+        img_str = encode_frame(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+
     # Create HTML with styling
     html_code = f"""
         <div style="display: flex; justify-content: center; align-items: center;">
-            <img src="data:image/jpeg;base64,{img_str}" 
+            <img src="data:image/jpeg;base64,{img_str}"
                  style="max-width: 100%; height: auto; border: 2px solid #ccc; border-radius: 5px;">
         </div>
     """
     return html_code
 
+def display_frames(streamer, total_frames=None, display_fps=10, progress_bar=None):
+    """
+    Show buffered frames paced at `display_fps` until the producer stops and the buffer drains
+    """
+    frame_placeholder = st.empty()
+    stats_placeholder = st.empty()
+    interval = 1.0 / display_fps
+
+    while streamer.is_generating or not streamer.frames.empty():
+        started = time.perf_counter()
+        frame = streamer.frames.get(timeout=1)
+        if frame is None:
+            continue
+
+        try:
+            frame_placeholder.markdown(create_video_player_html(frame), unsafe_allow_html=True)
+        except Exception as e:
+            st.error(f"Error displaying frame: {str(e)}")
+            break
+        streamer.stats.displayed += 1
+
+        if progress_bar is not None and total_frames:
+            progress_bar.progress(min(1.0, streamer.current_frame / total_frames))
+        stats_placeholder.write(streamer.stats.report(streamer.frames.dropped))
+
+        # Pace to the display rate; frames produced faster than this are dropped by the buffer
+        time.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
 def main():
     st.title("Real-time Video Generation Streaming")
-    
+
     # Initialize session state
     if 'streamer' not in st.session_state:
         st.session_state.streamer = VideoGenerationStreamer()
-    
+
     # Input parameters
-    prompt = st.text_input("Enter generation prompt:", "A dancing robot")
-    total_frames = st.slider("Number of frames to generate:", 10, 100, 30)
-    
+    source = st.radio("Source:", ["Mock generator", "HLS stream"], horizontal=True)
+    if source == "HLS stream":
+        # e.g. an hls_url from Simli, or the local FakeHLSServer in Backend/Fakes.py
+        playlist_url = st.text_input("Playlist URL:", "http://127.0.0.1:8765/demo/playlist.m3u8")
+        total_frames = None
+    else:
+        prompt = st.text_input("Enter generation prompt:", "A dancing robot")
+        total_frames = st.slider("Number of frames to generate:", 10, 100, 30)
+    display_fps = st.slider("Display frames per second:", 1, 30, 10)
+
     # Control columns
     col1, col2 = st.columns(2)
-    
+
     with col1:
         if st.button("Start Generation"):
             if not st.session_state.streamer.is_generating:
-                # Clear any existing frames
-                while not st.session_state.streamer.frame_queue.empty():
-                    st.session_state.streamer.frame_queue.get()
-                
-                # Start generation
-                st.session_state.streamer.start_generation(prompt, total_frames)
-    
+                if source == "HLS stream":
+                    from Backend.HLS import stream_frames
+                    st.session_state.streamer.start_stream(stream_frames(playlist_url))
+                else:
+                    st.session_state.streamer.start_generation(prompt, total_frames)
+
     with col2:
         if st.button("Stop Generation"):
             st.session_state.streamer.stop_generation()
-    
+
     # Progress bar
     progress_bar = st.progress(0)
-    
-    # Frame display
-    frame_placeholder = st.empty()
-    
-    # Statistics
-    stats_placeholder = st.empty()
-    
+
     # Display frames as they're generated
-    while st.session_state.streamer.is_generating or not st.session_state.streamer.frame_queue.empty():
-        try:
-            # Get frame from queue with timeout
-            frame = st.session_state.streamer.frame_queue.get(timeout=1)
-            
-            # Update progress
-            progress = min(1.0, st.session_state.streamer.current_frame / total_frames)
-            progress_bar.progress(progress)
-            
-            # Display frame
-            frame_placeholder.markdown(
-                create_video_player_html(frame),
-                unsafe_allow_html=True
-            )
-            
-            # Update statistics
-            stats_placeholder.write({
-                "Frames Generated": st.session_state.streamer.current_frame,
-                "Frames Remaining": total_frames - st.session_state.streamer.current_frame,
-                "Generation Active": st.session_state.streamer.is_generating
-            })
-            
-            # Small delay to prevent overwhelming the UI
-            time.sleep(0.1)
-            
-        except queue.Empty:
-            continue
-        except Exception as e:
-            st.error(f"Error displaying frame: {str(e)}")
-            break
+    display_frames(st.session_state.streamer, total_frames, display_fps, progress_bar)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
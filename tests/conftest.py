@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# The Backend modules import each other as `Backend.*`, from the repo root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture
+def store(tmp_path):
+    """A migrated Store on its own SQLite file."""
+    from Backend.Store import Store
+    store = Store(f"sqlite:///{os.path.join(tmp_path, 'test.db')}")
+    store.migrate()
+    return store
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from Backend.Assessment import SCORE_KEYS, AssessmentRecord, parse_assessment
+
+
+def azure_result(text, words, scores=(80.0, 70.0, 90.0, 60.0, 75.0)):
+    """An Azure-shaped result: `words` is [(word, error type, [(phoneme, accuracy), ...]), ...]."""
+    return {
+        "DisplayText": text,
+        "NBest": [{
+            "PronunciationAssessment": dict(zip(SCORE_KEYS, scores)),
+            "Words": [
+                {
+                    "Word": word, "Offset": 1000 * w, "Duration": 500,
+                    "PronunciationAssessment": {"AccuracyScore": 50.0 + w, "ErrorType": error},
+                    "Phonemes": [
+                        {"Phoneme": phoneme, "Offset": 1000 * w + p, "Duration": 100,
+                         "PronunciationAssessment": {"AccuracyScore": accuracy}}
+                        for p, (phoneme, accuracy) in enumerate(phonemes)
+                    ],
+                }
+                for w, (word, error, phonemes) in enumerate(words)
+            ],
+        }],
+    }
+
+
+MULTI_WORD = azure_result("我喜欢吃饭。", [
+    ("我", "None", [("wo 3", 91.5)]),
+    ("喜欢", "Mispronunciation", [("xi 3", 40.0), ("huan 5", 77.25)]),
+    ("吃饭", "None", [("chi 1", 65.0), ("fan 4", 88.0)]),
+])
+
+
+def assert_same(record, restored):
+    assert restored == record
+    assert restored.text == record.text
+    assert restored.words == record.words
+    assert restored.phonemes == record.phonemes
+    np.testing.assert_array_equal(restored.scores, record.scores)
+    np.testing.assert_array_equal(restored.word_data, record.word_data)
+    np.testing.assert_array_equal(restored.phoneme_data, record.phoneme_data)
+
+
+def test_multi_word_round_trip():
+    record = parse_assessment(MULTI_WORD)
+    restored = AssessmentRecord.from_bytes(record.to_bytes())
+    assert_same(record, restored)
+    assert restored.words == ("我", "喜欢", "吃饭")
+    assert restored.phoneme_pairs() == [("wo 3", 91.5), ("xi 3", 40.0), ("huan 5", 77.2), ("chi 1", 65.0), ("fan 4", 88.0)]
+    assert restored.word_errors() == [("喜欢", "Mispronunciation")]
+    assert restored.word_data["phoneme_count"].tolist() == [1, 2, 2]
+    assert restored.pron_score == 75.0
+
+
+def test_round_trip_without_words_or_phonemes():
+    record = parse_assessment(azure_result("", []))
+    restored = AssessmentRecord.from_bytes(record.to_bytes())
+    assert_same(record, restored)
+    assert restored.words == () and restored.phonemes == ()
+    assert len(restored.word_data) == 0 and len(restored.phoneme_data) == 0
+
+
+def test_round_trip_words_without_phonemes():
+    record = parse_assessment(azure_result("你好", [("你好", "Omission", [])]))
+    restored = AssessmentRecord.from_bytes(record.to_bytes())
+    assert_same(record, restored)
+    assert restored.words == ("你好",) and restored.phonemes == ()
+
+
+def test_bad_magic_is_rejected():
+    data = bytearray(parse_assessment(MULTI_WORD).to_bytes())
+    data[:4] = b"JSON"
+    with pytest.raises(ValueError):
+        AssessmentRecord.from_bytes(bytes(data))
+
+
+@pytest.mark.parametrize("cut", [0, 3, 10, 40, -1])
+def test_truncated_bytes_are_rejected(cut):
+    data = parse_assessment(MULTI_WORD).to_bytes()
+    with pytest.raises(ValueError):
+        AssessmentRecord.from_bytes(data[:cut])
+
+
+def test_trailing_bytes_are_rejected():
+    with pytest.raises(ValueError):
+        AssessmentRecord.from_bytes(parse_assessment(MULTI_WORD).to_bytes() + b"\0")
+
+
+def test_store_round_trip(store):
+    user_id = store.get_or_create_user("learner", "learner@example.com")
+    first = parse_assessment(MULTI_WORD)
+    second = parse_assessment(azure_result("", []))
+    conversation_id = store.start_conversation(user_id, ["吃饭"])
+    store.save_assessment(user_id, first, conversation_id)
+    store.save_assessment(user_id, second)
+
+    newest_first = store.get_assessments(user_id)
+    assert len(newest_first) == 2
+    assert_same(second, newest_first[0])
+    assert_same(first, newest_first[1])
+    assert store.get_assessments(user_id, limit=1) == [second]
@@ -0,0 +1,21 @@
+import pytest
+
+from Backend.ChatAnalysis import ChatAnalysis
+from Backend.Fakes import FakeChatbot
+
+
+@pytest.fixture
+def analysis(store):
+    return ChatAnalysis(store=store, chatbot=FakeChatbot())
+
+
+def test_chars_by_level_use_pack_columns(analysis):
+    chars = analysis.get_chars_by_level("1")
+    assert "的" in chars
+    assert len(chars) == (analysis.char_df[analysis.pack.char_columns["level"]] == 1).sum()
+
+
+def test_chars_by_level_without_a_character_table(analysis):
+    analysis.char_df = None
+    with pytest.raises(ValueError, match="no character table"):
+        analysis.get_chars_by_level("1")
@@ -0,0 +1,89 @@
+import gc
+import threading
+
+from Backend.Chatbot import ChatConversation
+
+
+class CountingBot:
+    """Chatbot stand-in returning numbered replies and counting the generations started."""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def respond(self, prompt, system_instruction=None, coalesce=True, priority=None):
+        with self._lock:
+            self.calls += 1
+            return f"reply {self.calls}"
+
+    def generate(self, prompt, system_instruction=None, coalesce=True, priority=None):
+        return "摘要：学生练习了你好"
+
+
+class Scorer:
+    """Accepts only the replies in `accepted`; scores the others by their number."""
+
+    def __init__(self, accepted):
+        self.accepted = set(accepted)
+
+    def score(self, reply, vocab, level):
+        return float(reply.split()[-1]), reply in self.accepted
+
+
+def conversation(bot, scorer, candidates, parallel_candidates):
+    return ChatConversation(chatbot=bot, vocab=["你好"], candidates=candidates,
+                            parallel_candidates=parallel_candidates, scorer=scorer)
+
+
+def test_accepted_candidate_skips_the_rest():
+    bot = CountingBot()
+    chat = conversation(bot, Scorer({"reply 1"}), candidates=4, parallel_candidates=1)
+    assert chat.respond() == "reply 1"
+    assert bot.calls == 1
+
+
+def test_rejected_candidates_start_the_next_ones():
+    bot = CountingBot()
+    chat = conversation(bot, Scorer({"reply 3"}), candidates=4, parallel_candidates=1)
+    assert chat.respond() == "reply 3"
+    assert bot.calls == 3
+
+
+def test_best_candidate_when_none_is_acceptable():
+    bot = CountingBot()
+    chat = conversation(bot, Scorer(set()), candidates=3, parallel_candidates=2)
+    assert chat.respond() == "reply 3"
+    assert bot.calls == 3
+
+
+def test_parallel_candidates_survive_a_restore():
+    chat = conversation(CountingBot(), Scorer(set()), candidates=4, parallel_candidates=3)
+    restored = ChatConversation.from_state(chat.to_state(), chatbot=CountingBot())
+    assert (restored.candidates, restored.parallel_candidates) == (4, 3)
+
+
+def test_dropping_a_conversation_leaves_the_shared_store_open(store):
+    user_id = store.get_or_create_user("learner", "learner@example.com")
+    chat = ChatConversation(chatbot=CountingBot(), vocab=["你好"], user_id=user_id, store=store, scorer=Scorer(set()))
+    restored = ChatConversation.from_state(chat.to_state(), chatbot=CountingBot(), store=store)
+    # Another session in the middle of a query on the process-wide Store
+    conn = store._get_conn()
+    try:
+        del chat, restored
+        gc.collect()
+        with store.backend.cursor(conn) as cur:
+            cur.execute("SELECT COUNT(*) FROM users")
+            assert cur.fetchone()[0] == 1
+    finally:
+        store._put_conn(conn)
+
+
+def test_summaries_keep_their_colons():
+    chat = conversation(CountingBot(), Scorer(set()), candidates=1, parallel_candidates=1)
+    chat.context.keep_turns = 1
+    chat.add_user_message("你好")
+    chat.add_teacher_message("你好！")
+    pending = chat.context._pending
+    if pending is not None:
+        pending.result(5)
+    assert chat.context.summary == "摘要：学生练习了你好"
@@ -0,0 +1,124 @@
+import threading
+import time
+
+from Backend.Context import ConversationContext, estimate_tokens
+
+
+def wait_for_summary(context, summarized_turns=None, timeout=5.0):
+    """Wait until no summary is running and, if given, `summarized_turns` turns are folded in."""
+    deadline = time.monotonic() + timeout
+    while context._pending is not None or (summarized_turns is not None and context.summarized_turns != summarized_turns):
+        assert time.monotonic() < deadline, "timed out waiting for the summary"
+        time.sleep(0.001)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("你好") == 2
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("你好abcde") == 4
+
+
+def test_render_keeps_the_newest_turns_within_budget():
+    context = ConversationContext(token_budget=10)
+    for turn in ["一二三四", "五六七八", "九十百千"]:
+        context.append(turn)
+    # 12 tokens of turns against a budget of 10: the oldest is dropped
+    assert context.render() == "五六七八\n九十百千"
+
+
+def test_render_always_keeps_the_newest_turn():
+    context = ConversationContext(token_budget=2)
+    context.append("短")
+    context.append("这是一个比预算长得多的句子")
+    assert context.render() == "这是一个比预算长得多的句子"
+
+
+def test_render_counts_the_summary_against_the_budget():
+    context = ConversationContext(token_budget=16)
+    context.restore({"turns": ["老一", "一二三四", "五六七八"], "summary": "摘要", "summarized_turns": 1})
+    # The header costs 9 tokens, leaving room for only the newest turn
+    assert context.render() == "之前的对话摘要：摘要\n五六七八"
+
+
+def test_older_turns_are_folded_into_the_summary():
+    prompts = []
+
+    def summarize(prompt):
+        prompts.append(prompt)
+        return f" 摘要{len(prompts)} "
+
+    context = ConversationContext(summarize=summarize, keep_turns=2, token_budget=1000)
+    for turn in ["学生：你好", "老师：你好！", "学生：再见"]:
+        context.append(turn)
+    wait_for_summary(context, summarized_turns=1)
+
+    assert len(prompts) == 1
+    assert "学生：你好" in prompts[0] and "老师：你好！" not in prompts[0]
+    assert context.summary == "摘要1"
+    assert context.summarized_turns == 1
+    assert context.recent_turns() == ["老师：你好！", "学生：再见"]
+    assert context.render() == "之前的对话摘要：摘要1\n老师：你好！\n学生：再见"
+
+    context.append("老师：再见！")
+    wait_for_summary(context, summarized_turns=2)
+    # The next summary builds on the previous one
+    assert "摘要1" in prompts[1] and "老师：你好！" in prompts[1]
+    assert (context.summary, context.summarized_turns) == ("摘要2", 2)
+    # Every turn is still kept in full
+    assert len(context) == 4
+
+
+def test_failed_summary_keeps_turns_verbatim_and_retries():
+    calls = []
+
+    def summarize(prompt):
+        calls.append(prompt)
+        if len(calls) == 1:
+            raise RuntimeError("quota")
+        return "摘要"
+
+    context = ConversationContext(summarize=summarize, keep_turns=1)
+    context.append("一")
+    context.append("二")
+    wait_for_summary(context)
+    assert (context.summary, context.summarized_turns) == ("", 0)
+
+    context.append("三")
+    wait_for_summary(context, summarized_turns=2)
+    assert context.summary == "摘要"
+
+
+def test_turns_arriving_during_a_summary_are_summarized_next():
+    release = threading.Event()
+    prompts = []
+
+    def summarize(prompt):
+        prompts.append(prompt)
+        release.wait(5)
+        return f"摘要{len(prompts)}"
+
+    context = ConversationContext(summarize=summarize, keep_turns=1)
+    context.append("一")
+    context.append("二")
+    context.append("三")  # while the first summary is still running
+    release.set()
+    wait_for_summary(context, summarized_turns=2)
+    assert len(prompts) == 2
+    assert (context.summary, context.summarized_turns) == ("摘要2", 2)
+
+
+def test_state_round_trip():
+    context = ConversationContext(keep_turns=2, token_budget=50)
+    context.restore({"turns": ["一", "二", "三"], "summary": "摘要", "summarized_turns": 1})
+    state = context.to_state()
+    assert state == {"turns": ["一", "二", "三"], "summary": "摘要", "summarized_turns": 1}
+
+    restored = ConversationContext(keep_turns=2, token_budget=50)
+    restored.restore(state)
+    assert list(restored) == ["一", "二", "三"]
+    assert restored.recent_turns() == ["二", "三"]
+    assert restored.render() == context.render()
+    # The state is a copy: later turns don't leak into it
+    context.append("四")
+    assert state["turns"] == ["一", "二", "三"]
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from Backend.LanguagePacks import load_pack
+from Backend.LevelEstimator import LevelAssessment, LevelEstimator
+
+HSK1 = ["你好！", "我是学生。", "我喜欢吃米饭。", "谢谢你。", "我很好。", "再见！"]
+HSK5 = [
+    "随着经济全球化的不断深入，各国之间的交流与合作日益频繁。",
+    "这种趋势不仅促进了文化的融合，而且对传统观念产生了深远的影响。",
+    "我们应当客观地分析其中的利弊，并且积极采取相应的措施。",
+]
+
+
+@pytest.fixture(scope="module")
+def estimator():
+    pack = load_pack("zh")
+    return LevelEstimator(pack.words, pack.columns, pack.chars, pack.char_columns)
+
+
+def test_segments_against_the_word_list(estimator):
+    assert estimator.segment("我喜欢吃米饭。Hello 谢谢") == ["我", "喜欢", "吃", "米饭", "谢谢"]
+
+
+def test_hsk1_utterances(estimator):
+    assert estimator.estimate(HSK1).level == "1"
+
+
+def test_hsk5_utterances(estimator):
+    assert estimator.estimate(HSK5).level == "5"
+
+
+def test_pronunciation_nudges_by_at_most_half_a_level(estimator):
+    assert estimator.estimate(HSK1, pron_score=95).level == "2"
+    assert estimator.estimate(HSK1, pron_score=0).level == "1"
+    assert estimator.estimate(HSK5, pron_score=0).level == "4"
+
+
+def test_confidence_grows_with_text(estimator):
+    short = estimator.estimate(HSK5[:1])
+    longer = estimator.estimate(HSK5)
+    assert 0 < short.confidence < longer.confidence <= 1
+
+
+def test_no_chinese_text(estimator):
+    assert estimator.estimate([]) == LevelAssessment("1", 0.0)
+    assert estimator.estimate(["", "  ", "hello"]) == LevelAssessment("1", 0.0)
+
+
+def test_columns_come_from_the_pack_mapping():
+    words = pd.DataFrame({"lemma": ["你好", "学生", "学生"], "grade": [1, 2, 1]})
+    estimator = LevelEstimator(words, {"word": "lemma", "level": "grade"})
+    # The lowest listed level wins; no character table is needed
+    assert estimator.word_levels == {"你好": 1, "学生": 1}
+    assert estimator.char_levels == {}
+    assert estimator.estimate(["你好", "学生"]).level == "1"
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from Backend.Assessment import PHONEME_DTYPE, SCORE_NAMES, WORD_DTYPE, AssessmentRecord
+from Backend.PhonemeAnalytics import PhonemeAnalytics, split_syllable
+
+
+@pytest.mark.parametrize("label, expected", [
+    ("zhong 1", ("zhong", "zh", "ong", 1)),
+    ("ma", ("ma", "m", "a", 5)),
+    ("ai 4", ("ai", "", "ai", 4)),
+    # ü has one bucket whichever way it is spelled
+    ("ju 4", ("ju", "j", "v", 4)),
+    ("qu 4", ("qu", "q", "v", 4)),
+    ("lü 4", ("lv", "l", "v", 4)),
+    ("lv 4", ("lv", "l", "v", 4)),
+    ("nu: 3", ("nv", "n", "v", 3)),
+    ("xue 2", ("xue", "x", "ve", 2)),
+    ("lüe 4", ("lve", "l", "ve", 4)),
+    ("quan 2", ("quan", "q", "van", 2)),
+    ("xun 4", ("xun", "x", "vn", 4)),
+    # but u after other initials stays u
+    ("lu 4", ("lu", "l", "u", 4)),
+    ("dun 4", ("dun", "d", "un", 4)),
+])
+def test_split_syllable_initials_and_finals(label, expected):
+    assert split_syllable(label) == expected
+
+
+@pytest.mark.parametrize("label, final", [
+    ("yi 1", "i"), ("yin 1", "in"), ("ying 2", "ing"),
+    ("ya 1", "ia"), ("ye 3", "ie"), ("yao 4", "iao"), ("yan 2", "ian"), ("yang 2", "iang"),
+    ("you 3", "iu"), ("yong 4", "iong"),
+    ("yu 2", "v"), ("yue 4", "ve"), ("yuan 2", "van"), ("yun 4", "vn"),
+    ("wu 3", "u"), ("wa 1", "ua"), ("wo 3", "uo"), ("wai 4", "uai"), ("wan 3", "uan"),
+    ("wang 2", "uang"), ("weng 1", "ueng"), ("wei 4", "ui"), ("wen 4", "un"),
+])
+def test_y_and_w_are_zero_initial(label, final):
+    _, initial, split_final, _ = split_syllable(label)
+    assert initial == ""
+    assert split_final == final
+
+
+def test_zero_initial_finals_share_buckets_with_spelled_ones():
+    assert split_syllable("yu 2")[2] == split_syllable("lü 4")[2] == split_syllable("ju 1")[2]
+    assert split_syllable("you 3")[2] == split_syllable("liu 2")[2]
+    assert split_syllable("wei 4")[2] == split_syllable("gui 4")[2]
+
+
+def _record(phonemes):
+    labels = tuple(label for label, _ in phonemes)
+    phoneme_data = np.zeros(len(labels), dtype=PHONEME_DTYPE)
+    phoneme_data["accuracy"] = [score for _, score in phonemes]
+    return AssessmentRecord("", np.zeros(len(SCORE_NAMES), np.float32), (), np.zeros(0, WORD_DTYPE),
+                            labels, phoneme_data)
+
+
+def test_weakest_finals_merge_u_umlaut_spellings():
+    records = [_record([("ju 4", 40.0), ("lü 4", 50.0), ("yu 2", 60.0), ("lu 4", 90.0), ("wu 3", 95.0)])] * 3
+    analytics = PhonemeAnalytics(records)
+    finals = {row["final"]: row for row in analytics.weakest("final", limit=10)}
+    assert finals["v"]["attempts"] == 9
+    assert finals["v"]["avg_score"] == 50.0
+    assert finals["u"]["attempts"] == 6
+    initials = {row["initial"] for row in analytics.weakest("initial", limit=10)}
+    assert initials == {"j", "l"}
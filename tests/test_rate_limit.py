@@ -0,0 +1,223 @@
+import threading
+import time
+
+import pytest
+
+from Backend.RateLimit import BACKGROUND, INTERACTIVE, ProviderLimiter, QueueFull, RateLimited, SingleFlight
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+class Blocker:
+    """Holds the limiter's only slot until released, so later calls queue up behind it."""
+
+    def __init__(self, limiter):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.thread = threading.Thread(target=limiter.call, args=(self._run,))
+        self.thread.start()
+        assert self.started.wait(5)
+
+    def _run(self):
+        self.started.set()
+        self.release.wait(5)
+
+    def finish(self):
+        self.release.set()
+        self.thread.join(5)
+
+
+def start_call(limiter, func, priority, errors=None, wait=True):
+    """Call `func` through `limiter` on a thread, by default returning once the call is queued."""
+    queued = len(limiter._waiting)
+
+    def run():
+        try:
+            limiter.call(func, priority=priority)
+        except QueueFull as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    if wait:
+        wait_until(lambda: len(limiter._waiting) > queued)
+    return thread
+
+
+def test_interactive_calls_run_before_background_ones():
+    limiter = ProviderLimiter("test", rate=1000, burst=100, max_concurrent=1)
+    order = []
+    blocker = Blocker(limiter)
+    threads = [
+        start_call(limiter, lambda name=name: order.append(name), priority)
+        for name, priority in [("background 1", BACKGROUND), ("interactive 1", INTERACTIVE),
+                               ("background 2", BACKGROUND), ("interactive 2", INTERACTIVE)]
+    ]
+    blocker.finish()
+    for thread in threads:
+        thread.join(5)
+    assert order == ["interactive 1", "interactive 2", "background 1", "background 2"]
+
+
+def test_full_queue_evicts_background_work():
+    limiter = ProviderLimiter("test", rate=1000, burst=100, max_concurrent=1, max_queue=1)
+    order, errors = [], []
+    blocker = Blocker(limiter)
+    background = start_call(limiter, lambda: order.append("background"), BACKGROUND, errors)
+    # The queue is full: the interactive call takes the background call's place
+    interactive = start_call(limiter, lambda: order.append("interactive"), INTERACTIVE, errors, wait=False)
+    background.join(5)
+    assert limiter._waiting[0][0] == INTERACTIVE
+    assert len(errors) == 1 and "evicted" in str(errors[0])
+
+    # Nothing less urgent is left to evict, so a newcomer is refused outright
+    with pytest.raises(QueueFull):
+        limiter.call(lambda: order.append("late"), priority=BACKGROUND)
+    with pytest.raises(QueueFull):
+        limiter.call(lambda: order.append("late"), priority=INTERACTIVE)
+
+    blocker.finish()
+    interactive.join(5)
+    assert order == ["interactive"]
+    assert limiter._waiting == [] and limiter._active == 0
+
+
+def test_429_pauses_every_caller_then_retries():
+    limiter = ProviderLimiter("test", rate=1000, burst=100, max_concurrent=4)
+    pause = 0.3
+    limited_at = []
+    calls = []
+
+    def flaky():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            limited_at.append(time.monotonic())
+            raise RateLimited("429 Too Many Requests", retry_after=pause)
+        return "ok"
+
+    assert limiter.call(flaky) == "ok"
+    assert len(calls) == 2
+    assert calls[1] - limited_at[0] >= pause - 0.01
+
+    # A 429 seen by one caller holds back the others too
+    limiter._pause(pause)
+    paused_at = time.monotonic()
+    other = limiter.call(time.monotonic)
+    assert other - paused_at >= pause - 0.01
+
+
+def test_429_gives_up_after_max_retries():
+    limiter = ProviderLimiter("test", rate=1000, burst=100, max_retries=2, backoff=0.001)
+    attempts = []
+
+    def always_limited():
+        attempts.append(1)
+        raise RateLimited("429", retry_after=0.001)
+
+    with pytest.raises(RateLimited):
+        limiter.call(always_limited)
+    assert len(attempts) == 3
+    assert limiter._active == 0
+
+
+def test_other_errors_are_not_retried():
+    limiter = ProviderLimiter("test", rate=1000, burst=100)
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        limiter.call(broken)
+    assert len(attempts) == 1
+
+
+def _run_followers(flight, key, func, count):
+    """Start `count` callers of `key` while its leader is in flight, returning once all are waiting."""
+    results = []
+
+    def follow():
+        try:
+            results.append(flight.do(key, func))
+        except Exception as e:
+            results.append(e)
+
+    followers = [threading.Thread(target=follow) for _ in range(count)]
+    for follower in followers:
+        follower.start()
+    future = flight._calls[key]
+    wait_until(lambda: len(future._condition._waiters) == count)
+    return followers, results
+
+
+def test_single_flight_shares_one_result():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return object()
+
+    leader_result = []
+    leader = threading.Thread(target=lambda: leader_result.append(flight.do("key", slow)))
+    leader.start()
+    assert started.wait(5)
+    followers, results = _run_followers(flight, "key", slow, 3)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert all(result is leader_result[0] for result in results)
+    # Once it has landed the key is free again
+    assert flight.do("key", lambda: "fresh") == "fresh"
+
+
+def test_single_flight_shares_the_error():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("upstream failed")
+
+    leader = threading.Thread(target=lambda: pytest.raises(RuntimeError, flight.do, "key", failing))
+    leader.start()
+    assert started.wait(5)
+    followers, results = _run_followers(flight, "key", failing, 2)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+
+
+def test_limiter_coalesces_calls_with_the_same_key():
+    limiter = ProviderLimiter("test", rate=1000, burst=100)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "voice-id"
+
+    leader = threading.Thread(target=limiter.call, args=(slow,), kwargs={"key": "sample"})
+    leader.start()
+    assert started.wait(5)
+    followers, results = _run_followers(limiter._flights, "sample", lambda: "other", 2)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+    assert calls == [1]
+    assert results == ["voice-id", "voice-id"]
@@ -0,0 +1,21 @@
+from Backend.LanguagePacks import LanguagePack, _read_meta, load_pack
+from Backend.ReplyScorer import ReplyScorer
+
+
+def test_off_level_reply_is_rejected():
+    scorer = ReplyScorer(pack=load_pack("zh"))
+    assert scorer.score("你好！你喜欢吃米饭吗？", ["米饭"], "1")[1]
+    assert not scorer.score("随着经济全球化的不断深入，交流日益频繁。", ["米饭"], "1")[1]
+
+
+def test_pack_without_a_character_table_checks_coverage_only(tmp_path):
+    meta = _read_meta("zh")
+    meta = dict(meta, code="zh-words-only", tables={"words": meta["tables"]["words"]})
+    meta.pop("char_columns")
+    pack = LanguagePack(str(tmp_path), meta)
+    assert not pack.has_chars
+
+    scorer = ReplyScorer(pack=pack)
+    score, acceptable = scorer.score("随着经济全球化的不断深入，米饭。", ["米饭"], "1")
+    assert acceptable and score == 1.0
+    assert not scorer.score("随着经济全球化的不断深入。", ["米饭"], "1")[1]
@@ -0,0 +1,119 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Backend.Assessment import PHONEME_DTYPE, SCORE_NAMES, WORD_DTYPE, AssessmentRecord
+from Backend.Scheduler import (INITIAL_EASE, MIN_EASE, Review, VocabularyScheduler, grade_word, new_review,
+                               review)
+
+TODAY = date(2026, 3, 2)
+
+
+def _record(text, pron_score, words=()):
+    """An assessment of `text` with one (word, accuracy) entry per segmented word."""
+    scores = np.zeros(len(SCORE_NAMES), np.float32)
+    scores[SCORE_NAMES.index("Pronunciation")] = pron_score
+    word_data = np.zeros(len(words), dtype=WORD_DTYPE)
+    word_data["accuracy"] = [accuracy for _, accuracy in words]
+    return AssessmentRecord(text, scores, tuple(word for word, _ in words), word_data,
+                            (), np.zeros(0, PHONEME_DTYPE))
+
+
+def test_sm2_passing_sequence():
+    state = new_review("你好", TODAY)
+    state = review(state, 5, TODAY)
+    assert (state.repetitions, state.interval, state.ease, state.due) == (1, 1, 2.6, TODAY + timedelta(days=1))
+    state = review(state, 5, TODAY)
+    assert (state.repetitions, state.interval, state.ease) == (2, 6, 2.7)
+    state = review(state, 4, TODAY)
+    assert (state.repetitions, state.interval, state.ease) == (3, round(6 * 2.7), 2.7)
+    state = review(state, 3, TODAY)
+    assert (state.repetitions, state.interval, state.ease) == (4, round(16 * 2.7), 2.56)
+    assert state.due == TODAY + timedelta(days=43)
+
+
+def test_sm2_failed_grade_starts_over():
+    state = Review("你好", 3, 16, 2.7, TODAY)
+    failed = review(state, 1, TODAY)
+    assert (failed.repetitions, failed.interval, failed.ease) == (0, 1, 2.16)
+    assert failed.due == TODAY + timedelta(days=1)
+    # The next pass restarts the 1, 6, ... interval sequence
+    assert review(failed, 4, TODAY).interval == 1
+    assert review(review(failed, 4, TODAY), 4, TODAY).interval == 6
+
+
+def test_sm2_ease_never_drops_below_minimum():
+    state = new_review("你好", TODAY)
+    for _ in range(5):
+        state = review(state, 0, TODAY)
+    assert state.ease == MIN_EASE
+    assert new_review("你好", TODAY).ease == INITIAL_EASE
+
+
+def test_grade_word_not_said_is_failed():
+    assert grade_word("再见", ["你好！"], [_record("你好！", 95.0, [("你好", 95.0)])]) == 1
+
+
+def test_grade_word_uses_its_word_score():
+    records = [_record("你好，我喜欢吃饭", 95.0, [("你好", 95.0), ("喜欢", 62.0), ("吃饭", 80.0)])]
+    assert grade_word("喜欢", ["你好，我喜欢吃饭"], records) == 3
+    assert grade_word("你好", ["你好，我喜欢吃饭"], records) == 5
+    # The worst of several takes counts
+    records.append(_record("喜欢", 90.0, [("喜欢", 91.0)]))
+    assert grade_word("喜欢", ["你好，我喜欢吃饭", "喜欢"], records) == 3
+
+
+def test_grade_word_falls_back_to_the_utterance_score():
+    # Azure segmented 喜欢吃 differently, so only the utterance score covers 喜欢
+    records = [_record("我喜欢吃", 78.0, [("我", 90.0), ("喜", 50.0), ("欢吃", 50.0)])]
+    assert grade_word("喜欢", ["我喜欢吃"], records) == 4
+
+
+def test_grade_word_said_without_assessment_passes():
+    assert grade_word("你好", ["你好"], []) == 4
+
+
+@pytest.fixture
+def scheduler(store):
+    words = pd.DataFrame({
+        "word": ["爱", "八", "爸爸", "杯子", "北京", "本", "不", "菜"],
+        "level": [1, 1, 1, 1, 2, 2, 2, 2],
+        # Group 10 sorts after group 2: textbook order is numeric
+        "group": ["Unit 10", "Unit 2", "Unit 2", "Unit 10", "Unit 1", "Unit 1", "Unit 2", "Unit 2"],
+    })
+    return VocabularyScheduler(store, words, {"word": "word", "level": "level", "group": "group"})
+
+
+def test_new_words_follow_textbook_order(scheduler, store):
+    user_id = store.get_or_create_user("learner", "learner@example.com")
+    assert scheduler.next_words(user_id, level=1, count=3, today=TODAY) == ["八", "爸爸", "爱"]
+    # Higher levels are filled from the levels below once exhausted
+    assert scheduler.next_words(user_id, level=2, count=6, today=TODAY) == ["北京", "本", "不", "菜", "八", "爸爸"]
+
+
+def test_due_words_come_first_then_new_words(scheduler, store):
+    user_id = store.get_or_create_user("learner", "learner@example.com")
+    store.save_word_reviews(user_id, [
+        Review("爸爸", 1, 1, 2.5, TODAY - timedelta(days=1)),
+        Review("爱", 2, 6, 2.5, TODAY - timedelta(days=3)),
+        # Reviewed but not due yet: neither due nor new
+        Review("八", 1, 1, 2.5, TODAY + timedelta(days=1)),
+    ])
+    assert scheduler.next_words(user_id, level=1, count=3, today=TODAY) == ["爱", "爸爸", "杯子"]
+    assert scheduler.next_words(user_id, level=1, count=1, today=TODAY) == ["爱"]
+
+
+def test_record_lesson_schedules_the_next_lesson(scheduler, store):
+    user_id = store.get_or_create_user("learner", "learner@example.com")
+    vocab = scheduler.next_words(user_id, level=1, count=2, today=TODAY)
+    assert vocab == ["八", "爸爸"]
+    scheduler.record_lesson(user_id, vocab, ["我的爸爸"], [_record("我的爸爸", 95.0, [("爸爸", 95.0)])], today=TODAY)
+
+    # 八 was never said: due again tomorrow, ahead of new words; 爸爸 passed
+    tomorrow = TODAY + timedelta(days=1)
+    reviews = store.get_word_reviews(user_id, vocab)
+    assert (reviews["八"].repetitions, reviews["爸爸"].repetitions) == (0, 1)
+    assert scheduler.next_words(user_id, level=1, count=2, today=TODAY) == ["爱", "杯子"]
+    assert scheduler.next_words(user_id, level=1, count=3, today=tomorrow)[:2] == ["八", "爸爸"]
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from Backend.Services import services
+
+
+@pytest.fixture
+def fake_services():
+    services.setting("mode")  # seed from Env.py first, so restoring below keeps it
+    saved = dict(services._settings)
+    services.configure(mode="fake", fakes={})
+    yield services
+    services._settings = saved
+    services.reset()
+
+
+def test_analysis_is_rebuilt_on_the_configured_database(fake_services, tmp_path):
+    first_url = f"sqlite:///{os.path.join(tmp_path, 'first.db')}"
+    second_url = f"sqlite:///{os.path.join(tmp_path, 'second.db')}"
+
+    fake_services.configure(DATABASE_URL=first_url)
+    analysis = fake_services.get("analysis")
+    assert analysis.store.database_url == first_url
+    assert fake_services.get("analysis") is analysis
+
+    fake_services.configure(DATABASE_URL=second_url)
+    assert fake_services.get("analysis").store.database_url == second_url
+
+
+def test_app_store_and_analysis_share_the_configured_database(fake_services, tmp_path):
+    url = f"sqlite:///{os.path.join(tmp_path, 'app.db')}"
+    fake_services.configure(DATABASE_URL=url)
+    assert fake_services.get("store").database_url == url
+    assert fake_services.get("analysis").store is fake_services.get("store")
+
+
+def test_analysis_is_rebuilt_when_rate_limits_change(fake_services, tmp_path):
+    fake_services.configure(DATABASE_URL=f"sqlite:///{os.path.join(tmp_path, 'app.db')}")
+    analysis = fake_services.get("analysis")
+    fake_services.configure(rate_limits={"gemini": {"rate": 1.0}})
+    assert fake_services.get("analysis") is not analysis
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from Backend.SessionStore import SessionState, create_session_backend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return create_session_backend("memory://")
+    return create_session_backend(f"sqlite:///{os.path.join(tmp_path, 'sessions.db')}")
+
+
+def test_lesson_restores_in_another_session_state(backend):
+    worker_a = SessionState(backend, "user:alice:tab1")
+    assert worker_a.save_lesson(("alice", "zh", "Unit 1"), conversation={"vocab": ["你好"]}, rounds=0, transcript=[])
+    assert worker_a.save_lesson(("alice", "zh", "Unit 1"), rounds=1, transcript=["User: 你好"])
+
+    worker_b = SessionState(backend, "user:alice:tab1")
+    assert worker_b.get("lesson_key") == ["alice", "zh", "Unit 1"]
+    assert worker_b.get("conversation") == {"vocab": ["你好"]}
+    assert worker_b.get("rounds") == 1
+    assert worker_b.get("transcript") == ["User: 你好"]
+
+
+def test_stale_tab_cannot_overwrite_newer_lesson(backend):
+    tab_a = SessionState(backend, "user:alice:tab1")
+    tab_b = SessionState(backend, "user:alice:tab1")
+    tab_a.save_lesson(("alice", "zh", "Unit 1"), conversation={"vocab": ["你好"]}, rounds=0)
+    assert tab_a.get("lesson_key") == ["alice", "zh", "Unit 1"]
+
+    # Tab B starts another unit under the same session key
+    tab_b.clear("lesson_key", "conversation", "rounds")
+    tab_b.save_lesson(("alice", "zh", "Unit 2"), conversation={"vocab": ["再见"]}, rounds=0)
+
+    # Tab A's next turn is refused even though its cache still holds Unit 1
+    assert not tab_a.save_lesson(("alice", "zh", "Unit 1"), conversation={"vocab": ["你好"]}, rounds=1)
+
+    restored = SessionState(backend, "user:alice:tab1")
+    assert restored.get("lesson_key") == ["alice", "zh", "Unit 2"]
+    assert restored.get("conversation") == {"vocab": ["再见"]}
+    assert restored.get("rounds") == 0
+
+
+def test_sessions_are_isolated_by_key(backend):
+    SessionState(backend, "user:alice:tab1").save_lesson(("alice", "zh", "Unit 1"), rounds=2)
+    other_tab = SessionState(backend, "user:alice:tab2")
+    assert other_tab.get("lesson_key") is None
+    assert other_tab.get("rounds", 0) == 0
@@ -0,0 +1,20 @@
+import pytest
+
+from Backend.Store import EmailInUse
+
+
+def test_get_or_create_user_is_idempotent(store):
+    user_id = store.get_or_create_user("learner", "learner@example.com")
+    assert store.get_or_create_user("learner", "learner@example.com") == user_id
+    # An existing username keeps its record, whatever email is passed
+    assert store.get_or_create_user("learner", "new@example.com") == user_id
+    assert store.get_or_create_user("other", "other@example.com") != user_id
+
+
+def test_new_username_with_a_taken_email(store):
+    user_id = store.get_or_create_user("learner", "learner@example.com")
+    with pytest.raises(EmailInUse):
+        store.get_or_create_user("impostor", "learner@example.com")
+    # Nothing was created and the store is still usable
+    assert store.get_or_create_user("learner", "learner@example.com") == user_id
+    assert store.get_or_create_user("impostor", "impostor@example.com") != user_id
@@ -0,0 +1,107 @@
+import pytest
+
+from Backend.ChatAnalysis import ASSESSMENT_SCHEMA, ChatAnalysis, parse_level_assessment
+from Backend.LevelEstimator import LevelAssessment
+from Backend.StructuredOutput import StructuredOutputError, compile_validator, parse_json_reply
+
+
+def test_valid_reply():
+    assert parse_json_reply('{"level": 3, "confidence": 0.8}', ASSESSMENT_SCHEMA) == {"level": 3, "confidence": 0.8}
+
+
+def test_code_fenced_reply():
+    text = '```json\n{"level": 2, "confidence": 1}\n```'
+    assert parse_json_reply(text, ASSESSMENT_SCHEMA) == {"level": 2, "confidence": 1.0}
+
+
+def test_lossless_coercions():
+    assert parse_json_reply('{"level": 4.0, "confidence": "0.5"}', ASSESSMENT_SCHEMA) == {"level": 4, "confidence": 0.5}
+    assert parse_json_reply('{"level": "5", "confidence": 0}', ASSESSMENT_SCHEMA)["level"] == 5
+
+
+def test_extra_keys_are_dropped():
+    text = '{"level": 3, "confidence": 0.8, "reason": "uses 3-level grammar"}'
+    assert parse_json_reply(text, ASSESSMENT_SCHEMA) == {"level": 3, "confidence": 0.8}
+
+
+@pytest.mark.parametrize("text, message", [
+    ('{"confidence": 0.8}', "missing required field 'level'"),
+    ('{"level": 3}', "missing required field 'confidence'"),
+    ('{"level": 3.5, "confidence": 0.8}', "expected integer"),
+    ('{"level": "three", "confidence": 0.8}', "expected integer"),
+    ('{"level": true, "confidence": 0.8}', "expected integer"),
+    ('{"level": 3, "confidence": null}', "expected number"),
+    ('{"level": 3, "confidence": false}', "expected number"),
+    ('{"level": 0, "confidence": 0.8}', "below the minimum"),
+    ('{"level": 7, "confidence": 0.8}', "above the maximum"),
+    ('{"level": 3, "confidence": 1.5}', "above the maximum"),
+    ('[3, 0.8]', "expected object"),
+    ('level 3', "Reply does not match schema"),
+    ('{"level": 3, "confidence": 0.8', "Reply does not match schema"),
+])
+def test_invalid_replies_keep_the_raw_text(text, message):
+    with pytest.raises(StructuredOutputError, match=message) as error:
+        parse_json_reply(text, ASSESSMENT_SCHEMA)
+    assert error.value.text == text
+
+
+def test_nested_schemas_report_the_path():
+    schema = {
+        "type": "object",
+        "properties": {"words": {"type": "array", "items": {"type": "string", "enum": ["你", "好"]}}},
+        "required": ["words"],
+    }
+    assert compile_validator(schema)({"words": ["你", "好"]}) == {"words": ["你", "好"]}
+    with pytest.raises(ValueError, match=r"\$\.words\[\]: '再' is not one of"):
+        compile_validator(schema)({"words": ["你", "再"]})
+    with pytest.raises(ValueError, match=r"\$\.words: expected array"):
+        compile_validator(schema)({"words": "你好"})
+
+
+def test_validators_are_compiled_once_per_schema():
+    assert compile_validator(ASSESSMENT_SCHEMA) is compile_validator(ASSESSMENT_SCHEMA)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"level": 3, "confidence": 0.8', ("3", 0.8)),
+    ("级别（必须是整数）：4\n置信度：0.65", ("4", 0.65)),
+    ("Level: 2, confidence .9", ("2", 0.9)),
+    ("级别：5", ("5", 0.5)),
+    ("level 6, confidence 1.7", ("6", 1.0)),
+])
+def test_regex_fallback(text, expected):
+    assert parse_level_assessment(text) == LevelAssessment(*expected)
+
+
+@pytest.mark.parametrize("text", ["", "我不知道", "level 7", "level 12", '{"confidence": 0.9}'])
+def test_regex_fallback_without_a_level(text):
+    assert parse_level_assessment(text) is None
+
+
+class JsonBot:
+    """Chatbot stand-in whose structured reply is `text`, validated like ChatbotWrapper.respond_json."""
+
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    def respond_json(self, prompt, schema, system_instruction=None, priority=None):
+        self.calls += 1
+        return parse_json_reply(self.text, schema)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"level": 4, "confidence": 0.9}', ("4", 0.9)),
+    # Malformed JSON: the same reply is parsed leniently, without a second call
+    ('{"level": 4, "confidence": 0.9', ("4", 0.9)),
+    ("级别：2 置信度：0.7", ("2", 0.7)),
+    # Nothing usable: the current level with low confidence
+    ("I can't tell.", ("1", 0.5)),
+])
+def test_assess_user_level_falls_back_to_the_regex(store, text, expected):
+    bot = JsonBot(text)
+    analysis = ChatAnalysis(store=store, chatbot=bot)
+    analysis.LOCAL_CONFIDENCE_THRESHOLD = 2.0  # always ask the model
+    user_id = store.get_or_create_user("learner", "learner@example.com")
+    assert analysis.assess_user_level(user_id, "我喜欢学习中文") == LevelAssessment(*expected)
+    assert bot.calls == 1
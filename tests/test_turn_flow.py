@@ -0,0 +1,30 @@
+import os
+
+from Backend.TurnFlow import TurnFlow
+
+
+class ConvertingSimli:
+    """Writes a converted copy next to the audio, as SimliAPI.convert_audio does."""
+
+    def __init__(self):
+        self.paths = []
+
+    def audio_to_video(self, face_id, audio_path):
+        converted = os.path.splitext(audio_path)[0] + "_16k.wav"
+        with open(audio_path, "rb") as source, open(converted, "wb") as target:
+            target.write(source.read())
+        self.paths += [audio_path, converted]
+        return {"mp4_url": f"https://example.invalid/{face_id}.mp4", "hls_url": None}
+
+
+def test_render_leaves_no_files_behind(tmp_path):
+    samples = tmp_path / "Samples"
+    samples.mkdir()
+    simli = ConvertingSimli()
+    flow = TurnFlow(None, None, simli, face_id="face", voice_id="voice", audio_path=str(samples / "learner.mp3"))
+
+    for digest in ("a" * 40, "b" * 40):
+        assert flow._render(b"mp3 bytes", digest)["mp4_url"] == "https://example.invalid/face.mp4"
+
+    assert list(samples.iterdir()) == []
+    assert len(simli.paths) == 4 and not any(os.path.exists(path) for path in simli.paths)